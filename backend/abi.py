@@ -0,0 +1,120 @@
+# backend/abi.py
+# Minimal Solidity ABI encoding/decoding for contract calls and event logs
+
+from typing import List, Sequence
+
+from Crypto.Hash import keccak
+
+_WORD = 32
+
+
+def keccak256(data: bytes) -> bytes:
+    return keccak.new(digest_bits=256, data=data).digest()
+
+
+def event_topic(signature: str) -> str:
+    """topic0 of an event, e.g. event_topic("FileDeleted(uint256)")"""
+    return "0x" + keccak256(signature.encode()).hex()
+
+
+def function_selector(signature: str) -> bytes:
+    """First four bytes of keccak256 of a function signature, e.g. "hasAccess(uint256,address)" """
+    return keccak256(signature.encode())[:4]
+
+
+def to_bytes(hex_data: str) -> bytes:
+    return bytes.fromhex(hex_data[2:] if hex_data.startswith("0x") else hex_data)
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    return abi_type in ("string", "bytes") or abi_type.endswith("[]")
+
+
+# 📦 Encoding
+
+def _encode_static(abi_type: str, value) -> bytes:
+    if abi_type.startswith("uint"):
+        return int(value).to_bytes(_WORD, "big")
+    if abi_type.startswith("int"):
+        return int(value).to_bytes(_WORD, "big", signed=True)
+    if abi_type == "address":
+        return to_bytes(value).rjust(_WORD, b"\0")
+    if abi_type == "bool":
+        return (1 if value else 0).to_bytes(_WORD, "big")
+    if abi_type.startswith("bytes"):
+        return bytes(value).ljust(_WORD, b"\0")
+    raise ValueError(f"Unsupported ABI type: {abi_type}")
+
+
+def _encode_dynamic(abi_type: str, value) -> bytes:
+    if abi_type in ("string", "bytes"):
+        data = value.encode("utf-8") if abi_type == "string" else bytes(value)
+        padded = data.ljust((len(data) + _WORD - 1) // _WORD * _WORD, b"\0")
+        return len(data).to_bytes(_WORD, "big") + padded
+    item_type = abi_type[:-2]
+    return len(value).to_bytes(_WORD, "big") + encode([item_type] * len(value), value)
+
+
+def encode(types: Sequence[str], values: Sequence) -> bytes:
+    """ABI-encode values as a tuple of `types` (head/tail layout)"""
+    heads, tails = [], []
+    tail_offset = _WORD * len(types)
+    for abi_type, value in zip(types, values):
+        if _is_dynamic(abi_type):
+            tail = _encode_dynamic(abi_type, value)
+            heads.append(tail_offset.to_bytes(_WORD, "big"))
+            tails.append(tail)
+            tail_offset += len(tail)
+        else:
+            heads.append(_encode_static(abi_type, value))
+    return b"".join(heads) + b"".join(tails)
+
+
+def encode_call(signature: str, *args) -> str:
+    """Calldata for `signature` (e.g. "getFileInfo(uint256)") as a 0x-prefixed hex string"""
+    arg_types = [t for t in signature[signature.index("(") + 1:-1].split(",") if t]
+    return "0x" + (function_selector(signature) + encode(arg_types, args)).hex()
+
+
+# 🔍 Decoding
+
+def _decode_static(abi_type: str, word: bytes):
+    if abi_type.startswith("uint"):
+        return int.from_bytes(word, "big")
+    if abi_type.startswith("int"):
+        return int.from_bytes(word, "big", signed=True)
+    if abi_type == "address":
+        return "0x" + word[12:].hex()
+    if abi_type == "bool":
+        return word[-1] != 0
+    if abi_type.startswith("bytes"):
+        return word[:int(abi_type[5:])]
+    raise ValueError(f"Unsupported ABI type: {abi_type}")
+
+
+def _decode_dynamic(abi_type: str, data: bytes, offset: int):
+    length = int.from_bytes(data[offset:offset + _WORD], "big")
+    start = offset + _WORD
+    if abi_type in ("string", "bytes"):
+        raw = data[start:start + length]
+        return raw.decode("utf-8", "replace") if abi_type == "string" else raw
+    return decode([abi_type[:-2]] * length, data[start:])
+
+
+def decode(types: Sequence[str], data: bytes) -> List:
+    """Decode an ABI-encoded tuple of `types`; addresses come back as lower-case 0x strings"""
+    values = []
+    for index, abi_type in enumerate(types):
+        word = data[index * _WORD:(index + 1) * _WORD]
+        if len(word) < _WORD:
+            raise ValueError("ABI data is too short")
+        if _is_dynamic(abi_type):
+            values.append(_decode_dynamic(abi_type, data, int.from_bytes(word, "big")))
+        else:
+            values.append(_decode_static(abi_type, word))
+    return values
+
+
+def decode_topic(abi_type: str, topic: str):
+    """Decode an indexed event argument (value types only)"""
+    return _decode_static(abi_type, to_bytes(topic).rjust(_WORD, b"\0"))
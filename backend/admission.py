@@ -0,0 +1,370 @@
+# backend/admission.py
+# Bounded concurrency pools with a short wait queue, so bursts of heavy requests get a fast 503
+
+import os
+import math
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from flask import current_app, jsonify
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+# CPU-bound work (encryption, decryption, key derivation) is capped near the core count;
+# I/O-bound work (gateway relays, RPC calls) mostly waits on sockets and can run wider
+CRYPTO_CONCURRENCY = int(os.getenv("VAULTIS_CRYPTO_CONCURRENCY") or os.cpu_count() or 2)
+CRYPTO_QUEUE_SIZE = int(os.getenv("VAULTIS_CRYPTO_QUEUE_SIZE") or 2 * CRYPTO_CONCURRENCY)
+IO_CONCURRENCY = int(os.getenv("VAULTIS_IO_CONCURRENCY", 32))
+IO_QUEUE_SIZE = int(os.getenv("VAULTIS_IO_QUEUE_SIZE", 64))
+# Longest a request may wait in the queue before it is rejected
+ADMISSION_WAIT_SECONDS = float(os.getenv("VAULTIS_ADMISSION_WAIT_SECONDS", 2.0))
+# Longest a transfer that was already admitted waits for its next crypto slot before it is rejected
+COMPUTE_WAIT_SECONDS = float(os.getenv("VAULTIS_COMPUTE_WAIT_SECONDS", 30.0))
+# Password KDFs are memory-hard, so few run at once regardless of how many requests arrive
+KDF_WORKERS = int(os.getenv("VAULTIS_KDF_WORKERS") or min(4, os.cpu_count() or 2))
+KDF_QUEUE_SIZE = int(os.getenv("VAULTIS_KDF_QUEUE_SIZE") or 4 * KDF_WORKERS)
+KDF_TIMEOUT_SECONDS = float(os.getenv("VAULTIS_KDF_TIMEOUT_SECONDS", 30))
+
+
+class Overloaded(Exception):
+    """Raised when a pool cannot admit a request in time"""
+
+    def __init__(self, pool: str, reason: str, retry_after: int):
+        super().__init__(f"{pool} pool is {'full' if reason == 'queue_full' else 'busy'}")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A held slot; release() is idempotent so it can be tied to several exit paths"""
+
+    __slots__ = ("_pool", "_released")
+
+    def __init__(self, pool: "AdmissionPool"):
+        self._pool = pool
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionPool:
+    """
+    At most `limit` holders at once, at most `queue_size` waiters behind them
+
+    A request that finds the queue full is rejected immediately; one that
+    queues is rejected once `wait_timeout` seconds pass without a free slot.
+
+    Args:
+        name (str): Pool name used in metrics and error messages
+        limit (int): Maximum concurrent holders
+        queue_size (int): Maximum waiting requests
+        wait_timeout (float): Queue deadline in seconds
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, wait_timeout: float = ADMISSION_WAIT_SECONDS):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.wait_timeout = wait_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.wait_timeout))
+
+    def _reject(self, reason: str) -> Overloaded:
+        metrics.ADMISSION_REJECTIONS.inc(pool=self.name, reason=reason)
+        logger.warning("[🚦] Rejected request: %s pool %s", self.name, reason, extra={"pool": self.name, "reason": reason})
+        return Overloaded(self.name, reason, self.retry_after)
+
+    def acquire(self, timeout: Optional[float] = None) -> AdmissionTicket:
+        """
+        Take a slot, waiting in the queue if necessary
+
+        Raises:
+            Overloaded: If the queue is full or the deadline passes
+        """
+        timeout = self.wait_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        with self._cond:
+            if self.in_flight < self.limit and self.waiting == 0:
+                self.in_flight += 1
+                metrics.ADMISSION_WAIT.observe(0.0, pool=self.name)
+                return AdmissionTicket(self)
+            if self.waiting >= self.queue_size:
+                raise self._reject("queue_full")
+
+            self.waiting += 1
+            try:
+                deadline = started + timeout
+                while self.in_flight >= self.limit:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise self._reject("timeout")
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+            finally:
+                self.waiting -= 1
+        metrics.ADMISSION_WAIT.observe(time.perf_counter() - started, pool=self.name)
+        return AdmissionTicket(self)
+
+    def hold(self, timeout: Optional[float] = COMPUTE_WAIT_SECONDS) -> AdmissionTicket:
+        """
+        Take another slot for a transfer this pool already admitted
+
+        Used for the later CPU-bound steps of a streamed transfer. The
+        transfer was counted against the queue when it was admitted, so it
+        is not counted again and goes ahead of requests still queueing;
+        `timeout` still bounds the wait. None waits as long as it takes,
+        for transfers whose response has started and can no longer be a 503.
+
+        Raises:
+            Overloaded: If `timeout` passes without a free slot
+        """
+        started = time.perf_counter()
+        with self._cond:
+            while self.in_flight >= self.limit:
+                if timeout is None:
+                    self._cond.wait()
+                    continue
+                remaining = started + timeout - time.perf_counter()
+                if remaining <= 0:
+                    raise self._reject("timeout")
+                self._cond.wait(remaining)
+            self.in_flight += 1
+        metrics.ADMISSION_WAIT.observe(time.perf_counter() - started, pool=self.name)
+        return AdmissionTicket(self)
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+
+class ComputeGate:
+    """
+    Hold a pool slot only while a streamed transfer is computing
+
+    Uploads and downloads interleave CPU work (encryption, chunking) with
+    waiting on sockets (the client, Pinata, a gateway). Routes are admitted
+    through the io pool; the gate takes a crypto slot around each CPU-bound
+    step, so a slow client or upstream never keeps a core's slot idle.
+
+    compute() holds a slot for each item it pulls from an iterator, io()
+    gives it up for each item it pulls, and held()/released() do the same
+    for a block of code. They nest: io() inside compute() releases the slot
+    for the read and takes a new one before computing continues.
+
+    The first slot admits the transfer through the pool's queue and
+    deadline (AdmissionPool.acquire), so a burst of transfers is turned
+    away with Overloaded before any response starts. Later slots wait up to
+    COMPUTE_WAIT_SECONDS (AdmissionPool.hold), and without a deadline once
+    started() marks the response as sent.
+
+    Args:
+        pool (AdmissionPool): Pool whose slots bound the CPU-bound steps
+    """
+
+    def __init__(self, pool: AdmissionPool):
+        self.pool = pool
+        self._ticket: Optional[AdmissionTicket] = None
+        self._admitted = False
+        self._started = False
+
+    def started(self) -> None:
+        """The response has started: from now on a busy pool delays the transfer instead of failing it"""
+        self._started = True
+
+    def _take(self) -> AdmissionTicket:
+        if not self._admitted:
+            ticket = self.pool.acquire()
+            self._admitted = True
+            return ticket
+        return self.pool.hold(None if self._started else COMPUTE_WAIT_SECONDS)
+
+    @contextmanager
+    def held(self):
+        self._ticket = self._take()
+        try:
+            yield
+        finally:
+            self._ticket.release()
+            self._ticket = None
+
+    @contextmanager
+    def released(self):
+        if self._ticket is None:
+            yield
+            return
+        self._ticket.release()
+        try:
+            yield
+        finally:
+            self._ticket = self._take()
+
+    def compute(self, iterable: Iterable) -> Iterator:
+        iterator = iter(iterable)
+        while True:
+            with self.held():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def io(self, iterable: Iterable) -> Iterator:
+        iterator = iter(iterable)
+        while True:
+            with self.released():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+
+class BoundedExecutor:
+    """
+    Fixed worker threads with a bounded backlog for expensive jobs (e.g. password KDFs)
+
+    The job runs on a worker, off the request thread's stack and memory
+    budget, and at most `workers` jobs run at once however many requests
+    arrive. Submitting while `workers + queue_size` jobs are outstanding
+    fails immediately with Overloaded.
+
+    Args:
+        name (str): Pool name used in metrics and thread names
+        workers (int): Worker threads
+        queue_size (int): Jobs allowed to wait for a worker
+        timeout (float): Seconds run() waits for a result
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, timeout: float = KDF_TIMEOUT_SECONDS):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self.outstanding = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+
+    @property
+    def in_flight(self) -> int:
+        return min(self.outstanding, self.workers)
+
+    @property
+    def waiting(self) -> int:
+        return max(0, self.outstanding - self.workers)
+
+    def _done(self, _future) -> None:
+        with self._lock:
+            self.outstanding -= 1
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on a worker and return its result
+
+        Raises:
+            Overloaded: If the backlog is full
+            concurrent.futures.TimeoutError: If the job takes longer than `timeout`
+        """
+        with self._lock:
+            if self.outstanding >= self.workers + self.queue_size:
+                metrics.ADMISSION_REJECTIONS.inc(pool=self.name, reason="queue_full")
+                logger.warning("[🚦] Rejected job: %s pool queue_full", self.name, extra={"pool": self.name, "reason": "queue_full"})
+                raise Overloaded(self.name, "queue_full", max(1, math.ceil(ADMISSION_WAIT_SECONDS)))
+            self.outstanding += 1
+        started = time.perf_counter()
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._done)
+        result = future.result(timeout=self.timeout)
+        metrics.ADMISSION_WAIT.observe(time.perf_counter() - started, pool=self.name)
+        return result
+
+
+POOLS: Dict[str, AdmissionPool] = {
+    "crypto": AdmissionPool("crypto", CRYPTO_CONCURRENCY, CRYPTO_QUEUE_SIZE),
+    "io": AdmissionPool("io", IO_CONCURRENCY, IO_QUEUE_SIZE),
+}
+KDF_EXECUTOR = BoundedExecutor("kdf", KDF_WORKERS, KDF_QUEUE_SIZE)
+
+
+def crypto_gate() -> ComputeGate:
+    """ComputeGate over the crypto pool, one per transfer"""
+    return ComputeGate(POOLS["crypto"])
+
+
+def _pool_stats(attribute: str) -> Dict[tuple, int]:
+    stats = {(name,): getattr(pool, attribute) for name, pool in POOLS.items()}
+    stats[(KDF_EXECUTOR.name,)] = getattr(KDF_EXECUTOR, attribute)
+    return stats
+
+
+metrics.ADMISSION_IN_FLIGHT.set_function(lambda: _pool_stats("in_flight"))
+metrics.ADMISSION_QUEUE_DEPTH.set_function(lambda: _pool_stats("waiting"))
+
+
+def overloaded_response(error: Overloaded):
+    """503 JSON response with Retry-After for a rejected request"""
+    response = jsonify({
+        "error": "Server is busy, please retry shortly",
+        "code": "OVERLOADED",
+        "pool": error.pool
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def admit(pool_name: str):
+    """
+    Route decorator running the view inside a slot of pool `pool_name`
+
+    Streamed responses keep their slot until the body has been sent. Routes
+    that stream are admitted through the io pool and take crypto slots only
+    around their CPU-bound steps (see ComputeGate); their first crypto slot
+    goes through the crypto pool's queue, and a rejection there is returned
+    by the route as the same 503. When the pool is saturated the view is
+    not called and a 503 with Retry-After is returned.
+    """
+    pool = POOLS[pool_name]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                ticket = pool.acquire()
+            except Overloaded as e:
+                return overloaded_response(e)
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                ticket.release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(ticket.release)
+            else:
+                ticket.release()
+            return response
+        return wrapper
+    return decorator
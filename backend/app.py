@@ -1,18 +1,19 @@
 import base64
 from email.mime.application import MIMEApplication
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, Response, g, request, jsonify, render_template
 from flask_cors import CORS
 import os
 import sys
 import uuid
-import traceback
+import logging
 import hashlib
 import requests
 import json
 import time
 import random
 import string
-import smtplib
+import queue
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import re
@@ -28,15 +29,49 @@ load_dotenv()
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(BASE_DIR)
 
+# 📝 Logging setup (queue-backed, see backend/logging_config.py)
+from backend.logging_config import configure_logging
+configure_logging()
+logger = logging.getLogger("backend.app")
+
 # ✅ Imports from project modules
-from storage.upload_to_ipfs import upload_to_pinata
-from crypto.encryptor import encrypt_file_with_kyber
-from crypto.decryptor import decrypt_file_with_kyber, verify_installation
+from storage.upload_to_ipfs import upload_stream_to_pinata
+from storage.key_store import get_key_store
+from storage.public_keys import get_public_keys
+from storage.metadata_index import get_metadata_index
+from storage.event_index import get_event_index
+from crypto.encryptor import encrypt_stream_with_kyber
+from crypto.pqc import kyber
+from crypto.streaming import StreamFormatError, encode_header, wrap_for_recipients
+from crypto.convergent import MANIFEST_CONTENT, encode_manifest
+from crypto.compression import CODECS as COMPRESSION_CODECS
+from crypto.password_wrap import unwrap_private_key, wrap_private_key
+from crypto.decryptor import verify_installation
+from backend import metrics, tracing
+from backend.upload_stream import MultipartFileStream, iter_body
+from backend.download_stream import DownloadError, DownloadPipeline, content_disposition, fetch_container_header
+from backend.admission import KDF_EXECUTOR, Overloaded, admit, crypto_gate, overloaded_response
+from backend.ephemeral_keys import KEY_STORE
+from backend.mailer import get_mail_queue
+from backend.availability import MAX_BATCH_SIZE, get_availability_checker
+from backend.event_indexer import get_indexer
+from backend.tx_indexer import get_history_indexer
+from backend.contract_reads import MAX_READS, get_contract_reader
+from backend.rpc import RPCError
+from backend.firewall import get_firewall
+from backend.timelock import TIMELOCK_DURATIONS, get_timelock_engine, timelock_delay
+from backend.key_rotation import get_key_rotator
+from backend.dedup import DedupWriter
+from backend.wallet_auth import WalletAuthError, get_request_verifier
+from storage.timelock_store import STATUSES as TIMELOCK_STATUSES
 
 # 🔧 Flask app setup
 app = Flask(__name__)
 # FIX: Enable CORS for all routes without restrictions
-CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
+CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}}, expose_headers=["Server-Timing", "ETag"])
+
+# 📊 Report temp directory size on every /metrics scrape
+metrics.watch_temp_dir("temp")
 
 
 SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
@@ -46,6 +81,12 @@ SMTP_USER = os.getenv('SMTP_USER')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 FROM_EMAIL = os.getenv('FROM_EMAIL', '"Quantum File System" <noreply@quantumfiles.com>')
 
+# Content behind a CID never changes, so encrypted downloads may be cached for as long as clients like
+CID_CACHE_MAX_AGE = int(os.getenv('CID_CACHE_MAX_AGE', 31536000))
+
+# Compression before encryption: "auto" samples each upload, "off" stores plaintext as sent
+UPLOAD_COMPRESSION = os.getenv('VAULTIS_UPLOAD_COMPRESSION', 'auto').lower()
+
 # Default blockchain settings configuration
 DEFAULT_BLOCKCHAIN_SETTINGS = {
     # Backup & Recovery Features
@@ -65,7 +106,8 @@ DEFAULT_BLOCKCHAIN_SETTINGS = {
         "security_notifications": True,
         "whitelisted_addresses": [],
         "transaction_timelock": "None",  # None, 1 Hour, 24 Hours, 48 Hours, 7 Days
-        "hash_algorithm": "SHA-256"  # SHA-256, SHA-3, BLAKE2
+        "hash_algorithm": "SHA-256",  # SHA-256, SHA-3, BLAKE2
+        "additional_hash_algorithms": []  # Extra digests computed alongside hash_algorithm during upload
     },
     # Quantum Protection Features
     "quantum_protection": {
@@ -90,45 +132,6 @@ if not os.path.exists(SETTINGS_FILE):
     with open(SETTINGS_FILE, 'w') as f:
         json.dump(DEFAULT_BLOCKCHAIN_SETTINGS, f, indent=4)
 
-def get_from_pinata(cid, output_path):
-    """
-    Download a file from Pinata IPFS by its CID and save it to output_path
-    Returns True if successful, False otherwise
-    """
-    try:
-        # Try multiple gateways in case one fails
-        gateways = [
-            f"https://gateway.pinata.cloud/ipfs/{cid}",
-            f"https://ipfs.io/ipfs/{cid}",
-            f"https://cloudflare-ipfs.com/ipfs/{cid}"
-        ]
-        
-        for gateway_url in gateways:
-            try:
-                print(f"[🔍] Trying IPFS gateway: {gateway_url}")
-                
-                # Make the request to download the file
-                response = requests.get(gateway_url, stream=True, timeout=30)
-                response.raise_for_status()
-                
-                # Save the file to the specified output path
-                with open(output_path, 'wb') as file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        file.write(chunk)
-                
-                print(f"[✅] Successfully downloaded file to {output_path}")
-                return True
-            except requests.RequestException as gateway_error:
-                print(f"[⚠️] Gateway {gateway_url} failed: {gateway_error}")
-                continue
-        
-        print(f"[❌] All IPFS gateways failed for CID: {cid}")
-        return False
-        
-    except Exception as e:
-        print(f"[❌] Error downloading from IPFS: {e}")
-        traceback.print_exc()
-        return False
 # Helper function for quantum settings
 def get_blockchain_settings():
     """
@@ -138,7 +141,7 @@ def get_blockchain_settings():
         with open(SETTINGS_FILE, 'r') as f:
             return json.load(f)
     except Exception as e:
-        print(f"[⚠️] Error loading blockchain settings: {e}")
+        logger.warning("[⚠️] Error loading blockchain settings: %s", e)
         # Return default settings if file can't be loaded
         return DEFAULT_BLOCKCHAIN_SETTINGS
 
@@ -149,217 +152,349 @@ def save_blockchain_settings(settings):
     try:
         with open(SETTINGS_FILE, 'w') as f:
             json.dump(settings, f, indent=4)
+        get_firewall().set_whitelist(settings["security"]["whitelisted_addresses"])
         return True
     except Exception as e:
-        print(f"[❌] Error saving blockchain settings: {e}")
+        logger.error("[❌] Error saving blockchain settings: %s", e)
         return False
 
+# 🔒 The firewall keeps the whitelist as a set; refreshed on every settings save
+get_firewall().set_whitelist(get_blockchain_settings()["security"]["whitelisted_addresses"])
+
+def signed_wallet(required=True):
+    """
+    Wallet that signed this request
+
+    The client sends X-Wallet-Address, X-Wallet-Timestamp and X-Wallet-Signature,
+    the wallet's personal_sign of "Vaultis request\\n{METHOD} {path}\\n{timestamp}".
+
+    Returns:
+        str: Lower-case address, or None for an unsigned request when not `required`
+
+    Raises:
+        WalletAuthError: If the signature is missing (when `required`), stale, replayed or invalid
+    """
+    signature = request.headers.get("X-Wallet-Signature")
+    address = request.headers.get("X-Wallet-Address")
+    if not signature or not address:
+        if required:
+            raise WalletAuthError(
+                "Sign this request with your wallet: send X-Wallet-Address, X-Wallet-Timestamp and X-Wallet-Signature",
+                401, "SIGNATURE_REQUIRED"
+            )
+        return None
+    # Each signature verifies once, so remember the signer for the rest of the request
+    if "signed_wallet" not in g:
+        g.signed_wallet = get_request_verifier().verify(
+            request.method, request.path, address, signature, request.headers.get("X-Wallet-Timestamp")
+        )
+    return g.signed_wallet
+
+def requesting_wallet():
+    """Signed wallet of this request, or None if it is unsigned or the signature does not verify"""
+    try:
+        return signed_wallet(required=False)
+    except WalletAuthError as e:
+        logger.warning("[⚠️] Ignoring wallet signature: %s", e)
+        return None
+
+def upload_owner():
+    """
+    Owner of an upload: the wallet that signed the request (see signed_wallet).
+    An unsigned upload has no owner until PUT /api/files/<cid> records the one on chain.
+
+    Raises:
+        WalletAuthError: If a signature was sent but does not verify
+    """
+    return signed_wallet(required=False)
+
+def upload_recipients():
+    """
+    Wallets to share a new upload with, sent as ?recipients=0x...,0x...
+    
+    Returns:
+        dict: {address: Kyber public key}
+    
+    Raises:
+        ValueError: If an address is malformed or has no registered public key
+    """
+    addresses = [address.strip() for address in request.args.get("recipients", "").split(",") if address.strip()]
+    if not addresses:
+        return {}
+    if not all(re.fullmatch(r"0x[0-9a-fA-F]{40}", address) for address in addresses):
+        raise ValueError("Recipients must be wallet addresses")
+    found = get_public_keys().get_many(addresses)
+    missing = [address for address in addresses if address.lower() not in found]
+    if missing:
+        raise ValueError(f"No public key registered for: {', '.join(missing)}")
+    return found
+
+def upload_dedup():
+    """True when the upload asked for deduplicated storage with ?dedup=true"""
+    return request.args.get("dedup", "false").lower() == "true"
+
+def upload_compression():
+    """
+    Compression requested with ?compression=auto|off|<codec>, defaulting to VAULTIS_UPLOAD_COMPRESSION
+    
+    Returns:
+        str: "auto", a codec name, or None for no compression
+    
+    Raises:
+        ValueError: If the value is not auto, off or a known codec
+    """
+    mode = request.args.get("compression", UPLOAD_COMPRESSION).lower()
+    if mode == "off":
+        return None
+    if mode != "auto" and mode not in COMPRESSION_CODECS:
+        raise ValueError(f"Compression must be auto, off or one of: {', '.join(COMPRESSION_CODECS)}")
+    return mode
+
+def stream_encrypt_and_upload(chunks, original_filename, owner=None, recipients=None, dedup=False, compression=None):
+    """
+    Encrypt plaintext blocks and pin the ciphertext to IPFS in a single pass.
+    Each block is encrypted, hashed and sent to Pinata as soon as it arrives,
+    so neither the plaintext nor the ciphertext is written to disk. The
+    integrity digests are updated by the encryptor itself, so every configured
+    algorithm is computed in that same pass. The upload's metadata is then
+    recorded in the local metadata index.
+    
+    The data key is also wrapped for every {address: public_key} in
+    `recipients`, so those wallets can decrypt with their own private key.
+    
+    With `dedup`, the plaintext is split into content-defined chunks and only
+    chunks the owner has not pinned before are uploaded (see backend/dedup.py);
+    the encrypted container then holds the chunk manifest instead of the data.
+    `owner` must then be a verified wallet: the returned dedup stats tell
+    which of these chunks it had stored before.
+    
+    `compression` ("auto" or a codec) compresses the plaintext before it is
+    encrypted; the codec is recorded in the container header and reversed
+    transparently on download.
+    """
+    # Get current quantum security settings
+    settings = get_blockchain_settings()
+    quantum_settings = settings["quantum_protection"]
+    
+    # Apply quantum settings to encryption if enabled
+    use_quantum_enhanced = quantum_settings["quantum_resistance_mode"] != "Off"
+    
+    # 🧠 Integrity digests over the ciphertext, computed while it is produced
+    hash_algorithm = settings["security"]["hash_algorithm"]
+    hash_algorithms = [hash_algorithm] + list(settings["security"].get("additional_hash_algorithms", []))
+    
+    # 🚦 A crypto slot is held only while encrypting, never while reading the client or sending to Pinata
+    gate = crypto_gate()
+    
+    # ♻️ Deduplicated mode: pin the chunks this owner has not stored yet, then encrypt their manifest
+    dedup_stats, metadata = None, None
+    if dedup:
+        with tracing.span("dedup"):
+            writer = DedupWriter(owner, gate=gate)
+            manifest = writer.write(chunks)
+        dedup_stats = writer.stats
+        chunks = [encode_manifest(manifest)]
+        metadata = {"content": MANIFEST_CONTENT}
+    
+    # 🔐 Encrypt using Kyber, chunk by chunk
+    with gate.held():
+        ciphertext, public_key, private_key, encryptor = encrypt_stream_with_kyber(
+            gate.io(chunks), digests=hash_algorithms, recipients=recipients, metadata=metadata,
+            compression=compression, filename=original_filename
+        )
+    
+    # 🚀 Upload encrypted stream to IPFS via Pinata
+    upload_started = time.perf_counter()
+    try:
+        with tracing.span("encrypt_upload"):
+            cid = upload_stream_to_pinata(gate.compute(ciphertext), f"encrypted_{original_filename}")
+    except Exception:
+        metrics.PINATA_UPLOAD_LATENCY.observe(time.perf_counter() - upload_started, outcome="error")
+        raise
+    metrics.PINATA_UPLOAD_LATENCY.observe(time.perf_counter() - upload_started, outcome="success")
+    size = dedup_stats["size"] if dedup_stats else encryptor.plaintext_bytes
+    metrics.BYTES_ENCRYPTED.inc(size)
+    metrics.COMPRESSED_UPLOADS.inc(codec=encryptor.compression or "none")
+    if encryptor.compression:
+        metrics.COMPRESSION_BYTES_SAVED.inc(max(0, encryptor.plaintext_bytes - encryptor.payload_bytes))
+    trace = tracing.current_trace()
+    if trace is not None:
+        trace.add("encrypt", encryptor.encrypt_seconds)
+    encrypted_hash = encryptor.digests.hexdigest(hash_algorithm)
+    logger.info(
+        "[🌐] Uploaded to IPFS! CID: %s", cid,
+        extra={"cid": cid, "file_name": original_filename, "size": size}
+    )
+    
+    # Hold the private key in memory for one-time retrieval (never written to disk)
+    with tracing.span("store_key"):
+        private_key_id = KEY_STORE.put(str(private_key))
+    
+    # 🗂️ Index the upload; the file is already pinned, so a failure here must not fail the request
+    upload_timestamp = int(time.time())
+    try:
+        with tracing.span("index"):
+            get_metadata_index().record_upload(
+                cid, original_filename, size, hash_algorithm, encrypted_hash,
+                encrypted_hashes=encryptor.digests.hexdigests(), owner=owner, created_at=upload_timestamp
+            )
+        if owner:
+            get_firewall().record_upload(cid, owner)
+    except Exception as e:
+        logger.warning("[⚠️] Failed to index upload %s: %s", cid, e)
+    
+    # Backup handling (if enabled)
+    backup_info = {}
+    if settings["backup"]["auto_backup_enabled"] and settings["backup"]["blockchain_backup_address"]:
+        try:
+            # Simulate backup to blockchain address
+            backup_info = {
+                "backed_up": True,
+                "backup_address": settings["backup"]["blockchain_backup_address"],
+                "backup_timestamp": time.time()
+            }
+            logger.info("[💾] Auto-backup to blockchain address: %s", settings['backup']['blockchain_backup_address'])
+        except Exception as e:
+            backup_info = {"backed_up": False, "error": str(e)}
+            logger.warning("[⚠️] Auto-backup failed: %s", e)
+    
+    return jsonify({
+        "cid": cid,
+        "kyber_public_key": public_key,
+        "encrypted_hash": encrypted_hash,
+        "encrypted_hashes": encryptor.digests.hexdigests(),
+        "original_filename": original_filename,
+        "size": size,
+        "timestamp": upload_timestamp,
+        # The key itself is collected once from /api/private-key/<id>, never sent in this response
+        "private_key_id": private_key_id,
+        "private_key_warning": "IMPORTANT: Retrieve your private key from /api/private-key/<private_key_id> and save it immediately. It can be retrieved only once and cannot be recovered.",
+        "recipients": list(recipients or {}),
+        "dedup": dedup_stats,
+        "compression": encryptor.compression,
+        "stored_size": encryptor.ciphertext_bytes,
+        "quantum_enhanced": use_quantum_enhanced,
+        "backup_info": backup_info
+    }), 200
+
 @app.route("/api/encrypt-upload", methods=["POST"])
+@admit("io")
 def encrypt_and_upload():
-    if "file" not in request.files:
+    """Encrypt a multipart file upload while it is being received and pin it to IPFS"""
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
         return jsonify({"error": "No file uploaded"}), 400
     
-    uploaded_file = request.files["file"]
-    original_filename = uploaded_file.filename
+    try:
+        # 📥 Read the file part straight from the request body (no temp file)
+        uploaded_file = MultipartFileStream(request.stream, boundary, field_name="file")
+    except ValueError:
+        return jsonify({"error": "No file uploaded"}), 400
     
-    # 📁 Temp file paths
-    temp_input_path = os.path.join("temp", f"input_{uuid.uuid4().hex}_{original_filename}")
-    temp_encrypted_path = os.path.join("temp", f"encrypted_{uuid.uuid4().hex}_{original_filename}")
+    original_filename = uploaded_file.filename or "upload"
+    logger.info("[📥] Receiving file: %s", original_filename)
     
     try:
-        # 📂 Ensure temp directory exists
-        os.makedirs("temp", exist_ok=True)
-        
-        # 💾 Save uploaded file to temp location
-        uploaded_file.save(temp_input_path)
-        print(f"[📥] Received file: {original_filename}")
-        print(f"[🗂️] Temp input path: {temp_input_path}")
-        
-        # Get current quantum security settings
-        settings = get_blockchain_settings()
-        quantum_settings = settings["quantum_protection"]
-        
-        # Apply quantum settings to encryption if enabled
-        use_quantum_enhanced = quantum_settings["quantum_resistance_mode"] != "Off"
-        
-        # 🔐 Encrypt using Kyber with quantum enhancements if enabled
-        encrypted_data, public_key, private_key = encrypt_file_with_kyber(
-            input_path=temp_input_path,
-            output_path=temp_encrypted_path
-        )
-        
-        if not encrypted_data:
-            raise Exception("Encryption failed. No encrypted data returned.")
-        
-        print(f"[🔐] Encryption complete. Encrypted file saved at: {temp_encrypted_path}")
-        
-        # Properly format the public key for JSON response
-        print(f"[🔑] Public key type: {type(public_key)}")
-        print(f"[🔑] Public key value: {public_key}")
-        
-        # Ensure public_key is a string
-        if isinstance(public_key, bytes):
-            formatted_public_key = public_key.decode('utf-8', errors='replace')
-        elif not isinstance(public_key, str):
-            formatted_public_key = str(public_key)
-        else:
-            formatted_public_key = public_key
-            
-        print(f"[🔑] Formatted public key for response: {formatted_public_key}")
-        
-        # Save private key temporarily (in a real app, you would handle this more securely)
-        private_key_path = os.path.join("temp", f"private_key_{uuid.uuid4().hex}")
-        with open(private_key_path, 'w') as f:
-            if isinstance(private_key, bytes):
-                f.write(private_key.decode('utf-8', errors='replace'))
-            else:
-                f.write(str(private_key))
-        
-        # 🚀 Upload encrypted file to IPFS via Pinata
-        cid = upload_to_pinata(temp_encrypted_path)
-        print(f"[🌐] Uploaded to IPFS! CID: {cid}")
-        
-        # 🧠 Generate hash of encrypted data for integrity (optional)
-        hash_algorithm = settings["security"]["hash_algorithm"]
-        if hash_algorithm == "SHA-256":
-            encrypted_hash = hashlib.sha256(encrypted_data.encode()).hexdigest()
-        elif hash_algorithm == "SHA-3":
-            encrypted_hash = hashlib.sha3_256(encrypted_data.encode()).hexdigest()
-        elif hash_algorithm == "BLAKE2":
-            encrypted_hash = hashlib.blake2b(encrypted_data.encode()).hexdigest()
-        else:
-            encrypted_hash = hashlib.sha256(encrypted_data.encode()).hexdigest()
-        
-        # Backup handling (if enabled)
-        backup_info = {}
-        if settings["backup"]["auto_backup_enabled"] and settings["backup"]["blockchain_backup_address"]:
-            try:
-                # Simulate backup to blockchain address
-                backup_info = {
-                    "backed_up": True,
-                    "backup_address": settings["backup"]["blockchain_backup_address"],
-                    "backup_timestamp": time.time()
-                }
-                print(f"[💾] Auto-backup to blockchain address: {settings['backup']['blockchain_backup_address']}")
-            except Exception as e:
-                backup_info = {"backed_up": False, "error": str(e)}
-                print(f"[⚠️] Auto-backup failed: {e}")
-        
-        return jsonify({
-            "cid": cid,
-            "kyber_public_key": formatted_public_key,
-            "encrypted_hash": encrypted_hash,
-            "original_filename": original_filename,
-            "private_key_id": os.path.basename(private_key_path),
-            "private_key": str(private_key),  # Include the actual private key
-            "private_key_warning": "IMPORTANT: Save this private key immediately. It will be deleted from our servers and cannot be recovered.",
-            "quantum_enhanced": use_quantum_enhanced,
-            "backup_info": backup_info
-        }), 200
+        recipients = upload_recipients()
+    except ValueError as e:
+        return jsonify({"error": str(e), "code": "RECIPIENT_KEY_MISSING"}), 400
+    try:
+        owner = upload_owner()
+    except WalletAuthError as e:
+        return jsonify({"error": str(e), "code": e.code}), e.status
+    # Dedup stats show which chunks the owner stored before, so only the signed owner may pick the scope
+    if upload_dedup() and not owner:
+        return jsonify({"error": "Deduplicated uploads must be signed by the owner's wallet", "code": "DEDUP_OWNER_REQUIRED"}), 401
+    try:
+        compression = upload_compression()
+    except ValueError as e:
+        return jsonify({"error": str(e), "code": "COMPRESSION_UNSUPPORTED"}), 400
     
+    try:
+        return stream_encrypt_and_upload(
+            uploaded_file, original_filename, owner, recipients, upload_dedup(), compression
+        )
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"[❌] Error during encryption/upload: {e}")
-        traceback.print_exc()
+        logger.exception("[❌] Error during encryption/upload: %s", e)
         return jsonify({"error": f"Encryption/Upload failed: {str(e)}"}), 500
-    
-    finally:
-        # 🧹 Cleanup temp files (but keep private key for now)
-        for path in [temp_input_path, temp_encrypted_path]:
-            if os.path.exists(path):
-                os.remove(path)
-                print(f"[🧹] Deleted temp file: {path}")
 
-@app.route("/api/download/<cid>", methods=["GET"])
-def download_file(cid):
-    """Download an encrypted file directly from IPFS without decryption"""
-    print(f"[🔄] Download request received for CID: {cid}")
-    
-    # Create temp directory if it doesn't exist
-    os.makedirs("temp", exist_ok=True)
+@app.route("/api/encrypt-upload/<filename>", methods=["PUT"])
+@admit("io")
+def encrypt_and_upload_raw(filename):
+    """Encrypt a raw application/octet-stream request body and pin it to IPFS"""
+    original_filename = secure_filename(filename) or "upload"
+    logger.info("[📥] Receiving raw upload: %s", original_filename)
     
-    # Generate temporary file path
-    temp_downloaded_path = os.path.join("temp", f"downloaded_{uuid.uuid4().hex}")
+    try:
+        recipients = upload_recipients()
+    except ValueError as e:
+        return jsonify({"error": str(e), "code": "RECIPIENT_KEY_MISSING"}), 400
+    try:
+        owner = upload_owner()
+    except WalletAuthError as e:
+        return jsonify({"error": str(e), "code": e.code}), e.status
+    # Dedup stats show which chunks the owner stored before, so only the signed owner may pick the scope
+    if upload_dedup() and not owner:
+        return jsonify({"error": "Deduplicated uploads must be signed by the owner's wallet", "code": "DEDUP_OWNER_REQUIRED"}), 401
+    try:
+        compression = upload_compression()
+    except ValueError as e:
+        return jsonify({"error": str(e), "code": "COMPRESSION_UNSUPPORTED"}), 400
     
     try:
-        print(f"[🔍] Attempting to download file with CID: {cid}")
-        
-        # Download encrypted file from IPFS/Pinata
-        download_success = get_from_pinata(cid, temp_downloaded_path)
-        
-        if not download_success:
-            print("[❌] Failed to download file from IPFS")
-            return jsonify({"error": "Failed to retrieve file from IPFS"}), 404
-        
-        print(f"[📥] Downloaded encrypted file to: {temp_downloaded_path}")
-        
-        # Check if file exists and has content
-        if not os.path.exists(temp_downloaded_path):
-            print(f"[❌] File was not found at {temp_downloaded_path}")
-            return jsonify({"error": "Downloaded file not found on server"}), 500
-            
-        if os.path.getsize(temp_downloaded_path) == 0:
-            print(f"[❌] Downloaded file is empty: {temp_downloaded_path}")
-            return jsonify({"error": "Downloaded file is empty"}), 500
-        
-        print(f"[📤] About to send file {temp_downloaded_path} (size: {os.path.getsize(temp_downloaded_path)} bytes)")
-        
-        # Return the file with proper CORS headers
-        response = send_file(
-            temp_downloaded_path,
-            as_attachment=True,
-            download_name=f"file-{cid[:8]}",
-            mimetype="application/octet-stream"
+        return stream_encrypt_and_upload(
+            iter_body(request.stream), original_filename, owner, recipients, upload_dedup(), compression
         )
-        
-        # Add CORS headers explicitly
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-        
-        return response
-        
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"[❌] Error during file download: {e}")
-        traceback.print_exc()
-        return jsonify({"error": f"Download failed: {str(e)}"}), 500
-    print(f"[🔄] Download request received for CID: {cid}")
+        logger.exception("[❌] Error during encryption/upload: %s", e)
+        return jsonify({"error": f"Encryption/Upload failed: {str(e)}"}), 500
+
+def stream_download_response(pipeline, download_name, mimetype="application/octet-stream"):
+    """
+    Wrap an opened DownloadPipeline in a streamed attachment response
     
-    # Create temp directory if it doesn't exist
-    os.makedirs("temp", exist_ok=True)
+    Decryption runs while the body is sent, after Server-Timing has gone out
+    with the headers; the pipeline records the decrypt and stream_body
+    stages in the stage latency metrics and the trace file instead.
+    """
+    pipeline.trace = tracing.defer_trace()
+    # Response.close() closes the pipeline (and its gateway connection) once the body is done
+    response = Response(pipeline, mimetype=mimetype)
+    response.headers["Content-Disposition"] = content_disposition(download_name)
+    if pipeline.content_length is not None:
+        response.headers["Content-Length"] = str(pipeline.content_length)
+    return response
+
+def set_immutable_cache_headers(response, cid):
+    """
+    Mark a response as the immutable content of `cid`
+    
+    The CID is a content hash, so it doubles as a strong ETag and the
+    response can be cached by browsers, proxies and CDNs indefinitely.
+    """
+    response.set_etag(cid)
+    response.headers["Cache-Control"] = f"public, max-age={CID_CACHE_MAX_AGE}, immutable"
+    return response
+
+@app.route("/api/download/<cid>", methods=["GET"])
+@admit("io")
+def download_file(cid):
+    """Download an encrypted file directly from IPFS without decryption"""
+    logger.info("[🔄] Download request received for CID: %s", cid)
     
-    # Generate temporary file path
-    temp_downloaded_path = os.path.join("temp", f"downloaded_{uuid.uuid4().hex}")
+    # ♻️ Revalidation needs no gateway round trip: same CID, same bytes
+    if request.if_none_match.contains_weak(cid):
+        logger.debug("[♻️] Not modified: %s", cid)
+        return set_immutable_cache_headers(Response(status=304), cid)
     
     try:
-        print(f"[🔍] Attempting to download file with CID: {cid}")
-        
-        # Download encrypted file from IPFS/Pinata
-        download_success = get_from_pinata(cid, temp_downloaded_path)
-        
-        if not download_success:
-            print("[❌] Failed to download file from IPFS")
-            return jsonify({"error": "Failed to retrieve file from IPFS"}), 404
-        
-        print(f"[📥] Downloaded encrypted file to: {temp_downloaded_path}")
-        
-        # Check if file exists and has content
-        if not os.path.exists(temp_downloaded_path):
-            print(f"[❌] File was not found at {temp_downloaded_path}")
-            return jsonify({"error": "Downloaded file not found on server"}), 500
-            
-        if os.path.getsize(temp_downloaded_path) == 0:
-            print(f"[❌] Downloaded file is empty: {temp_downloaded_path}")
-            return jsonify({"error": "Downloaded file is empty"}), 500
-        
-        print(f"[📤] About to send file {temp_downloaded_path} (size: {os.path.getsize(temp_downloaded_path)} bytes)")
-        
-        # Return the file with proper CORS headers
-        response = send_file(
-            temp_downloaded_path,
-            as_attachment=True,
-            download_name=f"file-{cid[:8]}",
-            mimetype="application/octet-stream"
-        )
+        # 📥 Relay the gateway body as it arrives
+        pipeline = DownloadPipeline(cid).open()
+        response = set_immutable_cache_headers(stream_download_response(pipeline, f"file-{cid[:8]}"), cid)
         
         # Add CORS headers explicitly
         response.headers.add('Access-Control-Allow-Origin', '*')
@@ -368,20 +503,33 @@ def download_file(cid):
         
         return response
         
+    except DownloadError as e:
+        logger.error("[❌] Failed to download file from IPFS: %s", e)
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        print(f"[❌] Error during file download: {e}")
-        traceback.print_exc()
+        logger.exception("[❌] Error during file download: %s", e)
         return jsonify({"error": f"Download failed: {str(e)}"}), 500
-    
-    finally:
-        # Don't delete the file yet - Flask needs to send it
-        # After-request cleanup will handle this
-        pass
 
 @app.route("/api/store-key", methods=["POST"])
 def store_encrypted_key():
-    """Store a private key encrypted with a user password"""
+    """
+    Store a private key encrypted with a user password.
+    Also accepts {"keys": [{"cid": ..., "private_key": ...}, ...]} to store many keys in one transaction.
+    """
     try:
+        if request.json and isinstance(request.json.get("keys"), list):
+            entries = request.json["keys"]
+            if not all(isinstance(entry, dict) and entry.get("cid") and entry.get("private_key") for entry in entries):
+                return jsonify({"error": "Every entry needs a private key and CID"}), 400
+            stored = get_key_store().put_many(
+                (entry["cid"], entry["private_key"].encode('utf-8'), False) for entry in entries
+            )
+            return jsonify({
+                "status": "success",
+                "message": f"Stored {stored} private keys",
+                "stored": stored
+            }), 200
+        
         if not request.json or "private_key" not in request.json or "cid" not in request.json:
             return jsonify({"error": "Private key and CID are required"}), 400
             
@@ -389,23 +537,13 @@ def store_encrypted_key():
         cid = request.json["cid"]
         password = request.json.get("password", "")  # Optional password
         
-        # Create a secure directory for key storage
-        key_storage_dir = os.path.join(BASE_DIR, "key_storage")
-        os.makedirs(key_storage_dir, exist_ok=True)
-        
-        # Hash the CID to create a filename
-        filename = hashlib.sha256(cid.encode()).hexdigest()
-        key_path = os.path.join(key_storage_dir, filename)
-        
-        # If password provided, encrypt the private key
+        # If password provided, wrap the private key with a scrypt-derived key (on the KDF workers)
         if password:
-            # Simple encryption - in production, use proper encryption
-            encrypted_key = encrypt_file_with_kyber(private_key, password)
-            with open(key_path, 'w') as f:
-                f.write(encrypted_key) # type: ignore
+            with tracing.span("kdf"):
+                wrapped_key = KDF_EXECUTOR.run(wrap_private_key, private_key, password)
+            get_key_store().put(cid, wrapped_key, protected=True)
         else:
-            with open(key_path, 'w') as f:
-                f.write(private_key)
+            get_key_store().put(cid, private_key.encode('utf-8'))
                 
         return jsonify({
             "status": "success",
@@ -413,16 +551,474 @@ def store_encrypted_key():
             "requires_password": bool(password)
         }), 200
             
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        print(f"[❌] Error storing private key: {e}")
+        logger.error("[❌] Error storing private key: %s", e)
         return jsonify({"error": f"Failed to store private key: {str(e)}"}), 500
 
+@app.route("/api/files", methods=["GET"])
+def list_files():
+    """
+    Newest-first page of indexed uploads, filtered by ?owner= when given.
+    Pass the returned next_cursor as ?cursor= to fetch the following page.
+    """
+    try:
+        owner = request.args.get("owner")
+        files, next_cursor = get_metadata_index().list_uploads(
+            owner=owner,
+            limit=request.args.get("limit", 50, type=int),
+            cursor=request.args.get("cursor")
+        )
+        return jsonify({"files": files, "next_cursor": next_cursor}), 200
+    except ValueError as e:
+        return jsonify({"error": f"Invalid cursor: {str(e)}"}), 400
+    except Exception as e:
+        logger.error("[❌] Error listing files: %s", e)
+        return jsonify({"error": f"Failed to list files: {str(e)}"}), 500
+
+@app.route("/api/files/<cid>", methods=["GET"])
+def get_file_metadata(cid):
+    """Indexed metadata for one CID"""
+    try:
+        record = get_metadata_index().get(cid)
+        if record is None:
+            return jsonify({"error": "File not found in index"}), 404
+        return jsonify(record), 200
+    except Exception as e:
+        logger.error("[❌] Error reading file metadata: %s", e)
+        return jsonify({"error": f"Failed to read file metadata: {str(e)}"}), 500
+
+def onchain_file(file_id, caller):
+    """
+    On-chain record of `file_id` from the contract event index, or from the contract
+    itself while the indexer catches up
+    
+    Returns:
+        dict: {"cid", "owner", "uploader", ...}, or None if neither source knows the file
+    
+    Raises:
+        RPCError: If the contract read fails
+    """
+    record = get_event_index().get_file(file_id)
+    if record is not None:
+        return record
+    reader = get_contract_reader()
+    if reader is None or not caller:
+        return None
+    _, files = reader.file_info_many([file_id], caller)
+    return files.get(file_id)
+
+@app.route("/api/files/<cid>", methods=["PUT"])
+def update_file_metadata(cid):
+    """
+    Attach the on-chain file ID ({"file_id": ..., "owner": ...}) once the upload is mined.
+    The owner recorded is the file's uploader on chain; a claimed owner that does not
+    match it is rejected, and nothing is recorded while the file cannot be found on chain.
+    Firewall origins are not written here: the firewall reads FileStored events itself.
+    """
+    try:
+        data = request.json or {}
+        file_id = data.get("file_id")
+        if file_id is None or not str(file_id).isdigit():
+            return jsonify({"error": "file_id must be a non-negative integer"}), 400
+        file_id = int(file_id)
+        claimed = data.get("owner")
+        if get_metadata_index().get(cid) is None:
+            return jsonify({"error": "File not found in index"}), 404
+        
+        record = onchain_file(file_id, claimed)
+        if record is None:
+            return jsonify({
+                "error": "File is not on chain yet; retry once the transaction is indexed",
+                "code": "OWNER_UNVERIFIED"
+            }), 409
+        if record["cid"] != cid:
+            return jsonify({"error": "file_id belongs to another CID", "code": "FILE_ID_MISMATCH"}), 409
+        if claimed and claimed.lower() != record["uploader"].lower():
+            return jsonify({"error": "Owner does not match the on-chain uploader", "code": "OWNER_MISMATCH"}), 403
+        
+        get_metadata_index().set_owner(cid, record["uploader"], file_id)
+        return jsonify(get_metadata_index().get(cid)), 200
+    except RPCError as e:
+        logger.error("[❌] getFileInfo read failed: %s", e)
+        return jsonify({"error": f"Failed to read from the chain: {str(e)}"}), 502
+    except Exception as e:
+        logger.error("[❌] Error updating file metadata: %s", e)
+        return jsonify({"error": f"Failed to update file metadata: {str(e)}"}), 500
+
+@app.route("/api/files/lookup", methods=["POST"])
+def lookup_files():
+    """Indexed metadata for a list of CIDs ({"cids": [...]}) in one request"""
+    try:
+        cids = (request.json or {}).get("cids")
+        if not isinstance(cids, list) or not all(isinstance(cid, str) for cid in cids):
+            return jsonify({"error": "A list of CIDs is required"}), 400
+        
+        found = get_metadata_index().get_many(cids)
+        return jsonify({
+            "files": found,
+            "missing": [cid for cid in cids if cid not in found]
+        }), 200
+    except Exception as e:
+        logger.error("[❌] Error looking up files: %s", e)
+        return jsonify({"error": f"Failed to look up files: {str(e)}"}), 500
+
+@app.route("/api/public-keys", methods=["POST"])
+def register_public_key():
+    """
+    Register the Kyber public key files are shared with for a wallet
+    ({"address": ..., "public_key": ...}). Without "public_key" a key pair is
+    generated and its private key returned once; it is not kept on the server.
+    """
+    try:
+        data = request.json or {}
+        address = data.get("address")
+        if not isinstance(address, str) or not re.fullmatch(r"0x[0-9a-fA-F]{40}", address):
+            return jsonify({"error": "A valid wallet address is required"}), 400
+        
+        public_key, private_key = data.get("public_key"), None
+        if not public_key:
+            public_key, private_key = kyber.generate_keys()
+            if not public_key:
+                return jsonify({"error": "Kyber key generation failed"}), 500
+        get_public_keys().put(address, public_key)
+        
+        response = {"status": "success", "address": address.lower(), "public_key": public_key}
+        if private_key:
+            response["private_key"] = private_key
+            response["private_key_warning"] = "IMPORTANT: Save this private key immediately. It opens every file shared with this address and cannot be recovered."
+        return jsonify(response), 200
+    except Exception as e:
+        logger.error("[❌] Error registering public key: %s", e)
+        return jsonify({"error": f"Failed to register public key: {str(e)}"}), 500
+
+@app.route("/api/public-keys/<address>", methods=["GET"])
+def get_public_key(address):
+    """Registered Kyber public key of a wallet"""
+    public_key = get_public_keys().get(address)
+    if public_key is None:
+        return jsonify({"error": "No public key registered for this address"}), 404
+    return jsonify({"address": address.lower(), "public_key": public_key}), 200
+
+def current_header(cid):
+    """Container header of `cid` as downloads see it: the detached copy if there is one, else the pinned one"""
+    header = get_key_store().get_header(cid)
+    if header is None:
+        header, _ = fetch_container_header(cid)
+    return header
+
+@app.route("/api/files/<cid>/recipients", methods=["GET"])
+def list_file_recipients(cid):
+    """Wallets a file is shared with (recipient entries beyond the uploader's own key)"""
+    try:
+        header = current_header(cid)
+        if header is None:
+            return jsonify({"error": "Legacy uploads have no recipient list", "code": "LEGACY_FORMAT"}), 409
+        return jsonify({
+            "cid": cid,
+            "recipients": [entry["recipient"] for entry in header.get("recipients", []) if entry.get("recipient")],
+            "entries": len(header.get("recipients", []))
+        }), 200
+    except DownloadError as e:
+        return jsonify({"error": str(e), "code": e.code}), e.status
+    except Exception as e:
+        logger.error("[❌] Error listing recipients of %s: %s", cid, e)
+        return jsonify({"error": f"Failed to list recipients: {str(e)}"}), 500
+
+@app.route("/api/files/<cid>/recipients", methods=["POST"])
+def share_file(cid):
+    """
+    Let more wallets decrypt a file without re-encrypting it: the data key is
+    wrapped for each wallet's registered public key and appended to the file's
+    detached header ({"addresses": [...]}). The key that opens the file is
+    "private_key" when sent; otherwise the server-held key is used, which only
+    the uploader may do, proven by a wallet signature of the request (see
+    signed_wallet); "password" unlocks a protected one.
+    """
+    try:
+        data = request.json or {}
+        addresses = data.get("addresses")
+        if not isinstance(addresses, list) or not addresses or not all(
+            isinstance(address, str) and re.fullmatch(r"0x[0-9a-fA-F]{40}", address) for address in addresses
+        ):
+            return jsonify({"error": "A list of wallet addresses is required"}), 400
+        found = get_public_keys().get_many(addresses)
+        missing = [address for address in addresses if address.lower() not in found]
+        if not found:
+            return jsonify({"error": "No public key registered for these addresses", "missing": missing}), 404
+        
+        private_key = data.get("private_key")
+        if not private_key:
+            if get_firewall().origin(cid) != signed_wallet():
+                return jsonify({"error": "Only the uploader can share with the stored key; send private_key instead"}), 403
+            stored = get_key_store().get(cid)
+            if stored is None:
+                return jsonify({"error": "No stored key for this file; send private_key instead"}), 404
+            key_data, protected = stored
+            if not protected:
+                private_key = key_data.decode('utf-8')
+            elif not data.get("password"):
+                return jsonify({"error": "The stored key is password protected", "requires_password": True}), 401
+            else:
+                try:
+                    with tracing.span("kdf"):
+                        private_key = KDF_EXECUTOR.run(unwrap_private_key, key_data, data["password"])
+                except ValueError as e:
+                    return jsonify({"error": str(e), "requires_password": True}), 403
+        
+        header = current_header(cid)
+        if header is None:
+            return jsonify({"error": "Legacy uploads cannot be shared; re-upload the file", "code": "LEGACY_FORMAT"}), 409
+        try:
+            entries = wrap_for_recipients(header, private_key, found)
+        except StreamFormatError as e:
+            return jsonify({"error": str(e)}), 403
+        header = get_key_store().add_recipients(cid, header, entries)
+        logger.info("[🤝] Shared %s with %s wallet(s)", cid, len(entries))
+        
+        return jsonify({
+            "status": "success",
+            "cid": cid,
+            "added": list(found),
+            "missing": missing,
+            "recipients": [entry["recipient"] for entry in header["recipients"] if entry.get("recipient")],
+            "header_size": len(encode_header(header))
+        }), 200
+    except Overloaded as e:
+        return overloaded_response(e)
+    except (DownloadError, WalletAuthError) as e:
+        return jsonify({"error": str(e), "code": e.code}), e.status
+    except Exception as e:
+        logger.error("[❌] Error sharing %s: %s", cid, e)
+        return jsonify({"error": f"Failed to share file: {str(e)}"}), 500
+
+@app.route("/api/check-file/<cid>", methods=["GET"])
+@admit("io")
+def check_file(cid):
+    """Report whether any IPFS gateway can currently serve a CID"""
+    if not is_valid_cid(cid):
+        return jsonify({"error": "Invalid CID format"}), 400
+    try:
+        return jsonify(get_availability_checker().check(cid)), 200
+    except Exception as e:
+        logger.error("[❌] Error checking CID %s: %s", cid, e)
+        return jsonify({"error": f"Availability check failed: {str(e)}"}), 500
+
+@app.route("/api/check-files", methods=["POST"])
+@admit("io")
+def check_files():
+    """
+    Check many CIDs ({"cids": [...]}) at once.
+    Results are streamed as newline-delimited JSON, one line per CID in the
+    order the probes finish, so clients can render them as they arrive.
+    """
+    cids = (request.json or {}).get("cids") if request.is_json else None
+    if not isinstance(cids, list) or not all(isinstance(cid, str) for cid in cids):
+        return jsonify({"error": "A list of CIDs is required"}), 400
+    if len(cids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} CIDs can be checked per request"}), 413
+    
+    valid = [cid for cid in cids if is_valid_cid(cid)]
+    invalid = [cid for cid in dict.fromkeys(cids) if not is_valid_cid(cid)]
+    logger.info("[🔍] Checking availability of %s CIDs", len(valid))
+    
+    def generate():
+        for cid in invalid:
+            yield json.dumps({"cid": cid, "available": False, "error": "Invalid CID format"}) + "\n"
+        for result in get_availability_checker().check_many(valid):
+            yield json.dumps(result) + "\n"
+    
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@app.route("/api/chain/files", methods=["GET"])
+def list_chain_files():
+    """
+    Newest-first page of live on-chain files for ?address=, from the local event index.
+    ?role=owner limits the page to files the address owns (default: every file it can access).
+    Entries are merged with the upload metadata index (file name, size) where available.
+    """
+    address = request.args.get("address", "")
+    role = request.args.get("role", "access")
+    if not re.fullmatch(r"0x[0-9a-fA-F]{40}", address):
+        return jsonify({"error": "A valid address is required"}), 400
+    if role not in ("access", "owner"):
+        return jsonify({"error": "role must be 'access' or 'owner'"}), 400
+    
+    try:
+        files, next_cursor = get_event_index().files_for_address(
+            address,
+            role=role,
+            limit=request.args.get("limit", 50, type=int),
+            after=request.args.get("cursor", type=int)
+        )
+        metadata = get_metadata_index().get_many(file["cid"] for file in files)
+        for file in files:
+            indexed = metadata.get(file["cid"])
+            file["original_filename"] = indexed["original_filename"] if indexed else None
+            file["size"] = indexed["size"] if indexed else None
+            file["is_owner"] = file["owner"] == address.lower()
+        return jsonify({
+            "files": files,
+            "next_cursor": next_cursor,
+            "indexed_block": get_event_index().last_block()
+        }), 200
+    except Exception as e:
+        logger.error("[❌] Error listing on-chain files: %s", e)
+        return jsonify({"error": f"Failed to list files: {str(e)}"}), 500
+
+@app.route("/api/chain/files/<int:file_id>", methods=["GET"])
+def get_chain_file(file_id):
+    """One live on-chain file with its current access list"""
+    try:
+        record = get_event_index().get_file(file_id)
+        if record is None:
+            return jsonify({"error": "File not found"}), 404
+        return jsonify(record), 200
+    except Exception as e:
+        logger.error("[❌] Error reading on-chain file %s: %s", file_id, e)
+        return jsonify({"error": f"Failed to read file: {str(e)}"}), 500
+
+@app.route("/api/chain/status", methods=["GET"])
+def chain_index_status():
+    """How far the contract event index has caught up"""
+    indexer = get_indexer()
+    if indexer is None:
+        return jsonify({"enabled": False, "error": "VAULTIS_CONTRACT_ADDRESS is not configured"}), 200
+    return jsonify({
+        "enabled": True,
+        "contract": indexer.address,
+        "rpc_url": indexer.client.url,
+        "indexed_block": indexer.index.last_block(),
+        "head_block": indexer.head,
+        "lag_blocks": indexer.lag(),
+        "files": indexer.index.count_files()
+    }), 200
+
+def _contract_read_request():
+    """Parsed {"file_ids": [...]} body and the reader, or an error response"""
+    reader = get_contract_reader()
+    if reader is None:
+        return None, None, (jsonify({"error": "VAULTIS_CONTRACT_ADDRESS is not configured"}), 503)
+    data = request.get_json(silent=True) or {}
+    file_ids = data.get("file_ids")
+    if not isinstance(file_ids, list) or not all(isinstance(file_id, int) and file_id >= 0 for file_id in file_ids):
+        return None, None, (jsonify({"error": "file_ids must be a list of file IDs"}), 400)
+    return reader, data, None
+
+@app.route("/api/chain/reads/access", methods=["POST"])
+def read_access_batch():
+    """
+    hasAccess for every file in {"file_ids": [...]} and every address in {"users": [...]},
+    answered with one batched round trip to the node (and cached for the current block)
+    """
+    reader, data, error = _contract_read_request()
+    if error:
+        return error
+    users = data.get("users")
+    if not isinstance(users, list) or not all(isinstance(u, str) and re.fullmatch(r"0x[0-9a-fA-F]{40}", u) for u in users):
+        return jsonify({"error": "users must be a list of addresses"}), 400
+    if len(data["file_ids"]) * len(users) > MAX_READS:
+        return jsonify({"error": f"At most {MAX_READS} reads per request"}), 413
+    
+    try:
+        block, access = reader.has_access_many(
+            (file_id, user) for file_id in data["file_ids"] for user in users
+        )
+    except RPCError as e:
+        logger.error("[❌] Batched hasAccess read failed: %s", e)
+        return jsonify({"error": f"Failed to read from the chain: {str(e)}"}), 502
+    
+    matrix = {}
+    for (file_id, user), allowed in access.items():
+        matrix.setdefault(str(file_id), {})[user] = allowed
+    return jsonify({"block": block, "access": matrix}), 200
+
+@app.route("/api/chain/reads/file-info", methods=["POST"])
+def read_file_info_batch():
+    """
+    getFileInfo for every file in {"file_ids": [...]} as {"caller": address}, in one round trip.
+    Files the caller has no access to come back as null.
+    """
+    reader, data, error = _contract_read_request()
+    if error:
+        return error
+    caller = data.get("caller", "")
+    if not isinstance(caller, str) or not re.fullmatch(r"0x[0-9a-fA-F]{40}", caller):
+        return jsonify({"error": "A valid caller address is required"}), 400
+    if len(data["file_ids"]) > MAX_READS:
+        return jsonify({"error": f"At most {MAX_READS} reads per request"}), 413
+    
+    try:
+        block, files = reader.file_info_many(data["file_ids"], caller)
+    except RPCError as e:
+        logger.error("[❌] Batched getFileInfo read failed: %s", e)
+        return jsonify({"error": f"Failed to read from the chain: {str(e)}"}), 502
+    return jsonify({"block": block, "files": {str(file_id): info for file_id, info in files.items()}}), 200
+
+@app.route("/api/history/<address>", methods=["GET"])
+def transaction_history(address):
+    """
+    Newest-first page of an address's transactions from the local history index.
+    Values and gas prices are wei as decimal strings; `indexed_from`/`indexed_to`
+    tell the client which blocks the page is complete for.
+    """
+    if not re.fullmatch(r"0x[0-9a-fA-F]{40}", address):
+        return jsonify({"error": "A valid address is required"}), 400
+    indexer = get_history_indexer()
+    if indexer is None:
+        return jsonify({"error": "Transaction history indexing is not enabled"}), 503
+    
+    try:
+        history = indexer.history
+        transactions, next_cursor = history.history(
+            address,
+            limit=request.args.get("limit", 25, type=int),
+            cursor=request.args.get("cursor")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("[❌] Error reading transaction history for %s: %s", address, e)
+        return jsonify({"error": f"Failed to read transaction history: {str(e)}"}), 500
+    
+    address = address.lower()
+    for tx in transactions:
+        tx["direction"] = "sent" if tx["from"] == address else "received"
+        tx["confirmations"] = indexer.head - tx["block_number"] + 1 if indexer.head is not None else None
+    return jsonify({
+        "transactions": transactions,
+        "next_cursor": next_cursor,
+        "indexed_from": history.first_block(),
+        "indexed_to": history.last_block(),
+        "head_block": indexer.head
+    }), 200
+
+@app.route("/api/history/status", methods=["GET"])
+def transaction_history_status():
+    """How much of the chain the transaction history index covers"""
+    indexer = get_history_indexer()
+    if indexer is None:
+        return jsonify({"enabled": False, "error": "VAULTIS_HISTORY_ENABLED is not set"}), 200
+    return jsonify({
+        "enabled": True,
+        "rpc_url": indexer.client.url,
+        "chain_id": indexer.history.chain_id(),
+        "indexed_from": indexer.history.first_block(),
+        "indexed_to": indexer.history.last_block(),
+        "head_block": indexer.head,
+        "lag_blocks": indexer.lag(),
+        "backfill_remaining": indexer.backfill_remaining(),
+        "transactions": indexer.history.count()
+    }), 200
 
 
 @app.route("/api/download-decrypt/<cid>", methods=["POST"])
+@admit("io")
 def download_and_decrypt(cid):
-    temp_files_to_cleanup = []  # Initialize at the start
-    print(f"[🔄] Download and decrypt request received for CID: {cid}")
+    logger.info("[🔄] Download and decrypt request received for CID: %s", cid)
     
     # Check for private key in request
     if not request.json or "private_key" not in request.json:
@@ -431,74 +1027,21 @@ def download_and_decrypt(cid):
     private_key = request.json.get("private_key")
     original_filename = request.json.get("original_filename", f"decrypted-{cid[:8]}")
     
-    # Create temp directory if it doesn't exist
-    os.makedirs("temp", exist_ok=True)
-    
-    # Generate temporary file paths
-    temp_downloaded_path = os.path.join("temp", f"downloaded_{uuid.uuid4().hex}")
-    temp_decrypted_path = os.path.join("temp", f"decrypted_{uuid.uuid4().hex}_{original_filename}")
-    
     try:
         # Get current security settings
         settings = get_blockchain_settings()
         
         # Check transaction whitelist if enabled
         if settings["security"]["stateful_transaction_firewall"] and len(settings["security"]["whitelisted_addresses"]) > 0:
-            # In a real application, you would verify the CID against whitelisted addresses
-            # For demonstration, we'll just log it
-            print(f"[🔒] Transaction firewall active, checking whitelist for CID: {cid}")
-            # Mock whitelist check
-            whitelist_passed = True  # In a real app, this would be an actual check
-            if not whitelist_passed:
+            if not verify_cid_whitelist(cid):
                 return jsonify({"error": "CID not from a whitelisted address"}), 403
         
-        print(f"[🔍] Attempting to download file with CID: {cid}")
-        
-        # Download encrypted file from IPFS/Pinata
-        download_success = get_from_pinata(cid, temp_downloaded_path)
-        
-        if not download_success:
-            print("[❌] Failed to download file from IPFS")
-            return jsonify({"error": "Failed to retrieve file from IPFS"}), 404
-        
-        print(f"[📥] Downloaded encrypted file to: {temp_downloaded_path}")
-        
-        # Check if file exists and has content
-        if not os.path.exists(temp_downloaded_path):
-            print(f"[❌] File was not found at {temp_downloaded_path}")
-            return jsonify({"error": "Downloaded file not found on server"}), 500
-            
-        if os.path.getsize(temp_downloaded_path) == 0:
-            print(f"[❌] Downloaded file is empty: {temp_downloaded_path}")
-            return jsonify({"error": "Downloaded file is empty"}), 500
-        
-        print(f"[🔓] Attempting to decrypt file...")
-        
-        # Apply quantum enhancement settings for decryption if enabled
-        quantum_settings = settings["quantum_protection"]
-        use_quantum_enhanced = quantum_settings["quantum_resistance_mode"] != "Off"
-        
-        # Decrypt the file
-        decryption_success = decrypt_file_with_kyber(
-            input_path=temp_downloaded_path,
-            output_path=temp_decrypted_path,
-            private_key=private_key,
-            use_quantum_enhanced=use_quantum_enhanced
-        )
-        
-        if not decryption_success:
-            print("[❌] Decryption failed")
-            return jsonify({"error": "Failed to decrypt file"}), 500
-            
-        print(f"[✅] Successfully decrypted file to: {temp_decrypted_path}")
+        if settings["quantum_protection"]["quantum_resistance_mode"] != "Off":
+            logger.debug("[⚛️] Using quantum-enhanced mode for decryption")
         
-        # Return the decrypted file with proper CORS headers
-        response = send_file(
-            temp_decrypted_path,
-            as_attachment=True,
-            download_name=original_filename,
-            mimetype="application/octet-stream"
-        )
+        # 🔓 Fetch, authenticate and decrypt frame by frame into the response
+        pipeline = DownloadPipeline(cid, private_key=private_key).open()
+        response = stream_download_response(pipeline, original_filename)
         
         # Add CORS headers explicitly
         response.headers.add('Access-Control-Allow-Origin', '*')
@@ -507,18 +1050,18 @@ def download_and_decrypt(cid):
         
         return response
         
+    except Overloaded as e:
+        return overloaded_response(e)
+    except DownloadError as e:
+        logger.error("[❌] Download and decryption failed: %s", e)
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        print(f"[❌] Error during file download and decryption: {e}")
-        traceback.print_exc()
+        logger.exception("[❌] Error during file download and decryption: %s", e)
         return jsonify({"error": f"Download and decryption failed: {str(e)}"}), 500
-    
-    finally:
-        # Don't delete the file yet - Flask needs to send it
-        # After-request cleanup will handle this
-        pass
 
 
 @app.route("/api/download-decrypt", methods=["POST"])
+@admit("io")
 def download_decrypt():
     """Download and decrypt a file from IPFS using real Kyber decryption (alternative endpoint)"""
     try:
@@ -545,120 +1088,39 @@ def download_decrypt():
                 'code': 'INVALID_CID'
             }), 400
         
+        # Check transaction whitelist if enabled
+        security = get_blockchain_settings()["security"]
+        if security["stateful_transaction_firewall"] and security["whitelisted_addresses"] and not verify_cid_whitelist(cid):
+            return jsonify({'error': 'CID not from a whitelisted address', 'code': 'FIREWALL_BLOCKED'}), 403
+        
         # Sanitize filename
         original_filename = secure_filename(original_filename)
         if not original_filename:
             original_filename = f"decrypted-{cid[:8]}.txt"
             
-        print(f"[🔍] Processing download-decrypt request:")
-        print(f"  CID: {cid}")
-        print(f"  Filename: {original_filename}")
-        print(f"  Kyber variant: {kyber_variant}")
-        
-        # Create temp directory
-        temp_dir = "temp"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Generate temporary file paths
-        temp_downloaded_path = os.path.join(temp_dir, f"dl_{cid[:8]}_{uuid.uuid4().hex[:8]}.enc")
-        temp_decrypted_path = os.path.join(temp_dir, f"dec_{uuid.uuid4().hex[:8]}_{original_filename}")
-        
-        # Add to cleanup list
-        temp_files_to_cleanup = []  # Initialize the list
-        temp_files_to_cleanup.extend([temp_downloaded_path, temp_decrypted_path])
-        
-        # Verify Kyber libraries
-        if not verify_installation():
-            return jsonify({
-                "error": "Kyber decryption libraries not available",
-                "code": "KYBER_LIBS_MISSING",
-                "install_hint": "Run: pip install pqcrypto cryptography"
-            }), 500
-        
-        print(f"[🔍] Downloading file with CID: {cid}")
-        
-        # Download encrypted file from IPFS/Pinata
-        download_success = get_from_pinata(cid, temp_downloaded_path)
-        
-        if not download_success:
-            print(f"[❌] Failed to download file from IPFS for CID: {cid}")
-            return jsonify({
-                "error": "Failed to retrieve file from IPFS",
-                "code": "IPFS_RETRIEVAL_FAILED",
-                "cid": cid
-            }), 404
-        
-        print(f"[📥] Downloaded encrypted file to: {temp_downloaded_path}")
-        
-        # File validation
-        if not os.path.exists(temp_downloaded_path):
-            return jsonify({
-                "error": "Downloaded file not found on server",
-                "code": "DOWNLOAD_VERIFICATION_FAILED"
-            }), 500
-            
-        file_size = os.path.getsize(temp_downloaded_path)
-        if file_size == 0:
-            return jsonify({
-                "error": "Downloaded file is empty",
-                "code": "EMPTY_DOWNLOAD"
-            }), 500
-        
-        print(f"[📊] Downloaded file size: {file_size} bytes")
-        
-        # Get security settings
-        try:
-            settings = get_blockchain_settings()
-            quantum_settings = settings["quantum_protection"]
-            use_quantum_enhanced = quantum_settings["quantum_resistance_mode"] != "Off"
-        except Exception as e:
-            print(f"[⚠️] Could not load security settings: {e}")
-            use_quantum_enhanced = False
-        
-        print(f"[🔓] Starting real Kyber decryption...")
-        
-        # Decrypt using the updated real implementation
-        decryption_success = decrypt_file_with_kyber(
-            input_path=temp_downloaded_path,
-            output_path=temp_decrypted_path,
-            private_key=private_key,
-            use_quantum_enhanced=use_quantum_enhanced,
-            kyber_variant=kyber_variant
+        logger.info(
+            "[🔍] Processing download-decrypt request",
+            extra={"cid": cid, "file_name": original_filename, "kyber_variant": kyber_variant}
         )
         
-        if not decryption_success:
-            print("[❌] Real Kyber decryption failed")
-            return jsonify({
-                "error": "Decryption failed with provided private key",
-                "code": "KYBER_DECRYPTION_FAILED",
-                "troubleshooting": {
+        # 🔓 Fetch, authenticate and decrypt frame by frame into the response
+        try:
+            pipeline = DownloadPipeline(cid, private_key=private_key, kyber_variant=kyber_variant).open()
+        except DownloadError as e:
+            logger.error("[❌] Download-decrypt failed for CID %s: %s", cid, e)
+            body = {"error": str(e), "code": e.code, "cid": cid}
+            if e.code == "KYBER_LIBS_MISSING":
+                body["install_hint"] = "Run: pip install pqcrypto cryptography"
+            if e.code == "KYBER_DECRYPTION_FAILED":
+                body["troubleshooting"] = {
                     "check_private_key": "Ensure private key matches the encryption key",
                     "check_file_format": "Verify encrypted file format is correct",
                     "check_kyber_variant": "Try different Kyber variants (kyber512, kyber768, kyber1024)"
                 }
-            }), 500
-        
-        # Verify output file
-        if not os.path.exists(temp_decrypted_path):
-            return jsonify({
-                "error": "Decryption process completed but output file missing",
-                "code": "DECRYPTION_OUTPUT_MISSING"
-            }), 500
-        
-        decrypted_size = os.path.getsize(temp_decrypted_path)
-        print(f"[✅] Successfully decrypted file to: {temp_decrypted_path}")
-        print(f"[📊] Decrypted file size: {decrypted_size} bytes")
+            return jsonify(body), e.status
         
         # Determine MIME type
-        mime_type = get_mime_type(original_filename)
-        
-        # Create response
-        response = send_file(
-            temp_decrypted_path,
-            as_attachment=True,
-            download_name=original_filename,
-            mimetype=mime_type
-        )
+        response = stream_download_response(pipeline, original_filename, get_mime_type(original_filename))
         
         # Add CORS and info headers
         response.headers.add('Access-Control-Allow-Origin', '*')
@@ -666,19 +1128,22 @@ def download_decrypt():
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         response.headers.add('Access-Control-Expose-Headers', 'Content-Disposition,X-Decryption-Success')
         
-        # Add decryption metadata
+        # Add decryption metadata (sizes are only known up front when the gateway sends a length)
         response.headers.add('X-Decryption-Success', 'true')
         response.headers.add('X-CID', cid)
-        response.headers.add('X-Original-Size', str(file_size))
-        response.headers.add('X-Decrypted-Size', str(decrypted_size))
+        if pipeline.encrypted_length is not None:
+            response.headers.add('X-Original-Size', str(pipeline.encrypted_length))
+        if pipeline.content_length is not None:
+            response.headers.add('X-Decrypted-Size', str(pipeline.content_length))
         response.headers.add('X-Kyber-Variant', kyber_variant)
         
         return response
         
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         error_msg = f"Download and decryption process failed: {str(e)}"
-        print(f"[❌] {error_msg}")
-        traceback.print_exc()
+        logger.exception("[❌] %s", error_msg)
         
         return jsonify({
             "error": error_msg,
@@ -687,21 +1152,16 @@ def download_decrypt():
         }), 500
 
 # Helper functions
-def verify_cid_whitelist(cid: str, whitelisted_addresses: list) -> bool:
+def verify_cid_whitelist(cid: str) -> bool:
     """
-    Verify if a CID comes from a whitelisted address
-    In a real implementation, this would check the blockchain/IPFS metadata
+    Verify if a CID comes from a whitelisted address.
+    The uploader is looked up in the firewall's in-memory origin index (on-chain
+    FileStored records first, then upload records), so no chain call is made.
     """
-    # This is a placeholder - implement actual whitelist verification
-    # You might check:
-    # 1. The IPFS pin metadata to see who pinned it
-    # 2. A blockchain record of who uploaded the CID
-    # 3. A database mapping CIDs to wallet addresses
-    
-    print(f"[🔍] Checking CID {cid} against whitelist: {whitelisted_addresses}")
-    
-    # For now, return True (implement your actual logic here)
-    return True
+    allowed = get_firewall().allows(cid)
+    if not allowed:
+        logger.warning("[🔒] Transaction firewall blocked CID %s (uploader: %s)", cid, get_firewall().origin(cid))
+    return allowed
 
 def is_valid_cid(cid: str) -> bool:
     """
@@ -810,27 +1270,20 @@ def handle_options():
 
 @app.route('/api/private-key/<key_id>', methods=['GET'])
 def get_private_key(key_id):
-    """Retrieve private key by ID."""
+    """Retrieve private key by ID. Each key can be retrieved only once."""
     try:
-        # Security check to prevent path traversal
-        if ".." in key_id or "/" in key_id or "\\" in key_id:
-            return jsonify({"error": "Invalid key ID"}), 400
-            
-        private_key_path = os.path.join("temp", key_id)
+        private_key = KEY_STORE.take(key_id)
         
-        if not os.path.exists(private_key_path):
+        if private_key is None:
             return jsonify({"error": "Private key not found or expired"}), 404
             
-        with open(private_key_path, 'r') as f:
-            private_key = f.read()
-            
         return jsonify({
             "private_key": private_key,
-            "message": "IMPORTANT: Save this private key immediately. It will be deleted from our servers shortly and cannot be recovered."
+            "message": "IMPORTANT: Save this private key immediately. It has now been deleted from our servers and cannot be recovered."
         }), 200
         
     except Exception as e:
-        print(f"[❌] Error retrieving private key: {e}")
+        logger.error("[❌] Error retrieving private key: %s", e)
         return jsonify({"error": f"Failed to retrieve private key: {str(e)}"}), 500
 # New endpoints for blockchain settings management
 
@@ -844,7 +1297,7 @@ def get_settings():
         settings = get_blockchain_settings()
         return jsonify(settings), 200
     except Exception as e:
-        print(f"[❌] Error getting blockchain settings: {e}")
+        logger.error("[❌] Error getting blockchain settings: %s", e)
         return jsonify({"error": f"Failed to get settings: {str(e)}"}), 500
 
 @app.route("/api/blockchain/settings", methods=["PUT"])
@@ -853,6 +1306,11 @@ def update_settings():
     try:
         if not request.json:
             return jsonify({"error": "No settings data provided"}), 400
+        if not isinstance(request.json, dict):
+            return jsonify({"error": "Settings must be a JSON object"}), 400
+        for section in ("backup", "security", "quantum_protection"):
+            if section in request.json and not isinstance(request.json[section], dict):
+                return jsonify({"error": f"{section} must be an object"}), 400
             
         # Get current settings
         current_settings = get_blockchain_settings()
@@ -862,9 +1320,12 @@ def update_settings():
         if "backup" in request.json:
             current_settings["backup"].update(request.json["backup"])
             
-        # For security settings
+        # For security settings; the time lock and whitelist change under the same rules as their own routes
+        queued = []
         if "security" in request.json:
-            current_settings["security"].update(request.json["security"])
+            security = dict(request.json["security"])
+            queued = apply_timelocked_settings(current_settings, security)
+            current_settings["security"].update(security)
             
         # For quantum protection settings
         if "quantum_protection" in request.json:
@@ -872,27 +1333,133 @@ def update_settings():
             
         # Save updated settings
         if save_blockchain_settings(current_settings):
-            return jsonify({"status": "success", "settings": current_settings}), 200
+            return settings_response(current_settings, queued)
         else:
             return jsonify({"error": "Failed to save settings"}), 500
             
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"[❌] Error updating blockchain settings: {e}")
-        traceback.print_exc()
+        logger.exception("[❌] Error updating blockchain settings: %s", e)
         return jsonify({"error": f"Failed to update settings: {str(e)}"}), 500
 
 @app.route("/api/blockchain/settings/reset", methods=["POST"])
 def reset_settings():
-    """Reset blockchain settings to default"""
+    """Reset blockchain settings to default; under a time lock the lock and whitelist resets are queued"""
     try:
-        if save_blockchain_settings(DEFAULT_BLOCKCHAIN_SETTINGS):
-            return jsonify({"status": "success", "settings": DEFAULT_BLOCKCHAIN_SETTINGS}), 200
+        settings = json.loads(json.dumps(DEFAULT_BLOCKCHAIN_SETTINGS))
+        current_security = get_blockchain_settings()["security"]
+        defaults = {field: settings["security"][field] for field in TIMELOCKED_SETTINGS}
+        for field in TIMELOCKED_SETTINGS:
+            settings["security"][field] = current_security[field]
+        queued = apply_timelocked_settings(settings, defaults)
+        if save_blockchain_settings(settings):
+            return settings_response(settings, queued)
         else:
             return jsonify({"error": "Failed to reset settings"}), 500
     except Exception as e:
-        print(f"[❌] Error resetting blockchain settings: {e}")
+        logger.error("[❌] Error resetting blockchain settings: %s", e)
         return jsonify({"error": f"Failed to reset settings: {str(e)}"}), 500
 
+# ⏳ Time-locked operations: queued by the routes below while a transaction time lock is set,
+# applied by these handlers once the lock expires
+
+# Security settings that bulk settings updates may not change past the time lock
+TIMELOCKED_SETTINGS = ("transaction_timelock", "whitelisted_addresses")
+
+def schedule_timelocked(kind, payload, delay):
+    """Queue an operation behind the time lock; only a signed request records who asked, and so who may cancel"""
+    return get_timelock_engine().schedule(kind, payload, delay, requested_by=requesting_wallet())
+
+def timelocked_response(kind, payload, delay):
+    """202 response for an operation queued behind the transaction time lock"""
+    operation = schedule_timelocked(kind, payload, delay)
+    return jsonify({
+        "status": "pending",
+        "message": f"Queued behind the transaction time lock until {time.ctime(operation['release_at'])}",
+        "operation": operation
+    }), 202
+
+def apply_timelocked_settings(settings, security):
+    """
+    Apply or queue the time lock and whitelist fields of a settings update
+
+    The fields are taken out of `security`. As with POST /api/blockchain/timelock
+    and the whitelist routes, lengthening the lock and any change made while no
+    lock is set apply to `settings` directly; shortening the lock and every
+    whitelist change under a lock are queued for the current lock duration.
+
+    Returns:
+        list: Operations queued behind the time lock
+
+    Raises:
+        ValueError: If transaction_timelock is not a known duration or whitelisted_addresses is not a list
+    """
+    delay = timelock_delay(settings)
+    queued = []
+    if "transaction_timelock" in security:
+        duration = security.pop("transaction_timelock")
+        if duration not in TIMELOCK_DURATIONS:
+            raise ValueError(f"transaction_timelock must be one of: {', '.join(TIMELOCK_DURATIONS)}")
+        if TIMELOCK_DURATIONS[duration] < delay:
+            queued.append(schedule_timelocked("timelock_change", {"duration": duration}, delay))
+        else:
+            settings["security"]["transaction_timelock"] = duration
+    if "whitelisted_addresses" in security:
+        addresses = security.pop("whitelisted_addresses")
+        if not isinstance(addresses, list) or not all(isinstance(address, str) for address in addresses):
+            raise ValueError("whitelisted_addresses must be a list of addresses")
+        if not delay:
+            settings["security"]["whitelisted_addresses"] = addresses
+        else:
+            current = {address.lower() for address in settings["security"]["whitelisted_addresses"]}
+            wanted = {address.lower() for address in addresses}
+            for address in addresses:
+                if address.lower() not in current:
+                    current.add(address.lower())
+                    queued.append(schedule_timelocked("whitelist_add", {"address": address}, delay))
+            for address in settings["security"]["whitelisted_addresses"]:
+                if address.lower() not in wanted:
+                    wanted.add(address.lower())
+                    queued.append(schedule_timelocked("whitelist_remove", {"address": address}, delay))
+    return queued
+
+def settings_response(settings, queued):
+    """Saved settings, with 202 and the queued operations if part of the change waits for the time lock"""
+    if not queued:
+        return jsonify({"status": "success", "settings": settings}), 200
+    return jsonify({
+        "status": "pending",
+        "message": f"Time lock and whitelist changes are queued until {time.ctime(queued[0]['release_at'])}",
+        "settings": settings,
+        "operations": queued
+    }), 202
+
+def release_whitelist_add(payload):
+    settings = get_blockchain_settings()
+    if not get_firewall().is_whitelisted(payload["address"]):
+        settings["security"]["whitelisted_addresses"].append(payload["address"])
+        if not save_blockchain_settings(settings):
+            raise RuntimeError("Failed to save whitelist")
+    return {"whitelist": settings["security"]["whitelisted_addresses"]}
+
+def release_whitelist_remove(payload):
+    settings = get_blockchain_settings()
+    address = payload["address"].lower()
+    settings["security"]["whitelisted_addresses"] = [
+        entry for entry in settings["security"]["whitelisted_addresses"] if entry.lower() != address
+    ]
+    if not save_blockchain_settings(settings):
+        raise RuntimeError("Failed to save whitelist")
+    return {"whitelist": settings["security"]["whitelisted_addresses"]}
+
+def release_timelock_change(payload):
+    settings = get_blockchain_settings()
+    settings["security"]["transaction_timelock"] = payload["duration"]
+    if not save_blockchain_settings(settings):
+        raise RuntimeError("Failed to save time lock setting")
+    return {"transaction_timelock": payload["duration"]}
+
 @app.route("/api/blockchain/whitelist", methods=["GET"])
 def get_whitelist():
     """Get the whitelist of approved addresses"""
@@ -900,7 +1467,7 @@ def get_whitelist():
         settings = get_blockchain_settings()
         return jsonify(settings["security"]["whitelisted_addresses"]), 200
     except Exception as e:
-        print(f"[❌] Error getting whitelist: {e}")
+        logger.error("[❌] Error getting whitelist: %s", e)
         return jsonify({"error": f"Failed to get whitelist: {str(e)}"}), 500
 
 @app.route("/api/blockchain/whitelist", methods=["POST"])
@@ -915,8 +1482,13 @@ def add_to_whitelist():
         # Get current settings
         settings = get_blockchain_settings()
         
-        # Add address if not already in whitelist
-        if address not in settings["security"]["whitelisted_addresses"]:
+        # ⏳ Under a transaction time lock the change is queued instead of applied
+        delay = timelock_delay(settings)
+        if delay and not get_firewall().is_whitelisted(address):
+            return timelocked_response("whitelist_add", {"address": address}, delay)
+        
+        # Add address if not already in whitelist (addresses compare case-insensitively)
+        if not get_firewall().is_whitelisted(address):
             settings["security"]["whitelisted_addresses"].append(address)
             
             # Save updated settings
@@ -935,7 +1507,7 @@ def add_to_whitelist():
             }), 200
             
     except Exception as e:
-        print(f"[❌] Error adding to whitelist: {e}")
+        logger.error("[❌] Error adding to whitelist: %s", e)
         return jsonify({"error": f"Failed to add to whitelist: {str(e)}"}), 500
 
 @app.route("/api/blockchain/whitelist/<address>", methods=["DELETE"])
@@ -945,9 +1517,16 @@ def remove_from_whitelist(address):
         # Get current settings
         settings = get_blockchain_settings()
         
-        # Remove address if in whitelist
-        if address in settings["security"]["whitelisted_addresses"]:
-            settings["security"]["whitelisted_addresses"].remove(address)
+        # ⏳ Under a transaction time lock the change is queued instead of applied
+        delay = timelock_delay(settings)
+        if delay and get_firewall().is_whitelisted(address):
+            return timelocked_response("whitelist_remove", {"address": address}, delay)
+        
+        # Remove address if in whitelist (addresses compare case-insensitively)
+        if get_firewall().is_whitelisted(address):
+            settings["security"]["whitelisted_addresses"] = [
+                entry for entry in settings["security"]["whitelisted_addresses"] if entry.lower() != address.lower()
+            ]
             
             # Save updated settings
             if save_blockchain_settings(settings):
@@ -965,7 +1544,7 @@ def remove_from_whitelist(address):
             }), 200
             
     except Exception as e:
-        print(f"[❌] Error removing from whitelist: {e}")
+        logger.error("[❌] Error removing from whitelist: %s", e)
         return jsonify({"error": f"Failed to remove from whitelist: {str(e)}"}), 500
 
 @app.route("/api/blockchain/verify-backup-address", methods=["POST"])
@@ -1009,7 +1588,7 @@ def verify_backup_address():
             }), 400
             
     except Exception as e:
-        print(f"[❌] Error verifying backup address: {e}")
+        logger.error("[❌] Error verifying backup address: %s", e)
         return jsonify({"error": f"Failed to verify backup address: {str(e)}"}), 500
 
 @app.route("/api/blockchain/security-level", methods=["POST"])
@@ -1077,7 +1656,7 @@ def set_security_level():
             return jsonify({"error": "Failed to save security level"}), 500
             
     except Exception as e:
-        print(f"[❌] Error setting security level: {e}")
+        logger.error("[❌] Error setting security level: %s", e)
         return jsonify({"error": f"Failed to set security level: {str(e)}"}), 500
 
 # Mock function for Kyber decryption
@@ -1087,9 +1666,69 @@ def mock_kyber_decrypt(encrypted_content, private_key):
     In a real implementation, this would be replaced with actual Kyber decryption
     """
     # This is just a placeholder - you would replace this with actual decryption code
-    print("[🔄] Mock decryption (replace with actual Kyber decryption)")
+    logger.info("[🔄] Mock decryption (replace with actual Kyber decryption)")
     return encrypted_content  # In a real implementation, this would return decrypted data
 
+# 🧵 Background services: contract and transaction indexers, time lock releases, key rotation.
+# Started once per serving process by the first request, so they run under any WSGI server;
+# the debug reloader's watcher process never serves requests and so never starts them.
+# Set VAULTIS_BACKGROUND_SERVICES=false in all but one process when running several workers.
+BACKGROUND_SERVICES = os.getenv("VAULTIS_BACKGROUND_SERVICES", "true").lower() == "true"
+_background_started = False
+_background_lock = threading.Lock()
+
+def start_background_services():
+    """Start the background services of this process; later calls do nothing"""
+    global _background_started
+    if _background_started or not BACKGROUND_SERVICES:
+        return
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+        try:
+            # ⛓️ Follow contract events and address history
+            if get_indexer() is not None:
+                get_indexer().start()
+            if get_history_indexer() is not None:
+                get_history_indexer().start()
+            # ⏳ Release time-locked operations, including any that came due while the server was down
+            get_timelock_engine().start()
+            # 🔄 Continue a key rotation that was interrupted by the last shutdown
+            get_key_rotator().resume_interrupted()
+            logger.info("[🧵] Background services started")
+        except Exception as e:
+            logger.exception("[❌] Failed to start background services: %s", e)
+
+@app.before_request
+def ensure_background_services():
+    start_background_services()
+
+# 📊 Per-route latency for the /metrics endpoint and per-stage Server-Timing
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    tracing.start_trace(route, request.method)
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop("request_started", None)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    if started is not None:
+        metrics.REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            route=route,
+            method=request.method,
+            status=response.status_code
+        )
+    trace = tracing.finish_trace(response.status_code)
+    if trace is not None and trace.spans:
+        response.headers["Server-Timing"] = trace.server_timing()
+        for stage, seconds in trace.spans:
+            metrics.STAGE_LATENCY.observe(seconds, route=route, stage=stage)
+    return response
+
 # Clean up temp files after response has been sent
 @app.after_request
 def cleanup(response):
@@ -1104,11 +1743,11 @@ def cleanup(response):
                 if os.path.isfile(filepath) and current_time - os.path.getmtime(filepath) > 300:
                     try:
                         os.remove(filepath)
-                        print(f"[🧹] Deleted old temp file: {filepath}")
+                        logger.debug("[🧹] Deleted old temp file: %s", filepath)
                     except Exception as file_error:
-                        print(f"[⚠️] Error deleting {filepath}: {file_error}")
+                        logger.warning("[⚠️] Error deleting %s: %s", filepath, file_error)
     except Exception as e:
-        print(f"[⚠️] Cleanup error (non-critical): {e}")
+        logger.warning("[⚠️] Cleanup error (non-critical): %s", e)
     
     return response
     # Find all temp files older than 15 minutes and delete them
@@ -1122,11 +1761,11 @@ def cleanup(response):
                 if os.path.isfile(filepath) and current_time - os.path.getmtime(filepath) > 900:  # 15 minutes = 900 seconds
                     try:
                         os.remove(filepath)
-                        print(f"[🧹] Deleted old temp file: {filepath}")
+                        logger.debug("[🧹] Deleted old temp file: %s", filepath)
                     except:
                         pass
     except Exception as e:
-        print(f"[⚠️] Cleanup error (non-critical): {e}")
+        logger.warning("[⚠️] Cleanup error (non-critical): %s", e)
     
     return response
     # Find all temp files older than 1 minute and delete them
@@ -1140,11 +1779,11 @@ def cleanup(response):
                 if os.path.isfile(filepath) and current_time - os.path.getmtime(filepath) > 60:
                     try:
                         os.remove(filepath)
-                        print(f"[🧹] Deleted old temp file: {filepath}")
+                        logger.debug("[🧹] Deleted old temp file: %s", filepath)
                     except:
                         pass
     except Exception as e:
-        print(f"[⚠️] Cleanup error (non-critical): {e}")
+        logger.warning("[⚠️] Cleanup error (non-critical): %s", e)
     
     return response
 
@@ -1156,25 +1795,6 @@ def blockchain_settings_ui():
 
 # 🔧 Run app
 # 🔧 Run app
-if __name__ == "__main__":
-    # Check if necessary modules are imported
-    if 'requests' not in sys.modules:
-        print("[❌] The 'requests' module is required but not imported.")
-        sys.exit(1)
-    if 'time' not in sys.modules:
-        print("[❌] The 'time' module is required but not imported.")
-        sys.exit(1)
-        
-    # Create directories if they don't exist
-    os.makedirs("temp", exist_ok=True)
-    os.makedirs(os.path.join(BASE_DIR, "settings"), exist_ok=True)
-    
-    print("[🚀] Starting Quantum-Secure Blockchain File Server")
-    print("[🔒] Current security profile:", get_blockchain_settings()["security"]["profile_level"])
-    
-    # Run the Flask app
-    app.run(host="0.0.0.0", port=5000, debug=True)
-
 # Additional routes for quantum security features
 
 @app.route("/api/blockchain/quantum-analysis", methods=["POST"])
@@ -1231,12 +1851,52 @@ def analyze_quantum_security():
         return jsonify(analysis_results), 200
             
     except Exception as e:
-        print(f"[❌] Error during quantum security analysis: {e}")
+        logger.error("[❌] Error during quantum security analysis: %s", e)
         return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
+def rotate_keys(payload=None):
+    """
+    Start a key rotation job (or continue the unfinished one); also the release
+    handler for time-locked rotations. Only the detached file headers are
+    re-wrapped, see backend/key_rotation.py: previously issued keys still open
+    the headers pinned on IPFS and are NOT revoked.
+    """
+    settings = get_blockchain_settings()
+    rotator = get_key_rotator()
+    job, started = rotator.start_job((payload or {}).get("requested_by"))
+    
+    rotation_results = {
+        "status": "success",
+        "started": started,
+        "job": rotator.progress(job),
+        "rotation_timestamp": time.time(),
+        "next_rotation": None,
+        "quantum_enhanced": settings["quantum_protection"]["quantum_resistance_mode"] != "Off",
+        # Pinned containers are immutable and keep a header wrapped for each file's old key
+        "previous_keys_revoked": False,
+        "notice": (
+            "Rotation issues new keys but does not revoke previously issued ones: the container pinned on IPFS "
+            "still opens with the old key. Password-protected keys are skipped (see skipped_protected)."
+        )
+    }
+    
+    # Calculate next rotation time based on frequency setting
+    if settings["security"]["key_rotation_frequency"] == "Daily":
+        rotation_results["next_rotation"] = time.time() + (24 * 60 * 60)  # 24 hours
+    elif settings["security"]["key_rotation_frequency"] == "Weekly":
+        rotation_results["next_rotation"] = time.time() + (7 * 24 * 60 * 60)  # 7 days
+    elif settings["security"]["key_rotation_frequency"] == "Monthly":
+        rotation_results["next_rotation"] = time.time() + (30 * 24 * 60 * 60)  # 30 days
+    elif settings["security"]["key_rotation_frequency"] == "Quarterly":
+        rotation_results["next_rotation"] = time.time() + (90 * 24 * 60 * 60)  # 90 days
+    return rotation_results
+
 @app.route("/api/blockchain/key-rotation", methods=["POST"])
 def rotate_encryption_keys():
-    """Rotate encryption keys based on the configured frequency"""
+    """
+    Rotate encryption keys based on the configured frequency.
+    New keys replace the old ones for future downloads; previously issued keys are not revoked.
+    """
     try:
         # Get current settings
         settings = get_blockchain_settings()
@@ -1247,33 +1907,67 @@ def rotate_encryption_keys():
                 "status": "error",
                 "message": "Key rotation is disabled. Change frequency setting to enable."
             }), 400
-            
-        # Simulate key rotation process
-        rotation_results = {
-            "status": "success",
-            "old_key_hash": hashlib.sha256(str(time.time() - 1000).encode()).hexdigest()[:10],
-            "new_key_hash": hashlib.sha256(str(time.time()).encode()).hexdigest()[:10],
-            "rotation_timestamp": time.time(),
-            "next_rotation": None,
-            "quantum_enhanced": settings["quantum_protection"]["quantum_resistance_mode"] != "Off"
-        }
         
-        # Calculate next rotation time based on frequency setting
-        if settings["security"]["key_rotation_frequency"] == "Daily":
-            rotation_results["next_rotation"] = time.time() + (24 * 60 * 60)  # 24 hours
-        elif settings["security"]["key_rotation_frequency"] == "Weekly":
-            rotation_results["next_rotation"] = time.time() + (7 * 24 * 60 * 60)  # 7 days
-        elif settings["security"]["key_rotation_frequency"] == "Monthly":
-            rotation_results["next_rotation"] = time.time() + (30 * 24 * 60 * 60)  # 30 days
-        elif settings["security"]["key_rotation_frequency"] == "Quarterly":
-            rotation_results["next_rotation"] = time.time() + (90 * 24 * 60 * 60)  # 90 days
+        # ⏳ Under a transaction time lock the rotation is queued instead of run
+        delay = timelock_delay(settings)
+        # Only a signed request names who asked for the rotation
+        payload = {"requested_by": requesting_wallet()}
+        if delay:
+            return timelocked_response("key_rotation", payload, delay)
             
-        return jsonify(rotation_results), 200
+        return jsonify(rotate_keys(payload)), 202
             
     except Exception as e:
-        print(f"[❌] Error during key rotation: {e}")
+        logger.error("[❌] Error during key rotation: %s", e)
         return jsonify({"error": f"Key rotation failed: {str(e)}"}), 500
 
+@app.route("/api/blockchain/key-rotation/jobs", methods=["GET"])
+def list_key_rotation_jobs():
+    """Most recent key rotation jobs with their progress"""
+    try:
+        rotator = get_key_rotator()
+        limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+        return jsonify({"jobs": [rotator.progress(job) for job in rotator.jobs.latest(limit)]}), 200
+    except Exception as e:
+        logger.error("[❌] Error listing key rotation jobs: %s", e)
+        return jsonify({"error": f"Failed to list key rotation jobs: {str(e)}"}), 500
+
+@app.route("/api/blockchain/key-rotation/jobs/<job_id>", methods=["GET"])
+def get_key_rotation_job(job_id):
+    """Progress of one key rotation job, with the first files that failed"""
+    try:
+        rotator = get_key_rotator()
+        job = rotator.jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Key rotation job not found"}), 404
+        report = rotator.progress(job)
+        report["failures"] = rotator.jobs.failures(job_id)
+        return jsonify(report), 200
+    except Exception as e:
+        logger.error("[❌] Error reading key rotation job: %s", e)
+        return jsonify({"error": f"Failed to read key rotation job: {str(e)}"}), 500
+
+@app.route("/api/blockchain/key-rotation/jobs/<job_id>/<action>", methods=["POST"])
+def control_key_rotation_job(job_id, action):
+    """Pause a running key rotation job after its current batch, or resume it from its last checkpoint"""
+    try:
+        rotator = get_key_rotator()
+        if action not in ("pause", "resume"):
+            return jsonify({"error": "Action must be pause or resume"}), 400
+        job = rotator.jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Key rotation job not found"}), 404
+        changed = rotator.pause(job_id) if action == "pause" else rotator.resume(job_id)
+        if not changed:
+            return jsonify({
+                "error": f"Cannot {action} a {job['status']} job",
+                "job": rotator.progress(job)
+            }), 409
+        return jsonify({"status": "success", "job": rotator.progress(rotator.jobs.get(job_id))}), 200
+    except Exception as e:
+        logger.error("[❌] Error controlling key rotation job: %s", e)
+        return jsonify({"error": f"Failed to {action} key rotation job: {str(e)}"}), 500
+
 @app.route("/api/blockchain/quantum-entropy", methods=["GET"])
 def get_quantum_entropy():
     """Get quantum-based entropy for enhanced security operations"""
@@ -1306,7 +2000,7 @@ def get_quantum_entropy():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error generating quantum entropy: {e}")
+        logger.error("[❌] Error generating quantum entropy: %s", e)
         return jsonify({"error": f"Entropy generation failed: {str(e)}"}), 500
 
 @app.route("/api/blockchain/zero-knowledge-proof", methods=["POST"])
@@ -1346,7 +2040,7 @@ def generate_zero_knowledge_proof():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error generating zero-knowledge proof: {e}")
+        logger.error("[❌] Error generating zero-knowledge proof: %s", e)
         return jsonify({"error": f"Proof generation failed: {str(e)}"}), 500
 
 @app.route("/api/blockchain/verify-zkp", methods=["POST"])
@@ -1380,7 +2074,7 @@ def verify_zero_knowledge_proof():
         }), 200 if is_valid else 400
             
     except Exception as e:
-        print(f"[❌] Error verifying zero-knowledge proof: {e}")
+        logger.error("[❌] Error verifying zero-knowledge proof: %s", e)
         return jsonify({"error": f"Proof verification failed: {str(e)}"}), 500
 
 @app.route("/api/blockchain/quantum-hash", methods=["POST"])
@@ -1428,7 +2122,7 @@ def generate_quantum_resistant_hash():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error generating quantum-resistant hash: {e}")
+        logger.error("[❌] Error generating quantum-resistant hash: %s", e)
         return jsonify({"error": f"Hash generation failed: {str(e)}"}), 500
 
 @app.route("/api/blockchain/mfa-setup", methods=["POST"])
@@ -1486,7 +2180,7 @@ def setup_multi_factor_auth():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error setting up MFA: {e}")
+        logger.error("[❌] Error setting up MFA: %s", e)
         return jsonify({"error": f"MFA setup failed: {str(e)}"}), 500
 
 @app.route("/api/blockchain/verify-mfa", methods=["POST"])
@@ -1521,12 +2215,22 @@ def verify_multi_factor_auth():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error verifying MFA: {e}")
+        logger.error("[❌] Error verifying MFA: %s", e)
         return jsonify({"error": f"MFA verification failed: {str(e)}"}), 500
 
+# ⏳ Handlers for operations released by the timelock engine
+get_timelock_engine().register("whitelist_add", release_whitelist_add)
+get_timelock_engine().register("whitelist_remove", release_whitelist_remove)
+get_timelock_engine().register("key_rotation", rotate_keys)
+get_timelock_engine().register("timelock_change", release_timelock_change)
+
 @app.route("/api/blockchain/timelock", methods=["POST"])
 def set_transaction_timelock():
-    """Set a time lock on transactions for security"""
+    """
+    Set a time lock on transactions for security.
+    Lengthening the lock applies at once; shortening or removing it is itself
+    held for the current lock duration, so the lock cannot be bypassed.
+    """
     try:
         if not request.json or "duration" not in request.json:
             return jsonify({"error": "Time lock duration not specified"}), 400
@@ -1537,29 +2241,23 @@ def set_transaction_timelock():
         settings = get_blockchain_settings()
         
         # Validate and set time lock duration
-        valid_durations = ["None", "1 Hour", "24 Hours", "48 Hours", "7 Days"]
+        valid_durations = list(TIMELOCK_DURATIONS)
         if duration not in valid_durations:
             return jsonify({
                 "status": "error",
                 "message": f"Invalid duration. Must be one of: {', '.join(valid_durations)}"
             }), 400
             
+        current_delay = timelock_delay(settings)
+        if TIMELOCK_DURATIONS[duration] < current_delay:
+            return timelocked_response("timelock_change", {"duration": duration}, current_delay)
+        
         # Update settings
         settings["security"]["transaction_timelock"] = duration
         save_blockchain_settings(settings)
         
-        # Calculate expiry time for informational purposes
-        expiry_time = None
-        if duration != "None":
-            current_time = time.time()
-            if duration == "1 Hour":
-                expiry_time = current_time + (60 * 60)
-            elif duration == "24 Hours":
-                expiry_time = current_time + (24 * 60 * 60)
-            elif duration == "48 Hours":
-                expiry_time = current_time + (48 * 60 * 60)
-            elif duration == "7 Days":
-                expiry_time = current_time + (7 * 24 * 60 * 60)
+        # When an operation queued now would be released
+        expiry_time = time.time() + TIMELOCK_DURATIONS[duration] if TIMELOCK_DURATIONS[duration] else None
             
         return jsonify({
             "status": "success",
@@ -1568,9 +2266,67 @@ def set_transaction_timelock():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error setting transaction timelock: {e}")
+        logger.error("[❌] Error setting transaction timelock: %s", e)
         return jsonify({"error": f"Time lock setting failed: {str(e)}"}), 500
 
+@app.route("/api/blockchain/timelock/operations", methods=["GET"])
+def list_timelocked_operations():
+    """
+    Time-locked operations in release order.
+    ?status= pending (default), released, failed, cancelled or all; ?kind= filters by operation.
+    """
+    status = request.args.get("status", "pending")
+    if status != "all" and status not in TIMELOCK_STATUSES:
+        return jsonify({"error": f"status must be one of: all, {', '.join(TIMELOCK_STATUSES)}"}), 400
+    try:
+        operations, next_cursor = get_timelock_engine().store.list_operations(
+            status=None if status == "all" else status,
+            kind=request.args.get("kind"),
+            limit=request.args.get("limit", 50, type=int),
+            cursor=request.args.get("cursor")
+        )
+        return jsonify({
+            "operations": operations,
+            "next_cursor": next_cursor,
+            "pending": get_timelock_engine().pending_count()
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("[❌] Error listing time-locked operations: %s", e)
+        return jsonify({"error": f"Failed to list operations: {str(e)}"}), 500
+
+@app.route("/api/blockchain/timelock/operations/<op_id>", methods=["GET"])
+def get_timelocked_operation(op_id):
+    """One time-locked operation with its status and, once released, its result"""
+    operation = get_timelock_engine().store.get(op_id)
+    if operation is None:
+        return jsonify({"error": "Operation not found"}), 404
+    return jsonify(operation), 200
+
+@app.route("/api/blockchain/timelock/operations/<op_id>", methods=["DELETE"])
+def cancel_timelocked_operation(op_id):
+    """Cancel a pending time-locked operation; the request must be signed by the wallet that queued it or a whitelisted one"""
+    try:
+        wallet = signed_wallet()
+        operation = get_timelock_engine().store.get(op_id)
+        if operation is None:
+            return jsonify({"error": "Operation not found"}), 404
+        if wallet != (operation["requested_by"] or "").lower() and not get_firewall().is_whitelisted(wallet):
+            return jsonify({
+                "error": "Only the wallet that queued the operation or a whitelisted wallet can cancel it",
+                "code": "NOT_AUTHORIZED"
+            }), 403
+        if not get_timelock_engine().cancel(op_id):
+            operation = get_timelock_engine().store.get(op_id)
+            return jsonify({"error": f"Operation is already {operation['status']}"}), 409
+        return jsonify({"status": "success", "operation": get_timelock_engine().store.get(op_id)}), 200
+    except WalletAuthError as e:
+        return jsonify({"error": str(e), "code": e.code}), e.status
+    except Exception as e:
+        logger.error("[❌] Error cancelling time-locked operation %s: %s", op_id, e)
+        return jsonify({"error": f"Failed to cancel operation: {str(e)}"}), 500
+
 @app.route("/api/blockchain/key-status", methods=["GET"])
 def get_key_status():
     """Get status of encryption keys and their quantum resistance level"""
@@ -1660,9 +2416,14 @@ def get_key_status():
         }), 200
             
     except Exception as e:
-        print(f"[❌] Error getting key status: {e}")
+        logger.error("[❌] Error getting key status: %s", e)
         return jsonify({"error": f"Failed to get key status: {str(e)}"}), 500
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus text-format metrics"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE_LATEST)
+
 # Add health check endpoint
 @app.route("/health", methods=["GET"])
 def health_check():
@@ -1692,10 +2453,54 @@ def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
-# Replace your existing send_email_notification function with this implementation
+def build_email_message(settings, to_email, subject, message, html_message="", attachment=None, filename=None):
+    """
+    Build a MIME message with a plain text body, optional HTML version and optional base64 attachment
+    """
+    msg = MIMEMultipart('alternative')
+    msg['From'] = f"{settings['sender_name']} <{settings['sender_email']}>"
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    
+    # Add plain text version
+    msg.attach(MIMEText(message, 'plain'))
+    
+    # Add HTML version if provided
+    if html_message:
+        msg.attach(MIMEText(html_message, 'html'))
+    
+    # Add file attachment if provided (base64 encoded)
+    if attachment and filename:
+        attachment_part = MIMEApplication(base64.b64decode(attachment), Name=filename)
+        attachment_part['Content-Disposition'] = f'attachment; filename="{filename}"'
+        msg.attach(attachment_part)
+    
+    return msg
+
+def queue_email(settings, msg, to_email):
+    """
+    Hand a message to the background mail queue and build the API response
+    """
+    try:
+        message_id = get_mail_queue(get_email_settings).submit(msg, to_email)
+    except queue.Full:
+        logger.warning("[⚠️] Mail queue full, rejecting email to %s", to_email)
+        return jsonify({
+            "success": False,
+            "error": "Email queue is full, please retry shortly"
+        }), 503, {"Retry-After": "30"}
+    
+    logger.info("[📧] Queued email to %s", to_email, extra={"message_id": message_id})
+    return jsonify({
+        "success": True,
+        "message": "Email notification queued for delivery",
+        "message_id": message_id,
+        "status": "queued"
+    }), 202
+
 @app.route("/api/send-email", methods=["POST"])
 def send_email_notification():
-    """Send notification emails for file recovery"""
+    """Queue notification emails for file recovery; delivery happens in the background"""
     try:
         if not request.json or "to" not in request.json or "subject" not in request.json or "message" not in request.json:
             return jsonify({"error": "Email recipient, subject, and message are required"}), 400
@@ -1709,74 +2514,45 @@ def send_email_notification():
         if not validate_email(to_email):
             return jsonify({"error": "Invalid email address"}), 400
         
-        print(f"[📧] Sending email notification to: {to_email}")
-        print(f"[📧] Subject: {subject}")
+        logger.info("[📧] Sending email notification to: %s", to_email)
+        logger.debug("[📧] Subject: %s", subject)
         
         # Get email settings
         settings = get_email_settings()
         
         # Check if email settings are configured
         if not settings["smtp_username"] or not settings["smtp_password"]:
-            print("[⚠️] Email settings not configured. Update your .env file with SMTP credentials.")
+            logger.warning("[⚠️] Email settings not configured. Update your .env file with SMTP credentials.")
             return jsonify({
                 "success": False,
                 "message": "Email settings not configured. Please configure SMTP settings."
             }), 500
         
         # Create message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = f"{settings['sender_name']} <{settings['sender_email']}>"
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Add plain text version
-        msg.attach(MIMEText(message, 'plain'))
-        
-        # Add HTML version if provided
-        if html_message:
-            msg.attach(MIMEText(html_message, 'html'))
-        
-        # Add file attachment if provided
-        if "attachment" in request.json and "filename" in request.json:
-            attachment_data = request.json["attachment"]
-            filename = request.json["filename"]
-            
-            # For base64 encoded attachments
-            import base64
-            attachment_part = MIMEApplication(
-                base64.b64decode(attachment_data),
-                Name=filename
-            )
-            attachment_part['Content-Disposition'] = f'attachment; filename="{filename}"'
-            msg.attach(attachment_part)
-        
-        # Connect to SMTP server and send
-        try:
-            with smtplib.SMTP(settings["smtp_server"], settings["smtp_port"]) as server:
-                server.starttls()
-                server.login(settings["smtp_username"], settings["smtp_password"])
-                server.send_message(msg)
-                print(f"[✅] Email sent successfully to {to_email}")
-        except Exception as smtp_error:
-            print(f"[❌] SMTP Error: {smtp_error}")
-            return jsonify({
-                "success": False,
-                "error": f"SMTP Error: {str(smtp_error)}"
-            }), 500
+        msg = build_email_message(
+            settings, to_email, subject, message, html_message,
+            attachment=request.json.get("attachment"),
+            filename=request.json.get("filename")
+        )
         
-        return jsonify({
-            "success": True,
-            "message": "Email notification sent successfully"
-        }), 200
+        # 📬 Queue for delivery over a pooled SMTP session and return immediately
+        return queue_email(settings, msg, to_email)
         
     except Exception as e:
-        print(f"[❌] Error sending email notification: {e}")
-        traceback.print_exc()
+        logger.exception("[❌] Error sending email notification: %s", e)
         return jsonify({
             "success": False,
             "error": f"Failed to send email: {str(e)}"
         }), 500
 
+@app.route("/api/email-status/<message_id>", methods=["GET"])
+def email_status(message_id):
+    """Delivery status of a queued email (queued, retrying, sent or failed)"""
+    status = get_mail_queue(get_email_settings).status(message_id)
+    if status is None:
+        return jsonify({"error": "Unknown message ID"}), 404
+    return jsonify(status), 200
+
 # Add a new route to test email configuration
 @app.route("/api/test-email", methods=["POST"])
 def test_email_configuration():
@@ -1794,6 +2570,13 @@ def test_email_configuration():
         # Get email settings
         settings = get_email_settings()
         
+        if not settings["smtp_username"] or not settings["smtp_password"]:
+            logger.warning("[⚠️] Email settings not configured. Update your .env file with SMTP credentials.")
+            return jsonify({
+                "success": False,
+                "message": "Email settings not configured. Please configure SMTP settings."
+            }), 500
+        
         # Create HTML test message
         html_message = f"""
         <html>
@@ -1847,22 +2630,38 @@ def test_email_configuration():
         This is an automated message. Please do not reply to this email.
         """
         
-        # Prepare test email request
-        test_request = {
-            "to": to_email,
-            "subject": "IPFS Recovery Service - Email Configuration Test",
-            "message": plain_message,
-            "html": html_message
-        }
-        
-        # Use the existing send_email_notification function with our test data
-        with app.test_request_context(json=test_request, method="POST"):
-            return send_email_notification()
+        msg = build_email_message(
+            settings, to_email, "IPFS Recovery Service - Email Configuration Test", plain_message, html_message
+        )
+        return queue_email(settings, msg, to_email)
         
     except Exception as e:
-        print(f"[❌] Error testing email configuration: {e}")
-        traceback.print_exc()
+        logger.exception("[❌] Error testing email configuration: %s", e)
         return jsonify({
             "success": False,
             "error": f"Failed to test email configuration: {str(e)}"
         }), 500
+
+if __name__ == "__main__":
+    # Check if necessary modules are imported
+    if 'requests' not in sys.modules:
+        logger.error("[❌] The 'requests' module is required but not imported.")
+        sys.exit(1)
+    if 'time' not in sys.modules:
+        logger.error("[❌] The 'time' module is required but not imported.")
+        sys.exit(1)
+        
+    # Create directories if they don't exist
+    os.makedirs("temp", exist_ok=True)
+    os.makedirs(os.path.join(BASE_DIR, "settings"), exist_ok=True)
+    
+    logger.info("[🚀] Starting Quantum-Secure Blockchain File Server")
+    logger.info("[🔒] Current security profile: %s", get_blockchain_settings()["security"]["profile_level"])
+    
+    # 🧵 Start background work now rather than on the first request; with debug=True this block
+    # also runs in the reloader's watcher process, which must not start it
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
+    
+    # Run the Flask app
+    app.run(host="0.0.0.0", port=5000, debug=True)
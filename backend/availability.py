@@ -0,0 +1,204 @@
+# backend/availability.py
+# Concurrent CID availability probes against the IPFS gateways, with a TTL result cache
+
+import os
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend import metrics
+from backend.download_stream import IPFS_GATEWAYS
+
+logger = logging.getLogger(__name__)
+
+PROBE_WORKERS = int(os.getenv("VAULTIS_PROBE_WORKERS") or 64)
+PROBE_TIMEOUT = float(os.getenv("VAULTIS_PROBE_TIMEOUT_SECONDS") or 5)
+# Pinned content rarely disappears, missing content may show up once pinning finishes
+AVAILABLE_TTL = float(os.getenv("VAULTIS_AVAILABLE_TTL_SECONDS") or 3600)
+UNAVAILABLE_TTL = float(os.getenv("VAULTIS_UNAVAILABLE_TTL_SECONDS") or 60)
+AVAILABILITY_CACHE_SIZE = int(os.getenv("VAULTIS_AVAILABILITY_CACHE_SIZE") or 100000)
+MAX_BATCH_SIZE = int(os.getenv("VAULTIS_AVAILABILITY_MAX_BATCH") or 5000)
+
+
+class _Batch:
+    """Book-keeping for one check_many() call"""
+
+    def __init__(self, cids: List[str]):
+        self.results: queue.Queue = queue.Queue()
+        self.pending = {cid: len(IPFS_GATEWAYS) for cid in cids}
+        self.errors = {cid: [] for cid in cids}
+        self.resolved = set()
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+
+class AvailabilityChecker:
+    """
+    Check whether CIDs can be retrieved from any configured IPFS gateway
+
+    Each probe is a HEAD request (falling back to a one-byte range GET for
+    gateways that reject HEAD) sent over a shared, pooled session, so no
+    content is transferred and TLS connections are reused across probes.
+    A batch queues every CID on the first gateway before any fallback
+    gateway; a fallback probe is skipped once another gateway has already
+    answered for its CID. Results are cached, positive ones for much longer
+    than negative ones.
+
+    Args:
+        workers (int): Probes in flight at once, shared by all batches
+        timeout (float): Per-probe timeout in seconds
+    """
+
+    def __init__(self, workers: int = PROBE_WORKERS, timeout: float = PROBE_TIMEOUT):
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(IPFS_GATEWAYS), pool_maxsize=workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cid-probe")
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    # 🗂️ Result cache
+
+    def _cached(self, cid: str) -> Optional[dict]:
+        with self._cache_lock:
+            entry = self._cache.get(cid)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._cache[cid]
+                entry = None
+        metrics.record_cache_lookup("cid_availability", entry is not None)
+        return dict(entry[1], cached=True) if entry else None
+
+    def _remember(self, result: dict) -> None:
+        ttl = AVAILABLE_TTL if result["available"] else UNAVAILABLE_TTL
+        with self._cache_lock:
+            self._cache[result["cid"]] = (time.monotonic() + ttl, result)
+            self._cache.move_to_end(result["cid"])
+            while len(self._cache) > AVAILABILITY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    # 🔍 Probing
+
+    def probe(self, cid: str, template: str) -> Optional[int]:
+        """
+        Ask one gateway whether it can serve `cid`
+
+        Returns:
+            int: The HTTP status on a 2xx answer, None otherwise
+
+        Raises:
+            requests.RequestException: On connection errors and timeouts
+        """
+        url = template.format(cid=cid)
+        gateway = urlparse(url).netloc
+        started = time.perf_counter()
+        try:
+            response = self._session.head(url, timeout=self.timeout, allow_redirects=True)
+            if response.status_code in (405, 501):
+                # Gateway does not support HEAD: fetch a single byte instead
+                with self._session.get(url, headers={"Range": "bytes=0-0"}, stream=True,
+                                       timeout=self.timeout) as response:
+                    pass
+        except requests.RequestException:
+            metrics.AVAILABILITY_PROBES.inc(gateway=gateway, outcome="error")
+            raise
+        finally:
+            metrics.AVAILABILITY_PROBE_LATENCY.observe(time.perf_counter() - started, gateway=gateway)
+        ok = 200 <= response.status_code < 300
+        metrics.AVAILABILITY_PROBES.inc(gateway=gateway, outcome="available" if ok else "unavailable")
+        return response.status_code if ok else None
+
+    def _run_probe(self, batch: _Batch, cid: str, template: str) -> None:
+        gateway = urlparse(template).netloc
+        with batch.lock:
+            if batch.cancelled or cid in batch.resolved:
+                batch.pending[cid] -= 1
+                return
+
+        started = time.perf_counter()
+        status, error = None, None
+        try:
+            status = self.probe(cid, template)
+            if status is None:
+                error = "not found"
+        except requests.RequestException as e:
+            error = type(e).__name__
+
+        with batch.lock:
+            batch.pending[cid] -= 1
+            if batch.cancelled or cid in batch.resolved:
+                return
+            if status is not None:
+                result = {
+                    "cid": cid,
+                    "available": True,
+                    "gateway": gateway,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+            else:
+                batch.errors[cid].append(f"{gateway}: {error}")
+                if batch.pending[cid] > 0:
+                    return
+                result = {"cid": cid, "available": False, "gateway": None, "errors": batch.errors[cid]}
+            batch.resolved.add(cid)
+        self._remember(result)
+        batch.results.put(dict(result, cached=False))
+
+    def check_many(self, cids: Iterable[str]) -> Iterator[dict]:
+        """
+        Yield one result per distinct CID, in the order they finish
+
+        Cached results are yielded first. Closing the iterator early (e.g.
+        when the client disconnects) skips the probes that have not started.
+
+        Yields:
+            dict: {"cid", "available", "gateway", "cached", ...}
+        """
+        to_probe = []
+        for cid in dict.fromkeys(cids):
+            cached = self._cached(cid)
+            if cached is not None:
+                yield cached
+            else:
+                to_probe.append(cid)
+        if not to_probe:
+            return
+
+        batch = _Batch(to_probe)
+        started = time.perf_counter()
+        for template in IPFS_GATEWAYS:
+            for cid in to_probe:
+                self._executor.submit(self._run_probe, batch, cid, template)
+        try:
+            for _ in range(len(to_probe)):
+                yield batch.results.get()
+            logger.debug("[🔍] Probed %s CIDs in %.2fs", len(to_probe), time.perf_counter() - started)
+        finally:
+            with batch.lock:
+                batch.cancelled = True
+
+    def check(self, cid: str) -> dict:
+        return next(self.check_many([cid]))
+
+
+_checker: Optional[AvailabilityChecker] = None
+_checker_lock = threading.Lock()
+
+
+def get_availability_checker() -> AvailabilityChecker:
+    """Process-wide AvailabilityChecker, created on first use"""
+    global _checker
+    if _checker is None:
+        with _checker_lock:
+            if _checker is None:
+                _checker = AvailabilityChecker()
+    return _checker
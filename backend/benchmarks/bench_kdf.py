@@ -0,0 +1,90 @@
+# backend/benchmarks/bench_kdf.py
+# Calibrate the scrypt cost used for password-protected keys against a latency target
+#
+# Usage:
+#   python backend/benchmarks/bench_kdf.py [--target-ms 250] [--r 8] [--p 1] [--max-log-n 20] [--concurrency 4]
+#
+# For each n = 2^14 .. 2^max-log-n the script times single derivations and then
+# `concurrency` derivations in parallel through the KDF worker pool. The result shows
+# the latency users see under load and the memory each derivation pins. It recommends
+# the largest n whose p95 latency stays within the target; export it as
+# VAULTIS_SCRYPT_N (and VAULTIS_KDF_WORKERS for the concurrency you measured).
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(BASE_DIR)
+
+from backend.admission import BoundedExecutor
+from crypto.password_wrap import ScryptParams, derive_key
+
+
+def time_derivations(params: ScryptParams, rounds: int) -> list:
+    """Latency of `rounds` sequential derivations in milliseconds"""
+    salt = os.urandom(16)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        derive_key("correct horse battery staple", salt, params)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def time_under_load(params: ScryptParams, concurrency: int, rounds: int) -> list:
+    """Per-request latency in milliseconds when `concurrency` requests share the worker pool"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = BoundedExecutor("kdf-bench", concurrency, rounds, timeout=600)
+    salt = os.urandom(16)
+
+    def one(_):
+        started = time.perf_counter()
+        pool.run(derive_key, "correct horse battery staple", salt, params)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        return list(clients.map(one, range(rounds)))
+
+
+def p95(values: list) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="scrypt cost calibration")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Latency budget per derivation")
+    parser.add_argument("--r", type=int, default=8)
+    parser.add_argument("--p", type=int, default=1)
+    parser.add_argument("--max-log-n", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f"{'n':>10} {'memory':>9} {'median ms':>10} {'p95 ms':>9} {'loaded p95':>11}")
+    recommended = None
+    for log_n in range(14, args.max_log_n + 1):
+        params = ScryptParams(2 ** log_n, args.r, args.p)
+        single = time_derivations(params, args.rounds)
+        loaded = time_under_load(params, args.concurrency, args.rounds * args.concurrency)
+        print(
+            f"{params.n:>10} {params.memory_bytes / 2 ** 20:>7.0f}MB {statistics.median(single):>10.1f} "
+            f"{p95(single):>9.1f} {p95(loaded):>11.1f}"
+        )
+        if p95(loaded) <= args.target_ms:
+            recommended = params
+        else:
+            break
+
+    if recommended is None:
+        print(f"\nEven n=2^14 exceeds {args.target_ms:.0f} ms at concurrency {args.concurrency}; lower the concurrency or raise the budget")
+    else:
+        print(
+            f"\nRecommended: VAULTIS_SCRYPT_N={recommended.n} VAULTIS_SCRYPT_R={recommended.r} "
+            f"VAULTIS_SCRYPT_P={recommended.p} ({recommended.memory_bytes / 2 ** 20:.0f} MB per derivation, "
+            f"{args.concurrency * recommended.memory_bytes / 2 ** 20:.0f} MB at full concurrency)"
+        )
@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_logging.py
+# Measure /api/encrypt-upload throughput with logging on and off
+#
+# Usage:
+#   python backend/benchmarks/bench_logging.py [--requests 200] [--threads 8] [--size 65536] [--level INFO]
+#
+# Log output goes to stdout, so redirect it (e.g. `> /dev/null`) when you only want
+# the summary, which is written to stderr. Pinata is replaced with a local stub so
+# the numbers reflect the backend itself, not network latency.
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(BASE_DIR)
+
+from backend import app as backend_app
+from backend.logging_config import configure_logging, shutdown_logging
+
+
+def fake_upload_stream_to_pinata(chunks, filename):
+    """Stand-in for Pinata so the benchmark never leaves the machine"""
+    for _ in chunks:
+        pass
+    return "QmBenchmark" + "0" * 35
+
+
+def run(requests_count: int, threads: int, payload: bytes) -> float:
+    """
+    Fire `requests_count` uploads across `threads` workers
+
+    Returns:
+        float: Requests per second
+    """
+    client = backend_app.app.test_client()
+
+    def one_request(_):
+        response = client.post(
+            "/api/encrypt-upload",
+            data={"file": (io.BytesIO(payload), "bench.bin")},
+            content_type="multipart/form-data"
+        )
+        assert response.status_code == 200, response.data
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one_request, range(requests_count)))
+    return requests_count / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Upload size in bytes")
+    parser.add_argument("--level", default="INFO", help="Log level for the 'on' run")
+    args = parser.parse_args()
+
+    backend_app.upload_stream_to_pinata = fake_upload_stream_to_pinata
+    payload = os.urandom(args.size)
+
+    # Warm up imports, temp dir and the Werkzeug test client
+    configure_logging(enabled=False)
+    run(min(args.requests, 20), args.threads, payload)
+
+    results = {}
+    for label, enabled in (("logging off", False), ("logging on", True)):
+        # Start each run from an empty temp dir so the after-request cleanup scan costs the same
+        shutil.rmtree("temp", ignore_errors=True)
+        configure_logging(level=args.level, enabled=enabled)
+        results[label] = run(args.requests, args.threads, payload)
+        shutdown_logging()
+
+    configure_logging(enabled=False)
+    print(f"\n{args.requests} requests, {args.threads} threads, {args.size} byte uploads", file=sys.stderr)
+    for label, rps in results.items():
+        print(f"  {label:<12} {rps:10.1f} req/s", file=sys.stderr)
+    off, on = results["logging off"], results["logging on"]
+    print(f"  overhead     {100 * (off - on) / off:9.1f} %", file=sys.stderr)
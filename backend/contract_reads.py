@@ -0,0 +1,185 @@
+# backend/contract_reads.py
+# Batched QuantumStorage view calls with a per-block read cache
+
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend import metrics
+from backend.abi import decode, encode_call, to_bytes
+from backend.event_indexer import CONTRACT_ADDRESS
+from backend.rpc import JSONRPCClient, RPCError, get_rpc_client
+
+logger = logging.getLogger(__name__)
+
+# How long a block number is trusted before asking the node again; reads are cached per block
+READ_CACHE_TTL = float(os.getenv("VAULTIS_READ_CACHE_TTL_SECONDS") or 2)
+READ_CACHE_SIZE = int(os.getenv("VAULTIS_READ_CACHE_SIZE") or 50000)
+# Reads accepted in one API request
+MAX_READS = int(os.getenv("VAULTIS_MAX_CONTRACT_READS") or 5000)
+
+# (signature, return types) as declared in QuantumStorage.sol
+HAS_ACCESS = ("hasAccess(uint256,address)", ["bool"])
+FILE_INFO = ("getFileInfo(uint256)", ["address", "address", "string", "uint256", "address[]"])
+GET_CID = ("getCID(uint256)", ["string"])
+
+# One view call: ((signature, return types), args, msg.sender or None)
+Read = Tuple[Tuple[str, List[str]], tuple, Optional[str]]
+
+
+class ContractReader:
+    """
+    Answer many contract view calls with one node round trip
+
+    All calls of a read_many() are pinned to the same block and sent as one
+    JSON-RPC batch of eth_call requests (split at RPC_MAX_BATCH). Decoded
+    results are cached for that block; the block number itself is re-read
+    at most every `ttl` seconds, and moving to a new block drops the cache,
+    so a dashboard refreshing hundreds of reads costs one request per block.
+
+    Args:
+        client (JSONRPCClient): Node connection
+        address (str): QuantumStorage contract address
+        ttl (float): Seconds to reuse a block number
+        max_entries (int): Cached results kept per block
+    """
+
+    def __init__(
+        self,
+        client: JSONRPCClient,
+        address: str,
+        ttl: float = READ_CACHE_TTL,
+        max_entries: int = READ_CACHE_SIZE
+    ):
+        self.client = client
+        self.address = address.lower()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._block: Optional[int] = None
+        self._block_checked = 0.0
+        self._cache: "OrderedDict[tuple, Optional[list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def block(self) -> int:
+        """Block that reads are currently answered at"""
+        with self._lock:
+            if self._block is not None and time.monotonic() - self._block_checked < self.ttl:
+                return self._block
+        number = self.client.block_number()
+        with self._lock:
+            if number != self._block:
+                self._cache.clear()
+                self._block = number
+            self._block_checked = time.monotonic()
+        return number
+
+    def read_many(self, reads: Sequence[Read]) -> Tuple[int, List[Optional[list]]]:
+        """
+        Run view calls at one block
+
+        Args:
+            reads (list): ((signature, return types), args, sender) per call
+
+        Returns:
+            tuple: (block, results); each result is the decoded return values,
+                or None if the call reverted (e.g. "Access denied")
+
+        Raises:
+            RPCError: If the node cannot be reached
+        """
+        block = self.block()
+        keys = [(signature, tuple(args), (sender or "").lower()) for (signature, _), args, sender in reads]
+        results: List[Optional[list]] = [None] * len(reads)
+        missing: Dict[tuple, List[int]] = {}
+        with self._lock:
+            for position, key in enumerate(keys):
+                if key in self._cache:
+                    results[position] = self._cache[key]
+                else:
+                    missing.setdefault(key, []).append(position)
+        hits = len(reads) - sum(len(positions) for positions in missing.values())
+        metrics.CONTRACT_READS.inc(hits, source="cache")
+        metrics.CONTRACT_READS.inc(len(reads) - hits, source="node")
+        if not missing:
+            return block, results
+
+        pending = list(missing)
+        returns = {key: reads[missing[key][0]][0][1] for key in pending}
+        replies = self.client.batch([
+            ("eth_call", JSONRPCClient.call_params(self.address, encode_call(signature, *args), block, sender or None))
+            for signature, args, sender in pending
+        ])
+        fresh = {}
+        for key, reply in zip(pending, replies):
+            if isinstance(reply, RPCError):
+                # Reverts are an answer for this block; transport-level problems are not cached
+                logger.debug("[🔍] %s%s reverted at block %s: %s", key[0], key[1], block, reply)
+                value = None
+                if reply.code is None:
+                    continue
+            else:
+                try:
+                    value = decode(returns[key], to_bytes(reply or "0x"))
+                except ValueError:
+                    value = None
+            fresh[key] = value
+            for position in missing[key]:
+                results[position] = value
+
+        with self._lock:
+            if self._block == block:
+                self._cache.update(fresh)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return block, results
+
+    # ⛓️ QuantumStorage reads
+
+    def has_access_many(self, pairs: Iterable[Tuple[int, str]]) -> Tuple[int, Dict[Tuple[int, str], bool]]:
+        """hasAccess(fileId, user) for every (file_id, user) pair"""
+        pairs = [(int(file_id), user.lower()) for file_id, user in pairs]
+        block, results = self.read_many([(HAS_ACCESS, pair, None) for pair in pairs])
+        return block, {pair: bool(result and result[0]) for pair, result in zip(pairs, results)}
+
+    def file_info_many(self, file_ids: Iterable[int], caller: str) -> Tuple[int, Dict[int, Optional[dict]]]:
+        """getFileInfo(fileId) as `caller`; None for files the caller cannot see"""
+        file_ids = [int(file_id) for file_id in file_ids]
+        block, results = self.read_many([(FILE_INFO, (file_id,), caller) for file_id in file_ids])
+        files: Dict[int, Optional[dict]] = {}
+        for file_id, result in zip(file_ids, results):
+            if result is None:
+                files[file_id] = None
+                continue
+            owner, uploader, cid, timestamp, access_users = result
+            files[file_id] = {
+                "file_id": file_id,
+                "owner": owner,
+                "uploader": uploader,
+                "cid": cid,
+                "timestamp": timestamp,
+                "access": access_users
+            }
+        return block, files
+
+    def cid_many(self, file_ids: Iterable[int], caller: str) -> Tuple[int, Dict[int, Optional[str]]]:
+        """getCID(fileId) as `caller`; None for files the caller cannot see"""
+        file_ids = [int(file_id) for file_id in file_ids]
+        block, results = self.read_many([(GET_CID, (file_id,), caller) for file_id in file_ids])
+        return block, {file_id: result[0] if result else None for file_id, result in zip(file_ids, results)}
+
+
+_reader: Optional[ContractReader] = None
+_reader_lock = threading.Lock()
+
+
+def get_contract_reader() -> Optional[ContractReader]:
+    """Process-wide ContractReader, None when VAULTIS_CONTRACT_ADDRESS is not set"""
+    global _reader
+    if _reader is None and CONTRACT_ADDRESS:
+        with _reader_lock:
+            if _reader is None:
+                _reader = ContractReader(get_rpc_client(), CONTRACT_ADDRESS)
+    return _reader
@@ -0,0 +1,211 @@
+# backend/dedup.py
+# Deduplicated uploads: content-defined chunks, convergently encrypted and packed into pinned objects
+
+import os
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from backend import metrics
+from backend.admission import ComputeGate
+from crypto.chunking import ContentChunker
+from crypto.convergent import chunk_keys, encode_key, encrypt_chunk
+from storage.chunk_index import ChunkIndex, get_chunk_index
+from storage.upload_to_ipfs import upload_stream_to_pinata
+
+logger = logging.getLogger(__name__)
+
+DEDUP_AVG_CHUNK_SIZE = int(os.getenv("VAULTIS_DEDUP_AVG_CHUNK_SIZE") or 64 * 1024)
+# New chunks are pinned in packs of about this size instead of one IPFS object per chunk
+DEDUP_PACK_SIZE = int(os.getenv("VAULTIS_DEDUP_PACK_SIZE") or 8 * 1024 * 1024)
+# Packs being pinned while the next one is filled
+DEDUP_PACK_WORKERS = int(os.getenv("VAULTIS_DEDUP_PACK_WORKERS") or 2)
+# Chunks looked up in the index per query
+_LOOKUP_BATCH = 256
+
+_chunker: Optional[ContentChunker] = None
+_chunker_lock = threading.Lock()
+
+
+def get_chunker() -> ContentChunker:
+    """Process-wide ContentChunker; its parameters must stay fixed for chunks to match across uploads"""
+    global _chunker
+    if _chunker is None:
+        with _chunker_lock:
+            if _chunker is None:
+                _chunker = ContentChunker(DEDUP_AVG_CHUNK_SIZE)
+    return _chunker
+
+
+class DedupWriter:
+    """
+    Store a plaintext stream as references to convergently encrypted chunks
+
+    The stream is cut into content-defined chunks. Each chunk's id and key
+    come from the owner's convergence secret and the chunk itself, so a
+    chunk this owner stored before (in any earlier upload, or earlier in
+    this one) is found in the ChunkIndex and only referenced. New chunks
+    are sealed and appended to a pack; full packs are pinned on a small
+    thread pool while the next one fills, and their chunks are indexed only
+    once the pin succeeded.
+
+    write() returns the manifest: the ordered chunk list with each chunk's
+    pack, offset, sealed length and key. The caller encrypts the manifest
+    like any other file, so only holders of the file key can read it.
+
+    Args:
+        owner (str): Wallet the chunks are scoped to; must be authenticated, as
+            `stats` reveal which chunks it stored before
+        index (ChunkIndex): Chunks already pinned per owner
+        pin (callable): (blocks, name) -> CID, Pinata by default
+        chunker (ContentChunker): Boundary detection
+        pack_size (int): Target bytes per pinned pack
+        workers (int): Packs pinned concurrently
+        gate (ComputeGate): Held while chunking and sealing, released while
+            reading `blocks` and waiting for pins
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        index: Optional[ChunkIndex] = None,
+        pin: Callable[[Iterable[bytes], str], str] = upload_stream_to_pinata,
+        chunker: Optional[ContentChunker] = None,
+        pack_size: int = DEDUP_PACK_SIZE,
+        workers: int = DEDUP_PACK_WORKERS,
+        gate: Optional[ComputeGate] = None
+    ):
+        self.owner = owner
+        self.index = index or get_chunk_index()
+        self.pin = pin
+        self.chunker = chunker or get_chunker()
+        self.pack_size = pack_size
+        self.workers = max(1, workers)
+        self.gate = gate
+        self._secret = self.index.owner_secret(owner)
+        # Manifest pack list: CIDs, or None for packs of this upload still being pinned
+        self._packs: List[Optional[str]] = []
+        self._pack_numbers: Dict[str, int] = {}
+        # Chunks sealed by this upload: chunk_id -> (pack number, offset, length)
+        self._sealed: Dict[bytes, Tuple[int, int, int]] = {}
+        self._pack = bytearray()
+        self._pack_entries: List[Tuple[bytes, int, int]] = []
+        # Manifest slot of the pack being filled, reserved by its first chunk
+        self._slot: Optional[int] = None
+        self._inflight: Deque[Tuple[int, Future]] = deque()
+        self.stats = {"size": 0, "chunks": 0, "new_chunks": 0, "reused_chunks": 0, "uploaded_bytes": 0, "packs": 0}
+
+    def _pack_number(self, cid: str) -> int:
+        number = self._pack_numbers.get(cid)
+        if number is None:
+            number = self._pack_numbers[cid] = len(self._packs)
+            self._packs.append(cid)
+        return number
+
+    # 📦 Packs
+
+    def _pin_pack(self, number: int, data: bytes, entries: List[Tuple[bytes, int, int]]) -> str:
+        cid = self.pin([data], f"vaultis_pack_{number}")
+        self.index.add_many(self.owner, cid, entries)
+        return cid
+
+    def _collect(self, wait_for: int) -> None:
+        """Finish pinned packs until at most `wait_for` are still in flight"""
+        while len(self._inflight) > wait_for:
+            number, future = self._inflight.popleft()
+            with self.gate.released() if self.gate else nullcontext():
+                cid = future.result()
+            self._packs[number] = cid
+            self._pack_numbers.setdefault(cid, number)
+
+    def _flush(self, pool: ThreadPoolExecutor) -> None:
+        if not self._pack_entries:
+            return
+        number, data, entries = self._slot, bytes(self._pack), self._pack_entries
+        self._pack, self._pack_entries, self._slot = bytearray(), [], None
+        self.stats["packs"] += 1
+        self.stats["uploaded_bytes"] += len(data)
+        # Bound memory: at most `workers` packs pinning plus the one being filled
+        self._collect(self.workers - 1)
+        self._inflight.append((number, pool.submit(self._pin_pack, number, data, entries)))
+
+    # ✂️ Chunks
+
+    def _add_batch(self, batch: List[bytes], references: list, pool: ThreadPoolExecutor) -> None:
+        keyed = [chunk_keys(self._secret, chunk) for chunk in batch]
+        known = self.index.lookup_many(self.owner, [chunk_id for chunk_id, _ in keyed])
+        for chunk, (chunk_id, key) in zip(batch, keyed):
+            self.stats["size"] += len(chunk)
+            self.stats["chunks"] += 1
+            if chunk_id in known:
+                pack_cid, offset, length = known[chunk_id]
+                references.append([self._pack_number(pack_cid), offset, length, encode_key(key)])
+                self.stats["reused_chunks"] += 1
+                continue
+            if chunk_id in self._sealed:
+                number, offset, length = self._sealed[chunk_id]
+                references.append([number, offset, length, encode_key(key)])
+                self.stats["reused_chunks"] += 1
+                continue
+            sealed = encrypt_chunk(key, chunk)
+            if self._pack and len(self._pack) + len(sealed) > self.pack_size:
+                self._flush(pool)
+            if self._slot is None:
+                # Reserved now: packs reused later in this upload are numbered after it
+                self._slot = len(self._packs)
+                self._packs.append(None)
+            location = (self._slot, len(self._pack), len(sealed))
+            self._pack += sealed
+            self._pack_entries.append((chunk_id, location[1], location[2]))
+            self._sealed[chunk_id] = location
+            references.append(list(location) + [encode_key(key)])
+            self.stats["new_chunks"] += 1
+
+    def write(self, blocks: Iterable[bytes]) -> dict:
+        """
+        Chunk, deduplicate and pin a plaintext stream
+
+        Returns:
+            dict: The manifest, to be encrypted and pinned by the caller
+
+        Raises:
+            Exception: If a pack cannot be pinned
+        """
+        references: list = []
+        batch: List[bytes] = []
+        if self.gate is not None:
+            blocks = self.gate.io(blocks)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dedup-pin") as pool, \
+                self.gate.held() if self.gate else nullcontext():
+            try:
+                for chunk in self.chunker.split(blocks):
+                    batch.append(chunk)
+                    if len(batch) >= _LOOKUP_BATCH:
+                        self._add_batch(batch, references, pool)
+                        batch = []
+                if batch:
+                    self._add_batch(batch, references, pool)
+                self._flush(pool)
+                self._collect(0)
+            except Exception:
+                for _, future in self._inflight:
+                    future.cancel()
+                raise
+
+        metrics.DEDUP_CHUNKS.inc(self.stats["new_chunks"], outcome="new")
+        metrics.DEDUP_CHUNKS.inc(self.stats["reused_chunks"], outcome="reused")
+        metrics.DEDUP_BYTES_SAVED.inc(max(0, self.stats["size"] - self.stats["uploaded_bytes"]))
+        logger.info(
+            "[♻️] Deduplicated %s bytes into %s chunks: %s new (%s bytes pinned in %s packs), %s reused",
+            self.stats["size"], self.stats["chunks"], self.stats["new_chunks"],
+            self.stats["uploaded_bytes"], self.stats["packs"], self.stats["reused_chunks"]
+        )
+        return {
+            "size": self.stats["size"],
+            "chunker": self.chunker.params,
+            "packs": self._packs,
+            "chunks": references
+        }
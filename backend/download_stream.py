@@ -0,0 +1,407 @@
+# backend/download_stream.py
+# Shared fetch → decrypt → stream pipeline behind the download routes (no temp files)
+
+import time
+import logging
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+import requests
+from werkzeug.http import dump_options_header
+
+from backend import metrics, tracing
+from backend.admission import ComputeGate, Overloaded, crypto_gate
+from crypto.convergent import decode_manifest, decrypt_chunk, is_manifest, manifest_key
+from crypto.decryptor import decrypt_legacy_with_kyber, parse_encrypted_content, verify_installation
+from crypto.streaming import (
+    MAGIC, StreamDecryptor, StreamFormatError, decode_header, header_size, is_stream_container
+)
+from storage.key_store import get_key_store
+
+logger = logging.getLogger(__name__)
+
+# Gateways are tried in order until one answers with a 2xx status
+IPFS_GATEWAYS = (
+    "https://gateway.pinata.cloud/ipfs/{cid}",
+    "https://ipfs.io/ipfs/{cid}",
+    "https://cloudflare-ipfs.com/ipfs/{cid}",
+)
+GATEWAY_TIMEOUT = 30
+READ_SIZE = 64 * 1024
+# First range read for a header-only fetch; covers a single-recipient header in one request
+HEADER_PROBE_SIZE = 4096
+# Deduplicated files: adjacent chunks are fetched with one ranged read of up to this size,
+# and this many reads are kept in flight ahead of the one being decrypted
+MANIFEST_READ_SIZE = 4 * 1024 * 1024
+MANIFEST_READ_AHEAD = 4
+
+
+class DownloadError(Exception):
+    """
+    Failure detected before the response started, reported as a JSON error
+
+    Args:
+        message (str): Human readable error
+        status (int): HTTP status for the error response
+        code (str): Machine readable error code
+    """
+
+    def __init__(self, message: str, status: int = 500, code: str = "PROCESS_FAILED"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def open_gateway_stream(cid: str) -> Tuple[requests.Response, str]:
+    """
+    Open a streaming GET for `cid` on the first gateway that answers
+
+    Returns as soon as response headers arrive, so the caller can start
+    relaying the body immediately.
+
+    Returns:
+        tuple: (response, gateway_host)
+
+    Raises:
+        DownloadError: If every gateway fails
+    """
+    for template in IPFS_GATEWAYS:
+        gateway_url = template.format(cid=cid)
+        gateway_host = urlparse(gateway_url).netloc
+        try:
+            logger.debug("[🔍] Trying IPFS gateway: %s", gateway_url)
+            response = requests.get(gateway_url, stream=True, timeout=GATEWAY_TIMEOUT)
+            response.raise_for_status()
+            return response, gateway_host
+        except requests.RequestException as gateway_error:
+            metrics.GATEWAY_FAILURES.inc(gateway=gateway_host)
+            logger.warning("[⚠️] Gateway %s failed: %s", gateway_url, gateway_error)
+
+    logger.error("[❌] All IPFS gateways failed for CID: %s", cid)
+    raise DownloadError("Failed to retrieve file from IPFS", 404, "IPFS_RETRIEVAL_FAILED")
+
+
+def _read_range(url: str, start: int, size: int) -> bytes:
+    """
+    Bytes [start, start + size) of `url`
+
+    Gateways that ignore Range answer 200 with the whole body; only the
+    bytes needed are read before the connection is dropped.
+    """
+    headers = {"Range": f"bytes={start}-{start + size - 1}"}
+    with requests.get(url, headers=headers, stream=True, timeout=GATEWAY_TIMEOUT) as response:
+        response.raise_for_status()
+        skip = 0 if response.status_code == 206 else start
+        data = bytearray()
+        for block in response.iter_content(chunk_size=READ_SIZE):
+            data += block
+            if len(data) >= skip + size:
+                break
+        return bytes(data[skip:skip + size])
+
+
+def fetch_container_header(cid: str) -> Tuple[Optional[dict], int]:
+    """
+    Read just the container header of `cid` with HTTP range requests
+
+    Returns:
+        tuple: (header, bytes_read); header is None for legacy single-shot files
+
+    Raises:
+        DownloadError: If every gateway fails
+        StreamFormatError: If the container header is malformed
+    """
+    for template in IPFS_GATEWAYS:
+        gateway_url = template.format(cid=cid)
+        gateway_host = urlparse(gateway_url).netloc
+        try:
+            data = _read_range(gateway_url, 0, HEADER_PROBE_SIZE)
+            if not is_stream_container(data):
+                return None, len(data)
+            size = header_size(data)
+            if len(data) < size:
+                data += _read_range(gateway_url, len(data), size - len(data))
+            return decode_header(data), len(data)
+        except requests.RequestException as gateway_error:
+            metrics.GATEWAY_FAILURES.inc(gateway=gateway_host)
+            logger.warning("[⚠️] Gateway %s failed: %s", gateway_url, gateway_error)
+
+    logger.error("[❌] All IPFS gateways failed for CID: %s", cid)
+    raise DownloadError("Failed to retrieve file from IPFS", 404, "IPFS_RETRIEVAL_FAILED")
+
+
+def fetch_range(cid: str, start: int, size: int) -> bytes:
+    """
+    Bytes [start, start + size) of `cid` from the first gateway that serves them all
+
+    Raises:
+        DownloadError: If every gateway fails
+    """
+    for template in IPFS_GATEWAYS:
+        gateway_url = template.format(cid=cid)
+        gateway_host = urlparse(gateway_url).netloc
+        try:
+            data = _read_range(gateway_url, start, size)
+            if len(data) == size:
+                return data
+            logger.warning("[⚠️] Gateway %s returned %s of %s bytes", gateway_url, len(data), size)
+        except requests.RequestException as gateway_error:
+            logger.warning("[⚠️] Gateway %s failed: %s", gateway_url, gateway_error)
+        metrics.GATEWAY_FAILURES.inc(gateway=gateway_host)
+
+    logger.error("[❌] All IPFS gateways failed for CID: %s", cid)
+    raise DownloadError("Failed to retrieve file from IPFS", 404, "IPFS_RETRIEVAL_FAILED")
+
+
+def _manifest_reads(manifest: dict) -> Iterator[list]:
+    """Group chunks stored back to back in the same pack into [cid, offset, size, [(length, key), ...]] reads"""
+    read = None
+    for pack, offset, length, key in manifest["chunks"]:
+        cid = manifest["packs"][pack]
+        if read and read[0] == cid and read[1] + read[2] == offset and read[2] + length <= MANIFEST_READ_SIZE:
+            read[2] += length
+            read[3].append((length, key))
+            continue
+        if read:
+            yield read
+        read = [cid, offset, length, [(length, key)]]
+    if read:
+        yield read
+
+
+def iter_manifest(manifest: dict, gate: Optional[ComputeGate] = None) -> Iterator[bytes]:
+    """Plaintext of a deduplicated file, chunk by chunk, with ranged pack reads prefetched; `gate` is held while decrypting"""
+    reads = _manifest_reads(manifest)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=MANIFEST_READ_AHEAD, thread_name_prefix="manifest-read") as pool:
+        def submit():
+            read = next(reads, None)
+            if read is not None:
+                pending.append((read[3], pool.submit(fetch_range, read[0], read[1], read[2])))
+
+        for _ in range(MANIFEST_READ_AHEAD):
+            submit()
+        while pending:
+            parts, future = pending.popleft()
+            data = future.result()
+            submit()
+            position = 0
+            for length, key in parts:
+                with gate.held() if gate else nullcontext():
+                    plaintext = decrypt_chunk(manifest_key(key), data[position:position + length])
+                yield plaintext
+                position += length
+
+
+def content_disposition(download_name: str) -> str:
+    """Attachment header value with an RFC 5987 fallback for non-ASCII names"""
+    try:
+        download_name.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        quoted = quote(download_name, safe="!#$&+-.^_`|~")
+        return dump_options_header("attachment", {"filename": simple, "filename*": f"UTF-8''{quoted}"})
+    return dump_options_header("attachment", {"filename": download_name})
+
+
+class DownloadPipeline:
+    """
+    Relay a CID from an IPFS gateway to the client, optionally decrypting it
+
+    open() does everything that can still fail with a proper error status:
+    it connects to a gateway and, when a private key is given, reads just
+    enough of the body to parse the container header and unwrap the data
+    key. Iterating the pipeline afterwards yields authenticated plaintext
+    (or the raw ciphertext) frame by frame, so nothing is written to disk
+    and the first byte leaves shortly after the gateway's first byte.
+
+    A frame that fails authentication mid-stream raises from the iterator,
+    which aborts the connection instead of completing a corrupt download.
+    For a deduplicated upload the container holds its chunk manifest, and
+    the plaintext is streamed from ranged reads of the chunk packs instead.
+    """
+
+    def __init__(self, cid: str, private_key: Optional[str] = None, kyber_variant: str = 'auto'):
+        self.cid = cid
+        self.private_key = private_key
+        self.kyber_variant = kyber_variant
+        self.content_length: Optional[int] = None
+        self.encrypted_length: Optional[int] = None
+        self._response: Optional[requests.Response] = None
+        self._gateway_host = ""
+        self._started = 0.0
+        self._blocks: Optional[Iterator[bytes]] = None
+        self._pending = b""
+        self._decryptor: Optional[StreamDecryptor] = None
+        self._legacy_plaintext: Optional[bytes] = None
+        self._manifest: Optional[dict] = None
+        # Deferred request trace that receives the body stages (see stream_download_response)
+        self.trace: Optional[tracing.RequestTrace] = None
+        # Crypto slots are taken per decrypted block, not for the whole transfer
+        self._gate = crypto_gate()
+
+    @property
+    def decrypting(self) -> bool:
+        return self.private_key is not None
+
+    def open(self) -> "DownloadPipeline":
+        self._started = time.perf_counter()
+        with tracing.span("fetch"):
+            self._response, self._gateway_host = open_gateway_stream(self.cid)
+
+        # Content-Length is only the body size when the gateway did not compress it
+        length = self._response.headers.get("Content-Length")
+        if length and length.isdigit() and not self._response.headers.get("Content-Encoding"):
+            self.encrypted_length = int(length)
+        self._blocks = self._response.iter_content(chunk_size=READ_SIZE)
+
+        try:
+            first = self._read_prefix(len(MAGIC))
+            if not first:
+                raise DownloadError("Downloaded file is empty", 500, "EMPTY_DOWNLOAD")
+            if not self.decrypting:
+                self.content_length = self.encrypted_length
+                self._pending = first
+            elif is_stream_container(first):
+                # The first crypto slot admits the download, so a busy server answers 503 before the body starts
+                with tracing.span("unwrap_key"), self._gate.held():
+                    self._open_container(first)
+                if is_manifest(self._decryptor.header):
+                    with tracing.span("fetch"):
+                        self._open_manifest()
+            else:
+                with tracing.span("decrypt"):
+                    self._open_legacy(first)
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def _read_prefix(self, size: int) -> bytes:
+        data = b""
+        for block in self._blocks:
+            data += block
+            if len(data) >= size:
+                break
+        return data
+
+    def _open_container(self, data: bytes) -> None:
+        # After a key rotation the current key opens the detached header, not the pinned one
+        self._decryptor = StreamDecryptor(self.private_key, header=get_key_store().get_header(self.cid))
+        try:
+            out = self._decryptor.update(data)
+            while not self._decryptor.ready:
+                with self._gate.released():
+                    block = next(self._blocks, None)
+                if block is None:
+                    raise StreamFormatError("Encrypted stream is truncated")
+                out += self._decryptor.update(block)
+        except StreamFormatError as e:
+            raise DownloadError(f"Failed to decrypt file: {e}", 500, "KYBER_DECRYPTION_FAILED")
+        self._pending = out
+        if self.encrypted_length is not None:
+            try:
+                self.content_length = self._decryptor.plaintext_length(self.encrypted_length)
+            except StreamFormatError:
+                self.content_length = None
+
+    def _open_manifest(self) -> None:
+        # A deduplicated file's container only holds its chunk list; the chunks are read from their packs
+        body = bytearray(self._pending)
+        try:
+            for block in self._blocks:
+                body += self._decryptor.update(block)
+            self._decryptor.finalize()
+            self._manifest = decode_manifest(bytes(body))
+        except StreamFormatError as e:
+            raise DownloadError(f"Failed to decrypt file: {e}", 500, "KYBER_DECRYPTION_FAILED")
+        self._pending = b""
+        self.content_length = self._manifest["size"]
+
+    def _open_legacy(self, data: bytes) -> None:
+        # Only the old single-shot format needs a real Kyber library; stream containers do not
+        if not verify_installation():
+            raise DownloadError("Kyber decryption libraries not available", 500, "KYBER_LIBS_MISSING")
+        # The old single-shot JSON format cannot be decrypted incrementally
+        body = bytearray(data)
+        for block in self._blocks:
+            body += block
+        try:
+            encrypted_data = parse_encrypted_content(body.decode('utf-8'))
+            with self._gate.held():
+                self._legacy_plaintext = decrypt_legacy_with_kyber(encrypted_data, self.private_key, self.kyber_variant)
+        except Overloaded:
+            raise
+        except Exception as e:
+            raise DownloadError(f"Failed to decrypt file: {e}", 500, "KYBER_DECRYPTION_FAILED")
+        self.encrypted_length = len(body)
+        self.content_length = len(self._legacy_plaintext)
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._blocks is None:
+            raise RuntimeError("DownloadPipeline.open() must be called first")
+        sent = 0
+        body_started = time.perf_counter()
+        self._gate.started()
+        try:
+            if self._legacy_plaintext is not None:
+                sent = len(self._legacy_plaintext)
+                yield self._legacy_plaintext
+            elif self._manifest is not None:
+                for plaintext in iter_manifest(self._manifest, self._gate):
+                    sent += len(plaintext)
+                    yield plaintext
+            elif self._decryptor is not None:
+                if self._pending:
+                    sent += len(self._pending)
+                    yield self._pending
+                for block in self._blocks:
+                    # Compressed frames come out in bounded pieces; the slot is held only while producing each
+                    for plaintext in self._gate.compute(self._decryptor.iter_update(block)):
+                        sent += len(plaintext)
+                        yield plaintext
+                with self._gate.held():
+                    self._decryptor.finalize()
+            else:
+                if self._pending:
+                    sent += len(self._pending)
+                    yield self._pending
+                for block in self._blocks:
+                    sent += len(block)
+                    yield block
+        except Exception as e:
+            logger.error("[❌] Download stream for CID %s aborted: %s", self.cid, e)
+            raise
+        else:
+            metrics.GATEWAY_LATENCY.observe(time.perf_counter() - self._started, gateway=self._gateway_host)
+            if self.decrypting:
+                metrics.BYTES_DECRYPTED.inc(sent)
+            logger.debug(
+                "[✅] Streamed CID %s", self.cid,
+                extra={"cid": self.cid, "size": sent, "decrypted": self.decrypting}
+            )
+            self._finish_trace(time.perf_counter() - body_started)
+        finally:
+            self.close()
+
+    def _finish_trace(self, body_seconds: float) -> None:
+        # Server-Timing left with the headers; the body's stages go to metrics and the trace file
+        trace = self.trace
+        if trace is None:
+            return
+        stages = [("stream_body", body_seconds)]
+        if self._decryptor is not None:
+            stages.append(("decrypt", self._decryptor.decrypt_seconds))
+        for stage, seconds in stages:
+            trace.add(stage, seconds)
+            metrics.STAGE_LATENCY.observe(seconds, route=trace.route, stage=stage)
+        tracing.complete_deferred(trace)
+
+    def close(self) -> None:
+        if self._response is not None:
+            self._response.close()
+            self._response = None
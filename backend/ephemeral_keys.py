@@ -0,0 +1,112 @@
+# backend/ephemeral_keys.py
+# In-memory, read-once store for freshly generated private keys awaiting pickup
+
+import os
+import time
+import heapq
+import secrets
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+# How long a key waits for the client before it is wiped, and how many may wait at once
+KEY_TTL_SECONDS = float(os.getenv("VAULTIS_KEY_TTL_SECONDS", 300))
+KEY_STORE_CAPACITY = int(os.getenv("VAULTIS_KEY_STORE_CAPACITY", 10000))
+
+
+def _zeroize(buffer: bytearray) -> None:
+    buffer[:] = bytes(len(buffer))
+
+
+class EphemeralKeyStore:
+    """
+    Private keys held only in memory until they are fetched once or expire
+
+    Lookups are a dict access; expiry uses a min-heap of (expires_at, key_id)
+    that is drained lazily on every call, so no background thread is needed.
+    Key material lives in bytearrays that are overwritten with zeros when the
+    key expires, is evicted or has been handed out.
+
+    Args:
+        ttl (float): Seconds a key stays retrievable
+        capacity (int): Maximum number of keys held; the key closest to expiry
+            is evicted to make room
+    """
+
+    def __init__(self, ttl: float = KEY_TTL_SECONDS, capacity: int = KEY_STORE_CAPACITY):
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self._keys: Dict[str, Tuple[float, bytearray]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _discard(self, key_id: str) -> None:
+        _, material = self._keys.pop(key_id)
+        _zeroize(material)
+
+    def _purge(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key_id = heapq.heappop(self._expiry)
+            entry = self._keys.get(key_id)
+            # Skip heap entries for keys that were already taken
+            if entry is not None and entry[0] == expires_at:
+                self._discard(key_id)
+                logger.debug("[🧹] Expired private key %s", key_id)
+
+    def _evict_oldest(self) -> None:
+        while self._expiry:
+            expires_at, key_id = heapq.heappop(self._expiry)
+            entry = self._keys.get(key_id)
+            if entry is not None and entry[0] == expires_at:
+                self._discard(key_id)
+                logger.warning("[⚠️] Key store full, evicted unclaimed private key %s", key_id)
+                return
+
+    def put(self, private_key: str) -> str:
+        """
+        Hold a private key for one-time retrieval
+
+        Returns:
+            str: The key ID to hand to the client
+        """
+        key_id = f"private_key_{secrets.token_hex(16)}"
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._purge(now)
+            if len(self._keys) >= self.capacity:
+                self._evict_oldest()
+            self._keys[key_id] = (expires_at, bytearray(private_key.encode('utf-8')))
+            heapq.heappush(self._expiry, (expires_at, key_id))
+        return key_id
+
+    def take(self, key_id: str) -> Optional[str]:
+        """
+        Return the key and forget it, or None if it is unknown, expired or already taken
+        """
+        with self._lock:
+            self._purge(time.monotonic())
+            entry = self._keys.pop(key_id, None)
+        metrics.record_cache_lookup("private_keys", entry is not None)
+        if entry is None:
+            return None
+        material = entry[1]
+        try:
+            return material.decode('utf-8')
+        finally:
+            _zeroize(material)
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            self._purge(time.monotonic())
+
+
+KEY_STORE = EphemeralKeyStore()
+metrics.EPHEMERAL_KEYS.set_function(lambda: len(KEY_STORE))
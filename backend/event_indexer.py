@@ -0,0 +1,235 @@
+# backend/event_indexer.py
+# Follow QuantumStorage contract logs over JSON-RPC into the local event index
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from backend import metrics
+from backend.abi import decode, decode_topic, event_topic, to_bytes
+from backend.rpc import JSONRPCClient, RPCError, get_rpc_client
+from storage.event_index import EventIndex, get_event_index
+
+logger = logging.getLogger(__name__)
+
+CONTRACT_ADDRESS = os.getenv("VAULTIS_CONTRACT_ADDRESS") or ""
+# Block the contract was deployed in; nothing before it needs scanning
+INDEXER_START_BLOCK = int(os.getenv("VAULTIS_INDEXER_START_BLOCK") or 0)
+# Blocks behind the head to stay; deeper reorgs are still rolled back via checkpoints
+INDEXER_CONFIRMATIONS = int(os.getenv("VAULTIS_INDEXER_CONFIRMATIONS") or 2)
+INDEXER_BATCH_BLOCKS = int(os.getenv("VAULTIS_INDEXER_BATCH_BLOCKS") or 2000)
+INDEXER_POLL_SECONDS = float(os.getenv("VAULTIS_INDEXER_POLL_SECONDS") or 5)
+
+# (name, [(argument, type, indexed), ...]) as declared in QuantumStorage.sol
+_EVENT_SPECS = (
+    ("FileStored", [("fileId", "uint256", True), ("uploader", "address", True), ("cid", "string", False), ("timestamp", "uint256", False)]),
+    ("AccessGranted", [("fileId", "uint256", True), ("grantee", "address", True)]),
+    ("AccessRevoked", [("fileId", "uint256", True), ("revokedUser", "address", True)]),
+    ("OwnershipTransferred", [("fileId", "uint256", True), ("oldOwner", "address", True), ("newOwner", "address", True)]),
+    ("FileUpdated", [("fileId", "uint256", True), ("newCID", "string", False)]),
+    ("FileDeleted", [("fileId", "uint256", True)]),
+)
+
+EVENTS = {
+    event_topic(f"{name}({','.join(t for _, t, _ in args)})"): (name, args)
+    for name, args in _EVENT_SPECS
+}
+
+
+def decode_log(log: dict) -> Optional[dict]:
+    """
+    Decode one eth_getLogs entry into the event dict stored by EventIndex
+
+    Returns:
+        dict: The event, or None for logs that are not a QuantumStorage file event
+    """
+    topics = log.get("topics") or []
+    if not topics or topics[0] not in EVENTS:
+        return None
+    name, spec = EVENTS[topics[0]]
+    indexed = [(arg, abi_type) for arg, abi_type, is_indexed in spec if is_indexed]
+    unindexed = [(arg, abi_type) for arg, abi_type, is_indexed in spec if not is_indexed]
+
+    args = {arg: decode_topic(abi_type, topic) for (arg, abi_type), topic in zip(indexed, topics[1:])}
+    if unindexed:
+        values = decode([abi_type for _, abi_type in unindexed], to_bytes(log["data"]))
+        args.update({arg: value for (arg, _), value in zip(unindexed, values)})
+
+    return {
+        "block_number": int(log["blockNumber"], 16),
+        "log_index": int(log["logIndex"], 16),
+        "block_hash": log["blockHash"],
+        "tx_hash": log["transactionHash"],
+        "event": name,
+        "file_id": args.pop("fileId"),
+        "args": args
+    }
+
+
+class ContractIndexer:
+    """
+    Incrementally index the contract's file events
+
+    Each sync first checks the newest stored checkpoint against the node.
+    If the hash changed, it walks back to the newest checkpoint the node
+    still agrees with and rolls the index back to it. It then fetches logs
+    in block ranges up to `confirmations` blocks behind the head, applying
+    each range in one transaction. Ranges shrink automatically when the
+    node refuses a large eth_getLogs query.
+
+    Args:
+        client (JSONRPCClient): Node connection
+        index (EventIndex): Local index to write to
+        address (str): QuantumStorage contract address
+        start_block (int): First block to scan
+        confirmations (int): Blocks to stay behind the head
+        batch_blocks (int): Blocks per eth_getLogs request
+    """
+
+    def __init__(
+        self,
+        client: JSONRPCClient,
+        index: EventIndex,
+        address: str,
+        start_block: int = INDEXER_START_BLOCK,
+        confirmations: int = INDEXER_CONFIRMATIONS,
+        batch_blocks: int = INDEXER_BATCH_BLOCKS
+    ):
+        self.client = client
+        self.index = index
+        self.address = address.lower()
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch_blocks = batch_blocks
+        self.head: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if index.contract() != self.address:
+            index.reset(self.address)
+
+    def _check_reorg(self) -> None:
+        checkpoints = self.index.checkpoints()
+        for position, (number, block_hash) in enumerate(checkpoints):
+            block = self.client.get_block(number)
+            if block is not None and block["hash"] == block_hash:
+                if position:
+                    removed = self.index.rollback(number)
+                    metrics.CHAIN_REORGS.inc()
+                    logger.warning("[⚠️] Chain reorg detected: rolled back to block %s (%s events removed)", number, removed)
+                return
+        if checkpoints:
+            # Reorg deeper than every checkpoint we keep (or the node was reset): start over
+            metrics.CHAIN_REORGS.inc()
+            logger.error("[❌] No stored checkpoint matches the chain, re-indexing from block %s", self.start_block)
+            self.index.reset(self.address)
+
+    def _fetch(self, from_block: int, to_block: int) -> List[dict]:
+        logs = self.client.get_logs(self.address, from_block, to_block, [list(EVENTS)])
+        events = [decode_log(log) for log in logs if not log.get("removed")]
+        return [event for event in events if event is not None]
+
+    def sync_once(self) -> int:
+        """
+        Index everything up to the confirmed head
+
+        Returns:
+            int: Number of blocks scanned
+        """
+        self.head = self.client.block_number()
+        target = self.head - self.confirmations
+        self._check_reorg()
+        last = self.index.last_block()
+        if last is None:
+            last = self.start_block - 1
+        scanned = 0
+        batch = self.batch_blocks
+        while last < target and not self._stop.is_set():
+            to_block = min(last + batch, target)
+            try:
+                events = self._fetch(last + 1, to_block)
+            except RPCError as e:
+                if batch == 1:
+                    raise
+                batch = max(1, batch // 2)
+                logger.debug("[🔍] eth_getLogs over %s blocks failed (%s), retrying with %s", to_block - last, e, batch)
+                continue
+
+            block = self.client.get_block(to_block)
+            checkpoints: Dict[int, str] = {event["block_number"]: event["block_hash"] for event in events}
+            if block is not None:
+                checkpoints[to_block] = block["hash"]
+            applied = self.index.apply_batch(events, to_block, checkpoints)
+            for event in events:
+                metrics.CHAIN_EVENTS.inc(event=event["event"])
+            scanned += to_block - last
+            last = to_block
+            if applied:
+                logger.info("[⛓️] Indexed %s contract events up to block %s", applied, to_block)
+        return scanned
+
+    def lag(self) -> Optional[int]:
+        last = self.index.last_block()
+        if self.head is None or last is None:
+            return None
+        return max(0, self.head - last)
+
+    def run(self, poll_seconds: float = INDEXER_POLL_SECONDS) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except RPCError as e:
+                logger.warning("[⚠️] Contract indexer could not reach the node: %s", e)
+            except Exception as e:
+                logger.exception("[❌] Contract indexer error: %s", e)
+            self._stop.wait(poll_seconds)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="contract-indexer", daemon=True)
+            self._thread.start()
+            logger.info("[⛓️] Contract indexer following %s via %s", self.address, self.client.url)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_indexer: Optional[ContractIndexer] = None
+_indexer_lock = threading.Lock()
+
+
+def get_indexer() -> Optional[ContractIndexer]:
+    """Process-wide ContractIndexer, None when VAULTIS_CONTRACT_ADDRESS is not set"""
+    global _indexer
+    if _indexer is None and CONTRACT_ADDRESS:
+        with _indexer_lock:
+            if _indexer is None:
+                _indexer = ContractIndexer(get_rpc_client(), get_event_index(), CONTRACT_ADDRESS)
+                metrics.CHAIN_INDEXED_BLOCK.set_function(lambda: _indexer.index.last_block() or 0)
+    return _indexer
+
+
+if __name__ == "__main__":
+    # Usage: python backend/event_indexer.py [--once]
+    parser = argparse.ArgumentParser(description="QuantumStorage contract event indexer")
+    parser.add_argument("--once", action="store_true", help="Catch up to the head and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    indexer = get_indexer()
+    if indexer is None:
+        print("Set VAULTIS_CONTRACT_ADDRESS (and VAULTIS_RPC_URL) first")
+        sys.exit(1)
+    if args.once:
+        started = time.perf_counter()
+        scanned = indexer.sync_once()
+        print(f"Scanned {scanned} blocks in {time.perf_counter() - started:.1f}s, {indexer.index.count_files()} live files indexed")
+    else:
+        indexer.run()
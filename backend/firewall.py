@@ -0,0 +1,103 @@
+# backend/firewall.py
+# In-memory CID origin index and address whitelist for the stateful transaction firewall
+
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from backend import metrics
+from storage.event_index import get_event_index
+from storage.metadata_index import get_metadata_index
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(address: str) -> str:
+    return address.strip().lower()
+
+
+class CIDFirewall:
+    """
+    Decide whether a CID was uploaded by a whitelisted address without touching the chain
+
+    The CID -> uploader map is loaded once from the upload metadata index and
+    the contract event index, then kept current by record_upload() and by
+    falling back to the two indexes for CIDs it has not seen yet (found
+    origins are cached, unknown CIDs are not, so newly indexed events are
+    picked up). On-chain FileStored uploaders always win over the wallet
+    address self-reported at upload time. Whitelist membership is a set
+    lookup on lower-cased addresses.
+    """
+
+    def __init__(self):
+        self._origins: Dict[str, Tuple[str, bool]] = {}
+        self._whitelist: frozenset = frozenset()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # 📥 Origins
+
+    def load(self) -> int:
+        """Fill the origin map from both indexes; returns the number of CIDs known"""
+        uploads = get_metadata_index().owners()
+        stored = get_event_index().uploaders()
+        with self._lock:
+            for cid, owner in uploads:
+                self._origins.setdefault(cid, (_normalize(owner), False))
+            for cid, uploader in stored:
+                self._origins[cid] = (_normalize(uploader), True)
+            self._loaded = True
+            known = len(self._origins)
+        logger.info("[🔒] Firewall origin index loaded with %s CIDs", known)
+        return known
+
+    def record_upload(self, cid: str, uploader: str, on_chain: bool = False) -> None:
+        """Remember who uploaded `cid`; an on-chain record replaces a self-reported one"""
+        with self._lock:
+            current = self._origins.get(cid)
+            if on_chain or current is None or not current[1]:
+                self._origins[cid] = (_normalize(uploader), on_chain)
+
+    def origin(self, cid: str) -> Optional[str]:
+        """Uploader of `cid`, None if neither index knows it"""
+        if not self._loaded:
+            self.load()
+        found = self._origins.get(cid)
+        hit = found is not None and found[1]
+        metrics.record_cache_lookup("cid_origin", hit)
+        if hit:
+            return found[0]
+
+        # Not on chain as far as this map knows: the event index may have caught up since
+        record = get_event_index().uploader_of(cid)
+        if record is not None:
+            self.record_upload(cid, record, on_chain=True)
+            return _normalize(record)
+        return found[0] if found else None
+
+    # 📋 Whitelist
+
+    def set_whitelist(self, addresses: Iterable[str]) -> None:
+        self._whitelist = frozenset(_normalize(address) for address in addresses if address)
+
+    def is_whitelisted(self, address: str) -> bool:
+        return _normalize(address) in self._whitelist
+
+    def allows(self, cid: str) -> bool:
+        """True if `cid` was uploaded by a whitelisted address (unknown CIDs are rejected)"""
+        uploader = self.origin(cid)
+        return uploader is not None and uploader in self._whitelist
+
+
+_firewall: Optional[CIDFirewall] = None
+_firewall_lock = threading.Lock()
+
+
+def get_firewall() -> CIDFirewall:
+    """Process-wide CIDFirewall, loaded on first use"""
+    global _firewall
+    if _firewall is None:
+        with _firewall_lock:
+            if _firewall is None:
+                _firewall = CIDFirewall()
+    return _firewall
@@ -0,0 +1,286 @@
+# backend/key_rotation.py
+# Rotate file keys by re-wrapping container headers; payloads on IPFS are never re-encrypted
+
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from backend import metrics
+from backend.download_stream import fetch_container_header
+from crypto.pqc import kyber
+from crypto.streaming import rewrap_header
+from storage.key_store import KeyStore, get_key_store
+from storage.metadata_index import MetadataIndex, get_metadata_index
+from storage.rotation_jobs import RotationJobStore, get_rotation_jobs
+
+logger = logging.getLogger(__name__)
+
+# Files rotated at once; each one is a small ranged gateway read plus a Kyber key pair
+ROTATION_WORKERS = int(os.getenv("VAULTIS_ROTATION_WORKERS") or 16)
+# Files per checkpoint; a crash repeats at most one batch
+ROTATION_BATCH_SIZE = int(os.getenv("VAULTIS_ROTATION_BATCH_SIZE") or 500)
+
+# Re-wraps tried when recipients are added to the same file concurrently
+_ATTEMPTS = 3
+
+# (outcome, header bytes fetched, error); outcome is rotated, skipped, skipped_protected or failed
+Outcome = Tuple[str, int, Optional[str]]
+
+
+class KeyRotator:
+    """
+    Give every file a new Kyber key pair without touching its payload
+
+    Each container's random data key is wrapped for the file's Kyber key in
+    the header, so rotation only needs the header: it is read with a ranged
+    gateway request (a few kilobytes, whatever the file size), the data key
+    is unwrapped with the current private key and wrapped again for a fresh
+    key pair, and the new private key and re-wrapped header replace the old
+    key in the KeyStore in one transaction. Downloads pick the detached
+    header up from there.
+
+    Rotation does not revoke previously issued keys. The container pinned
+    on IPFS is immutable and still carries the header wrapped for the old
+    key, and the decryptor falls back to that inline header, so anyone
+    holding an old private key can still decrypt the file. Rotation limits
+    what a key issued from now on exposes; it is not a revocation.
+
+    Files are processed in CID order on a thread pool, one batch at a time;
+    the job's cursor and totals are checkpointed after every batch, so a
+    paused or interrupted job resumes from the last finished batch. Files
+    rotated by this job before a crash are recognised and not rotated twice.
+    Only keys the server holds in plain form can be rotated; password
+    protected keys are counted as skipped_protected, and files without a
+    stored key and legacy single-shot uploads as skipped.
+
+    Args:
+        jobs (RotationJobStore): Durable job progress
+        keys (KeyStore): Private keys and detached headers
+        uploads (MetadataIndex): Source of the CIDs to rotate
+        workers (int): Files rotated in parallel
+        batch_size (int): Files per checkpoint
+    """
+
+    def __init__(
+        self,
+        jobs: RotationJobStore,
+        keys: KeyStore,
+        uploads: MetadataIndex,
+        workers: int = ROTATION_WORKERS,
+        batch_size: int = ROTATION_BATCH_SIZE
+    ):
+        self.jobs = jobs
+        self.keys = keys
+        self.uploads = uploads
+        self.batch_size = max(1, batch_size)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="key-rotation")
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._active: Optional[str] = None
+        self._pause = threading.Event()
+
+    # 🔑 One file
+
+    def rotate_one(self, cid: str, since: float = 0.0) -> Outcome:
+        """
+        Re-wrap the detached header of `cid` for a new key pair
+
+        The old key keeps opening the inline header of the pinned container,
+        so it is replaced for future use but not revoked.
+
+        Args:
+            cid (str): File to rotate
+            since (float): Treat files rotated at or after this time as already done
+        """
+        stored = self.keys.get(cid)
+        if stored is None:
+            return "skipped", 0, None
+        if stored[1]:
+            # The server cannot unwrap a password-protected key without its owner
+            return "skipped_protected", 0, None
+        key_data = stored[0]
+        rotated_at = self.keys.rotated_at(cid)
+        if rotated_at is not None and rotated_at >= int(since):
+            return "rotated", 0, None
+
+        fetched = 0
+        pinned = None
+        for _ in range(_ATTEMPTS):
+            previous = self.keys.get_header(cid)
+            if previous is None and pinned is None:
+                pinned, fetched = fetch_container_header(cid)
+                if pinned is None:
+                    # Legacy single-shot uploads have no wrapped data key to rotate
+                    return "skipped", fetched, None
+
+            public_key, private_key = kyber.generate_keys()
+            if not public_key:
+                raise RuntimeError("Kyber key generation failed")
+            # Only this file's own entry is re-wrapped; recipients it was shared with keep theirs
+            rewrapped = rewrap_header(previous or pinned, key_data.decode('utf-8'), [public_key])
+            if self.keys.rotate(cid, key_data, private_key.encode('utf-8'), rewrapped, previous):
+                return "rotated", fetched, None
+            stored = self.keys.get(cid)
+            if stored is None or stored[0] != key_data:
+                return "failed", fetched, "Key was replaced during rotation"
+            # A recipient was added meanwhile: re-wrap the new header
+        return "failed", fetched, "Header kept changing during rotation"
+
+    def _rotate_safely(self, cid: str, since: float) -> Outcome:
+        try:
+            return self.rotate_one(cid, since)
+        except Exception as e:
+            logger.warning("[⚠️] Key rotation failed for CID %s: %s", cid, e)
+            return "failed", 0, str(e)
+
+    # 🔄 Jobs
+
+    def _run(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        cursor, since = job["cursor"], job["created_at"]
+        try:
+            while True:
+                with self._lock:
+                    # Checked under the lock so resume() either sees this job active or launches it anew
+                    if self._pause.is_set():
+                        self._release_thread()
+                        return
+                cids = self.uploads.cids_after(cursor, self.batch_size)
+                if not cids:
+                    self.jobs.set_status(job_id, "completed", time.time(), expected="running")
+                    logger.info("[🔄] Key rotation %s completed", job_id)
+                    return
+                counts = {"rotated": 0, "skipped": 0, "skipped_protected": 0, "failed": 0, "bytes_fetched": 0}
+                failures = []
+                outcomes = self._pool.map(lambda cid: self._rotate_safely(cid, since), cids)
+                for cid, (outcome, fetched, error) in zip(cids, outcomes):
+                    counts[outcome] += 1
+                    counts["bytes_fetched"] += fetched
+                    if error:
+                        failures.append((cid, error))
+                    metrics.KEY_ROTATIONS.inc(outcome=outcome)
+                metrics.KEY_ROTATION_HEADER_BYTES.inc(counts["bytes_fetched"])
+                cursor = cids[-1]
+                self.jobs.advance(job_id, cursor, counts, failures, time.time())
+                logger.debug("[🔄] Key rotation %s reached %s", job_id, cursor)
+        except Exception as e:
+            logger.exception("[❌] Key rotation %s stopped: %s", job_id, e)
+            self.jobs.set_status(job_id, "failed", time.time(), error=str(e))
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._release_thread()
+
+    def _release_thread(self) -> None:
+        # Caller holds self._lock
+        self._thread = None
+        self._active = None
+
+    def _launch(self, job_id: str) -> None:
+        # Caller holds self._lock
+        self._pause.clear()
+        self._active = job_id
+        self._thread = threading.Thread(target=self._run, args=(job_id,), name="key-rotation", daemon=True)
+        self._thread.start()
+
+    def start_job(self, requested_by: Optional[str] = None) -> Tuple[dict, bool]:
+        """
+        Start rotating every file key, or continue the unfinished job
+
+        Returns:
+            tuple: (job, started); started is False when an existing job was continued
+        """
+        with self._lock:
+            if self._active is not None:
+                return self.jobs.get(self._active), False
+            unfinished = self.jobs.with_status("running") + self.jobs.with_status("paused")
+            if unfinished:
+                job = unfinished[0]
+                self.jobs.set_status(job["id"], "running", time.time())
+                self._launch(job["id"])
+                logger.info("[🔄] Key rotation %s continued from %s", job["id"], job["cursor"])
+                return self.jobs.get(job["id"]), False
+            job = self.jobs.create(uuid.uuid4().hex, self.uploads.count(), time.time(), requested_by)
+            self._launch(job["id"])
+        logger.info("[🔄] Key rotation %s started for %s files", job["id"], job["total"])
+        return job, True
+
+    def pause(self, job_id: str) -> bool:
+        """
+        Stop a running job after its current batch
+
+        Returns:
+            bool: False if the job is not running
+        """
+        with self._lock:
+            if not self.jobs.set_status(job_id, "paused", time.time(), expected="running"):
+                return False
+            if self._active == job_id:
+                self._pause.set()
+        logger.info("[⏸️] Key rotation %s paused", job_id)
+        return True
+
+    def resume(self, job_id: str) -> bool:
+        """
+        Continue a paused or interrupted job from its last checkpoint
+
+        Returns:
+            bool: False if the job is finished, unknown, or another job is running
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in ("running", "paused") or self._active not in (None, job_id):
+                return False
+            if self._active == job_id:
+                # Still finishing the batch it was paused in: just cancel the pause
+                self.jobs.set_status(job_id, "running", time.time())
+                self._pause.clear()
+                return True
+            self.jobs.set_status(job_id, "running", time.time())
+            self._launch(job_id)
+        logger.info("[🔄] Key rotation %s resumed from %s", job_id, job["cursor"])
+        return True
+
+    def resume_interrupted(self) -> Optional[str]:
+        """Restart the job that was running when the process stopped; returns its id"""
+        running = self.jobs.with_status("running")
+        if running and self.resume(running[0]["id"]):
+            return running[0]["id"]
+        return None
+
+    # 📊 Progress
+
+    def progress(self, job: dict) -> dict:
+        """Job record with completion, throughput and ETA"""
+        done = job["rotated"] + job["skipped"] + job["skipped_protected"] + job["failed"]
+        total = max(job["total"], done)
+        elapsed = (job["finished_at"] or job["updated_at"]) - job["created_at"]
+        rate = done / elapsed if elapsed > 0 else None
+        report = dict(job)
+        report.update({
+            "processed": done,
+            "percent": round(100.0 * done / total, 2) if total else 100.0,
+            "files_per_second": round(rate, 2) if rate else None,
+            "eta_seconds": round((total - done) / rate) if rate and job["status"] == "running" else None,
+            "header_bytes_per_file": round(job["bytes_fetched"] / done) if done else None,
+            "active": self._active == job["id"]
+        })
+        return report
+
+
+_rotator: Optional[KeyRotator] = None
+_rotator_lock = threading.Lock()
+
+
+def get_key_rotator() -> KeyRotator:
+    """Process-wide KeyRotator, created on first use"""
+    global _rotator
+    if _rotator is None:
+        with _rotator_lock:
+            if _rotator is None:
+                _rotator = KeyRotator(get_rotation_jobs(), get_key_store(), get_metadata_index())
+    return _rotator
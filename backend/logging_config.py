@@ -0,0 +1,160 @@
+# backend/logging_config.py
+# Queue-backed structured logging for the Vaultis backend
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+from typing import Dict, Optional
+
+# Defaults can be overridden from the .env file
+LOG_LEVEL = os.getenv("VAULTIS_LOG_LEVEL", "INFO")
+# Comma separated "logger=LEVEL" pairs, e.g. "crypto=WARNING,backend.app=DEBUG"
+LOG_MODULE_LEVELS = os.getenv("VAULTIS_LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("VAULTIS_LOG_FORMAT", "text")  # text, json
+LOG_ENABLED = os.getenv("VAULTIS_LOG_ENABLED", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("VAULTIS_LOG_QUEUE_SIZE", 10000))
+
+# Attributes every LogRecord carries; anything else was passed through `extra=`
+_RESERVED_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Render log records as a single line, either as ``key=value`` text or JSON.
+    Fields passed through ``extra={...}`` are appended as structured fields.
+    """
+
+    def __init__(self, fmt: str = "text"):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            key: value for key, value in record.__dict__.items()
+            if key not in _RESERVED_ATTRS and not key.startswith("_")
+        }
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+        timestamp = f"{timestamp}.{int(record.msecs):03d}"
+
+        if self.fmt == "json":
+            payload = {
+                "ts": timestamp,
+                "level": record.levelname,
+                "logger": record.name,
+                "msg": record.getMessage(),
+                **fields
+            }
+            if record.exc_info:
+                payload["exc"] = self.formatException(record.exc_info)
+            return json.dumps(payload, default=str)
+
+        line = f"{timestamp} {record.levelname:<7} {record.name} {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the request thread: when the queue is full
+    the record is dropped instead of waiting for the writer to catch up.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """
+    Parse a "logger=LEVEL,logger=LEVEL" string into a {logger: level} dict
+    """
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        name, level = name.strip(), level.strip().upper()
+        if name and level in logging._nameToLevel:
+            levels[name] = logging._nameToLevel[level]
+    return levels
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    module_levels: Optional[Dict[str, str]] = None,
+    fmt: Optional[str] = None,
+    enabled: Optional[bool] = None
+) -> Optional[logging.handlers.QueueListener]:
+    """
+    Route all logging through a bounded queue drained by a background thread
+
+    Request threads only pay for a level check and a queue put; formatting and
+    the stdout write happen on the listener thread.
+
+    Args:
+        level: Root log level (defaults to VAULTIS_LOG_LEVEL)
+        module_levels: Per-logger level overrides (defaults to VAULTIS_LOG_LEVELS)
+        fmt: "text" or "json" (defaults to VAULTIS_LOG_FORMAT)
+        enabled: Set False to silence logging entirely, e.g. for benchmarks
+
+    Returns:
+        QueueListener: The running listener, or None when logging is disabled
+    """
+    global _listener
+
+    shutdown_logging()
+
+    enabled = LOG_ENABLED if enabled is None else enabled
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if not enabled:
+        logging.disable(logging.CRITICAL)
+        return None
+    logging.disable(logging.NOTSET)
+
+    root.setLevel((level or LOG_LEVEL).upper())
+
+    overrides = parse_module_levels(LOG_MODULE_LEVELS)
+    for name, module_level in (module_levels or {}).items():
+        overrides[name] = logging._nameToLevel.get(module_level.upper(), logging.INFO)
+    for name, module_level in overrides.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(StructuredFormatter(fmt or LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root.addHandler(_NonBlockingQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """
+    Flush pending records and stop the background listener
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,229 @@
+# backend/mailer.py
+# Background outbound email queue with persistent, reused SMTP sessions
+
+import os
+import time
+import uuid
+import heapq
+import queue
+import smtplib
+import logging
+import threading
+from collections import OrderedDict
+from email.message import Message
+from typing import Callable, List, Optional
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+MAIL_QUEUE_SIZE = int(os.getenv("VAULTIS_MAIL_QUEUE_SIZE", 10000))
+# Messages taken off the queue per wake-up and sent over one session
+MAIL_BATCH_SIZE = int(os.getenv("VAULTIS_MAIL_BATCH_SIZE", 50))
+# Many providers cap messages per session, so reconnect after this many
+MAIL_MAX_PER_CONNECTION = int(os.getenv("VAULTIS_MAIL_MAX_PER_CONNECTION", 100))
+MAIL_MAX_ATTEMPTS = int(os.getenv("VAULTIS_MAIL_MAX_ATTEMPTS", 5))
+MAIL_RETRY_BACKOFF_SECONDS = float(os.getenv("VAULTIS_MAIL_RETRY_BACKOFF_SECONDS", 2))
+# Close an idle session after this long instead of holding it open forever
+SMTP_IDLE_TIMEOUT = float(os.getenv("VAULTIS_SMTP_IDLE_TIMEOUT", 60))
+SMTP_TIMEOUT = 30
+
+# Status of this many recent messages is kept for /api/email-status
+_STATUS_HISTORY = 10000
+
+
+class MailJob:
+    __slots__ = ("message_id", "message", "recipient", "attempts")
+
+    def __init__(self, message_id: str, message: Message, recipient: str):
+        self.message_id = message_id
+        self.message = message
+        self.recipient = recipient
+        self.attempts = 0
+
+
+class MailQueue:
+    """
+    Queue emails and deliver them from one background thread
+
+    The worker keeps a single SMTP session open (STARTTLS and login happen
+    once per session, not once per message), sends whatever has queued up
+    as a batch over it, and closes it after SMTP_IDLE_TIMEOUT of silence.
+    Transient failures (dropped connections, 4xx replies) are retried with
+    exponential backoff; permanent ones (5xx, refused recipients) fail fast.
+
+    Args:
+        settings_provider (Callable): Returns the dict from get_email_settings()
+    """
+
+    def __init__(self, settings_provider: Callable[[], dict]):
+        self._settings_provider = settings_provider
+        self._queue: queue.Queue = queue.Queue(maxsize=MAIL_QUEUE_SIZE)
+        self._retries: List = []
+        self._retry_seq = 0
+        self._status: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._sent_on_connection = 0
+        self._last_activity = 0.0
+
+    def __len__(self) -> int:
+        return self._queue.qsize() + len(self._retries)
+
+    def _set_status(self, message_id: str, **fields) -> None:
+        with self._lock:
+            status = self._status.setdefault(message_id, {"message_id": message_id})
+            status.update(fields, updated_at=time.time())
+            self._status.move_to_end(message_id)
+            while len(self._status) > _STATUS_HISTORY:
+                self._status.popitem(last=False)
+
+    def status(self, message_id: str) -> Optional[dict]:
+        with self._lock:
+            status = self._status.get(message_id)
+            return dict(status) if status else None
+
+    def submit(self, message: Message, recipient: str) -> str:
+        """
+        Queue a message for delivery and return its ID immediately
+
+        Raises:
+            queue.Full: If MAIL_QUEUE_SIZE messages are already waiting
+        """
+        message_id = uuid.uuid4().hex
+        self._queue.put_nowait(MailJob(message_id, message, recipient))
+        self._set_status(message_id, status="queued", recipient=recipient, attempts=0)
+        self._ensure_worker()
+        return message_id
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+                    self._thread.start()
+
+    # 🔌 SMTP session handling
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None and self._sent_on_connection >= MAIL_MAX_PER_CONNECTION:
+            self._close()
+        if self._smtp is None:
+            settings = self._settings_provider()
+            smtp = smtplib.SMTP(settings["smtp_server"], settings["smtp_port"], timeout=SMTP_TIMEOUT)
+            try:
+                smtp.starttls()
+                smtp.login(settings["smtp_username"], settings["smtp_password"])
+            except Exception:
+                smtp.close()
+                raise
+            metrics.SMTP_CONNECTIONS.inc()
+            logger.debug("[📧] Opened SMTP session to %s:%s", settings["smtp_server"], settings["smtp_port"])
+            self._smtp = smtp
+            self._sent_on_connection = 0
+        return self._smtp
+
+    def _close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+        logger.debug("[📧] Closed SMTP session")
+
+    # 📬 Delivery
+
+    def _retry_later(self, job: MailJob, error: Exception) -> None:
+        if job.attempts >= MAIL_MAX_ATTEMPTS:
+            self._fail(job, error)
+            return
+        delay = MAIL_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        self._retry_seq += 1
+        heapq.heappush(self._retries, (time.monotonic() + delay, self._retry_seq, job))
+        metrics.EMAILS.inc(outcome="retry")
+        self._set_status(job.message_id, status="retrying", attempts=job.attempts, error=str(error))
+        logger.warning("[⚠️] Email %s to %s failed (attempt %s), retrying in %.0fs: %s", job.message_id, job.recipient, job.attempts, delay, error)
+
+    def _fail(self, job: MailJob, error: Exception) -> None:
+        metrics.EMAILS.inc(outcome="failed")
+        self._set_status(job.message_id, status="failed", attempts=job.attempts, error=str(error))
+        logger.error("[❌] Email %s to %s failed permanently: %s", job.message_id, job.recipient, error)
+
+    def _send(self, job: MailJob) -> None:
+        job.attempts += 1
+        try:
+            self._connection().send_message(job.message)
+        except smtplib.SMTPRecipientsRefused as e:
+            self._fail(job, e)
+            return
+        except smtplib.SMTPResponseException as e:
+            if 400 <= e.smtp_code < 500:
+                self._close()
+                self._retry_later(job, e)
+            else:
+                self._fail(job, e)
+            return
+        except (smtplib.SMTPException, OSError) as e:
+            # Dropped or broken session: reconnect on the next attempt
+            self._close()
+            self._retry_later(job, e)
+            return
+        self._sent_on_connection += 1
+        metrics.EMAILS.inc(outcome="sent")
+        self._set_status(job.message_id, status="sent", attempts=job.attempts, error=None)
+        logger.info("[✅] Email sent successfully to %s", job.recipient, extra={"message_id": job.message_id})
+
+    def _next_batch(self) -> List[MailJob]:
+        now = time.monotonic()
+        batch = []
+        while self._retries and self._retries[0][0] <= now and len(batch) < MAIL_BATCH_SIZE:
+            batch.append(heapq.heappop(self._retries)[2])
+
+        if not batch:
+            # Sleep until a message arrives, a retry is due or the session goes idle
+            wait = SMTP_IDLE_TIMEOUT
+            if self._retries:
+                wait = min(wait, max(0.0, self._retries[0][0] - now))
+            try:
+                batch.append(self._queue.get(timeout=wait))
+            except queue.Empty:
+                return batch
+
+        while len(batch) < MAIL_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = self._next_batch()
+                if batch:
+                    for job in batch:
+                        self._send(job)
+                    self._last_activity = time.monotonic()
+                elif self._smtp is not None and time.monotonic() - self._last_activity >= SMTP_IDLE_TIMEOUT:
+                    self._close()
+            except Exception as e:
+                logger.exception("[❌] Mail queue worker error: %s", e)
+                time.sleep(1)
+
+
+_mail_queue: Optional[MailQueue] = None
+_mail_queue_lock = threading.Lock()
+
+
+def get_mail_queue(settings_provider: Callable[[], dict]) -> MailQueue:
+    """Process-wide MailQueue, created on first use"""
+    global _mail_queue
+    if _mail_queue is None:
+        with _mail_queue_lock:
+            if _mail_queue is None:
+                _mail_queue = MailQueue(settings_provider)
+                metrics.EMAIL_QUEUE_DEPTH.set_function(lambda: len(_mail_queue))
+    return _mail_queue
@@ -0,0 +1,353 @@
+# backend/metrics.py
+# Minimal Prometheus text-format metrics for the Vaultis backend (no external dependencies)
+
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Default latency buckets in seconds, from sub-millisecond routes up to slow gateway fetches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Base class holding one child value per label combination
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. bytes encrypted or gateway failures"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down. A gauge may instead be backed by a callback
+    that is evaluated at scrape time, so nothing is computed on the request path.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callback: Optional[Callable[[], Dict[Tuple, float]]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], object]) -> None:
+        """
+        Evaluate `callback` on every scrape. It returns a number for unlabelled
+        gauges or a {label_values_tuple: number} dict for labelled ones.
+        """
+        self._callback = callback
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                result = self._callback()
+            except Exception:
+                return []
+            items = list(result.items()) if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution of observations (latencies, sizes)
+
+    Each observation is a bisect plus two additions under a per-metric lock,
+    which keeps the cost to a few microseconds on the request path.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager observing the wall-clock duration of its block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together by the /metrics endpoint
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Content type expected by Prometheus scrapers
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# 🌐 HTTP
+REQUEST_LATENCY = REGISTRY.histogram(
+    "vaultis_http_request_duration_seconds",
+    "HTTP request latency by route, method and status",
+    ("route", "method", "status")
+)
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "vaultis_request_stage_duration_seconds",
+    "Duration of individual pipeline stages (save, encrypt, upload, fetch, decrypt, ...) by route",
+    ("route", "stage")
+)
+
+# 🔐 Crypto pipeline (use rate() over these counters for bytes per second)
+BYTES_ENCRYPTED = REGISTRY.counter("vaultis_bytes_encrypted_total", "Plaintext bytes encrypted")
+BYTES_DECRYPTED = REGISTRY.counter("vaultis_bytes_decrypted_total", "Plaintext bytes produced by decryption")
+
+# 📦 IPFS
+PINATA_UPLOAD_LATENCY = REGISTRY.histogram(
+    "vaultis_pinata_upload_duration_seconds",
+    "Latency of Pinata pinFileToIPFS uploads",
+    ("outcome",)
+)
+GATEWAY_LATENCY = REGISTRY.histogram(
+    "vaultis_gateway_download_duration_seconds",
+    "Latency of IPFS gateway downloads by gateway host",
+    ("gateway",)
+)
+GATEWAY_FAILURES = REGISTRY.counter(
+    "vaultis_gateway_download_failures_total",
+    "Failed IPFS gateway downloads by gateway host",
+    ("gateway",)
+)
+AVAILABILITY_PROBES = REGISTRY.counter(
+    "vaultis_availability_probes_total",
+    "CID availability probes by gateway host and outcome (available/unavailable/error)",
+    ("gateway", "outcome")
+)
+AVAILABILITY_PROBE_LATENCY = REGISTRY.histogram(
+    "vaultis_availability_probe_duration_seconds",
+    "Latency of CID availability probes (HEAD or one-byte range GET) by gateway host",
+    ("gateway",)
+)
+
+# 🚦 Admission control
+ADMISSION_IN_FLIGHT = REGISTRY.gauge("vaultis_admission_in_flight", "Requests currently holding a slot, by pool", ("pool",))
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge("vaultis_admission_queue_depth", "Requests waiting for a slot, by pool", ("pool",))
+ADMISSION_WAIT = REGISTRY.histogram(
+    "vaultis_admission_wait_seconds",
+    "Time admitted requests spent waiting for a slot, by pool",
+    ("pool",)
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "vaultis_admission_rejections_total",
+    "Requests turned away with 503, by pool and reason (queue_full/timeout)",
+    ("pool", "reason")
+)
+
+# 📧 Outbound email
+EMAILS = REGISTRY.counter("vaultis_emails_total", "Email delivery attempts by outcome (sent/retry/failed)", ("outcome",))
+EMAIL_QUEUE_DEPTH = REGISTRY.gauge("vaultis_email_queue_depth", "Emails waiting for delivery or retry")
+SMTP_CONNECTIONS = REGISTRY.counter("vaultis_smtp_connections_total", "SMTP sessions opened (STARTTLS + login)")
+
+# ⛓️ Contract event index
+CHAIN_INDEXED_BLOCK = REGISTRY.gauge("vaultis_chain_indexed_block", "Highest block whose contract events are indexed")
+CHAIN_EVENTS = REGISTRY.counter("vaultis_chain_events_indexed_total", "Contract events indexed, by event name", ("event",))
+CHAIN_REORGS = REGISTRY.counter("vaultis_chain_reorgs_total", "Chain reorganisations rolled back by the indexer")
+
+# 🔌 Ethereum node
+RPC_ROUND_TRIPS = REGISTRY.counter("vaultis_rpc_round_trips_total", "HTTP requests to the Ethereum node, by kind (single/batch)", ("kind",))
+CONTRACT_READS = REGISTRY.counter("vaultis_contract_reads_total", "Contract view calls requested, by source (cache/node)", ("source",))
+
+# ⏳ Timelock
+TIMELOCK_PENDING = REGISTRY.gauge("vaultis_timelock_pending_operations", "Time-locked operations waiting for release")
+TIMELOCK_OPERATIONS = REGISTRY.counter("vaultis_timelock_operations_total", "Time-locked operations finished, by outcome (released/failed/cancelled)", ("outcome",))
+
+# 🧾 Transaction history index
+HISTORY_INDEXED_BLOCK = REGISTRY.gauge("vaultis_history_indexed_block", "Newest block whose transactions are indexed")
+HISTORY_FIRST_BLOCK = REGISTRY.gauge("vaultis_history_first_block", "Oldest block whose transactions are indexed")
+HISTORY_TRANSACTIONS = REGISTRY.counter("vaultis_history_transactions_indexed_total", "Transactions written to the history index")
+HISTORY_REORGS = REGISTRY.counter("vaultis_history_reorgs_total", "Chain reorganisations rolled back by the history indexer")
+
+# 🔑 Keys
+EPHEMERAL_KEYS = REGISTRY.gauge("vaultis_ephemeral_private_keys", "Private keys held in memory awaiting one-time retrieval")
+KEY_ROTATIONS = REGISTRY.counter("vaultis_key_rotations_total", "Files processed by key rotation jobs, by outcome (rotated/skipped/skipped_protected/failed)", ("outcome",))
+KEY_ROTATION_HEADER_BYTES = REGISTRY.counter("vaultis_key_rotation_header_bytes_total", "Container header bytes read from gateways by key rotation")
+
+# ♻️ Deduplicated uploads
+DEDUP_CHUNKS = REGISTRY.counter("vaultis_dedup_chunks_total", "Chunks written by deduplicated uploads, by outcome (new/reused)", ("outcome",))
+DEDUP_BYTES_SAVED = REGISTRY.counter("vaultis_dedup_bytes_saved_total", "Plaintext bytes of deduplicated uploads that did not have to be pinned again")
+
+# 🗜️ Compression before encryption
+COMPRESSED_UPLOADS = REGISTRY.counter("vaultis_compressed_uploads_total", "Uploads by compression codec applied before encryption (none when skipped)", ("codec",))
+COMPRESSION_BYTES_SAVED = REGISTRY.counter("vaultis_compression_bytes_saved_total", "Plaintext bytes removed by compression before encryption")
+
+# 🗂️ Temp directory and caches
+TEMP_DIR_BYTES = REGISTRY.gauge("vaultis_temp_dir_bytes", "Total size of files in the temp directory")
+CACHE_REQUESTS = REGISTRY.counter(
+    "vaultis_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ("cache", "result")
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "vaultis_cache_hit_ratio",
+    "Hit ratio per cache since process start",
+    ("cache",)
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count one cache lookup; the hit ratio gauge is derived from these counts"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _cache_hit_ratios() -> Dict[Tuple, float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), count in list(CACHE_REQUESTS._values.items()):
+        entry = totals.setdefault(cache, [0, 0])
+        entry[0 if result == "hit" else 1] += count
+    return {(cache,): hits / (hits + misses) for cache, (hits, misses) in totals.items() if hits + misses}
+
+
+def directory_size(path: str) -> int:
+    """Sum the size of regular files directly inside `path`"""
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+    except FileNotFoundError:
+        pass
+    return total
+
+
+def watch_temp_dir(path: str) -> None:
+    """Report the size of `path` at scrape time"""
+    TEMP_DIR_BYTES.set_function(lambda: directory_size(path))
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
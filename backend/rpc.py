@@ -0,0 +1,159 @@
+# backend/rpc.py
+# JSON-RPC client for the Ethereum node behind the QuantumStorage contract
+
+import os
+import logging
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+# A local Hardhat node (`npx hardhat node`) listens on 8545
+RPC_URL = os.getenv("VAULTIS_RPC_URL") or "http://127.0.0.1:8545"
+RPC_TIMEOUT = float(os.getenv("VAULTIS_RPC_TIMEOUT_SECONDS") or 30)
+RPC_POOL_SIZE = int(os.getenv("VAULTIS_RPC_POOL_SIZE") or 16)
+# Requests per JSON-RPC array; public providers commonly cap batches at 100-1000
+RPC_MAX_BATCH = int(os.getenv("VAULTIS_RPC_MAX_BATCH") or 500)
+
+
+class RPCError(Exception):
+    """
+    Error reported by the node (or a malformed reply)
+
+    Args:
+        message (str): Error message
+        code (int): JSON-RPC error code, None for transport-level problems
+    """
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class JSONRPCClient:
+    """
+    JSON-RPC over HTTP with keep-alive connections shared by all threads
+
+    Args:
+        url (str): Node endpoint
+        timeout (float): Per-request timeout in seconds
+    """
+
+    def __init__(self, url: str = RPC_URL, timeout: float = RPC_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_SIZE)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._ids = 0
+        self._ids_lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._ids_lock:
+            self._ids += 1
+            return self._ids
+
+    def _post(self, payload, what: str) -> Any:
+        try:
+            response = self._session.post(self.url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise RPCError(f"{what} failed: {e}")
+
+    def call(self, method: str, *params) -> Any:
+        """
+        Send one request and return its result
+
+        Raises:
+            RPCError: If the node returns an error or cannot be reached
+        """
+        payload = {"jsonrpc": "2.0", "id": self._next_id(), "method": method, "params": list(params)}
+        metrics.RPC_ROUND_TRIPS.inc(kind="single")
+        reply = self._post(payload, method)
+        if reply.get("error"):
+            raise RPCError(reply["error"].get("message", "Unknown error"), reply["error"].get("code"))
+        return reply.get("result")
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence]]) -> List[Any]:
+        """
+        Send many requests as JSON-RPC arrays, RPC_MAX_BATCH per HTTP round trip
+
+        Args:
+            calls (list): (method, params) pairs
+
+        Returns:
+            list: One entry per call, in order: the result, or an RPCError for
+                calls the node rejected (other calls are unaffected)
+
+        Raises:
+            RPCError: If the node cannot be reached or does not support batches
+        """
+        results: List[Any] = []
+        for start in range(0, len(calls), RPC_MAX_BATCH):
+            chunk = calls[start:start + RPC_MAX_BATCH]
+            ids = [self._next_id() for _ in chunk]
+            payload = [
+                {"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)}
+                for request_id, (method, params) in zip(ids, chunk)
+            ]
+            metrics.RPC_ROUND_TRIPS.inc(kind="batch")
+            reply = self._post(payload, f"Batch of {len(chunk)} requests")
+            if not isinstance(reply, list):
+                # Nodes without batch support answer with a single error object
+                error = (reply.get("error") or {}) if isinstance(reply, dict) else {}
+                raise RPCError(error.get("message", "Batch requests are not supported"), error.get("code"))
+            # Responses may come back in any order
+            by_id = {item.get("id"): item for item in reply}
+            for request_id, (method, _) in zip(ids, chunk):
+                item = by_id.get(request_id)
+                if item is None:
+                    results.append(RPCError(f"{method}: no response in batch"))
+                elif item.get("error"):
+                    results.append(RPCError(item["error"].get("message", "Unknown error"), item["error"].get("code")))
+                else:
+                    results.append(item.get("result"))
+        return results
+
+    # ⛓️ Convenience wrappers
+
+    def block_number(self) -> int:
+        return int(self.call("eth_blockNumber"), 16)
+
+    def get_block(self, number: int, full_transactions: bool = False) -> Optional[dict]:
+        """Block header (with full transaction objects if asked), or None if the node does not have it"""
+        return self.call("eth_getBlockByNumber", hex(number), full_transactions)
+
+    def get_logs(self, address: str, from_block: int, to_block: int, topics: Optional[list] = None) -> list:
+        log_filter = {"address": address, "fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        if topics:
+            log_filter["topics"] = topics
+        return self.call("eth_getLogs", log_filter)
+
+    @staticmethod
+    def call_params(to: str, data: str, block: int, sender: Optional[str] = None) -> list:
+        """eth_call params for a read at `block`, as msg.sender `sender` when given"""
+        transaction = {"to": to, "data": data}
+        if sender:
+            transaction["from"] = sender
+        return [transaction, hex(block)]
+
+
+_client: Optional[JSONRPCClient] = None
+_client_lock = threading.Lock()
+
+
+def get_rpc_client() -> JSONRPCClient:
+    """Process-wide JSONRPCClient for RPC_URL, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = JSONRPCClient()
+    return _client
@@ -0,0 +1,212 @@
+# backend/timelock.py
+# Delay sensitive operations until their time lock expires, then run them
+
+import os
+import time
+import uuid
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend import metrics
+from storage.timelock_store import TimelockStore, get_timelock_store
+
+logger = logging.getLogger(__name__)
+
+TIMELOCK_WORKERS = int(os.getenv("VAULTIS_TIMELOCK_WORKERS") or 4)
+
+# settings["security"]["transaction_timelock"] -> seconds
+TIMELOCK_DURATIONS = {
+    "None": 0,
+    "1 Hour": 60 * 60,
+    "24 Hours": 24 * 60 * 60,
+    "48 Hours": 48 * 60 * 60,
+    "7 Days": 7 * 24 * 60 * 60,
+}
+
+Handler = Callable[[dict], Optional[dict]]
+
+
+class TimelockEngine:
+    """
+    Run queued operations at their release time
+
+    Every operation is written to the TimelockStore before it is queued, so
+    pending work survives restarts; start() rebuilds the queue from the
+    store and releases anything that came due while the process was down.
+    The queue is a binary heap of (release_at, id), giving O(log n)
+    scheduling and release. Cancelling only drops the id from the pending
+    map; its stale heap entry is skipped when popped, and the heap is
+    compacted once stale entries outnumber live ones.
+
+    Released operations run on a small thread pool through the handler
+    registered for their kind. An operation is marked released (or failed)
+    only after its handler returns, so a crash mid-run repeats it on the
+    next start: handlers must be idempotent.
+
+    Args:
+        store (TimelockStore): Durable operation store
+        workers (int): Handlers that may run at once
+    """
+
+    def __init__(self, store: TimelockStore, workers: int = TIMELOCK_WORKERS):
+        self.store = store
+        self._handlers: Dict[str, Handler] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._pending: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="timelock")
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """Run `handler(payload)` for released operations of `kind`; its return value is stored as the result"""
+        self._handlers[kind] = handler
+
+    # 🗓️ Scheduling
+
+    def schedule(self, kind: str, payload: dict, delay: float, requested_by: Optional[str] = None) -> dict:
+        """
+        Queue an operation to run `delay` seconds from now
+
+        Returns:
+            dict: The stored operation, including its id and release_at
+
+        Raises:
+            ValueError: If no handler is registered for `kind`
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown time-locked operation: {kind}")
+        now = time.time()
+        record = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "payload": payload,
+            "requested_by": requested_by,
+            "created_at": now,
+            "release_at": now + max(0.0, delay),
+            "status": "pending"
+        }
+        self.store.add(record)
+        self._push(record["release_at"], record["id"])
+        logger.info("[⏳] Time-locked %s %s until %s", kind, record["id"], time.ctime(record["release_at"]))
+        return record
+
+    def _push(self, release_at: float, op_id: str) -> None:
+        with self._condition:
+            self._pending[op_id] = release_at
+            heapq.heappush(self._heap, (release_at, op_id))
+            # Wake the timer only if this operation is now the next one due
+            if self._heap[0][1] == op_id:
+                self._condition.notify()
+
+    def cancel(self, op_id: str) -> bool:
+        """
+        Cancel a pending operation
+
+        Returns:
+            bool: False if it was not pending (unknown, already released or cancelled)
+        """
+        if not self.store.finish(op_id, "cancelled", None, time.time()):
+            return False
+        with self._condition:
+            self._pending.pop(op_id, None)
+            if len(self._heap) > 2 * len(self._pending) + 1024:
+                self._heap = [(at, pending_id) for pending_id, at in self._pending.items()]
+                heapq.heapify(self._heap)
+        metrics.TIMELOCK_OPERATIONS.inc(outcome="cancelled")
+        logger.info("[🚫] Time-locked operation %s cancelled", op_id)
+        return True
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # ⏰ Releasing
+
+    def _due(self) -> List[str]:
+        """Block until at least one operation is due (or stop()); returns the due ids"""
+        with self._condition:
+            while not self._stop:
+                while self._heap and self._heap[0][1] not in self._pending:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                wait = self._heap[0][0] - time.time()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                due = []
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, op_id = heapq.heappop(self._heap)
+                    if self._pending.pop(op_id, None) is not None:
+                        due.append(op_id)
+                if due:
+                    return due
+            return []
+
+    def _release(self, op_id: str) -> None:
+        record = self.store.get(op_id)
+        if record is None or record["status"] != "pending":
+            return
+        handler = self._handlers.get(record["kind"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for {record['kind']}")
+            result = handler(record["payload"])
+            status = "released"
+        except Exception as e:
+            logger.error("[❌] Time-locked %s %s failed: %s", record["kind"], op_id, e)
+            result, status = {"error": str(e)}, "failed"
+        if self.store.finish(op_id, status, result, time.time()):
+            metrics.TIMELOCK_OPERATIONS.inc(outcome=status)
+            logger.info("[🔓] Time-locked %s %s %s", record["kind"], op_id, status)
+
+    def run(self) -> None:
+        while True:
+            due = self._due()
+            if not due:
+                return
+            for op_id in due:
+                self._pool.submit(self._release, op_id)
+
+    def start(self) -> None:
+        """Reload pending operations from the store and start the timer thread"""
+        if self._thread is not None:
+            return
+        with self._condition:
+            for release_at, op_id in self.store.pending_schedule():
+                self._pending[op_id] = release_at
+            self._heap = [(at, op_id) for op_id, at in self._pending.items()]
+            heapq.heapify(self._heap)
+        self._thread = threading.Thread(target=self.run, name="timelock", daemon=True)
+        self._thread.start()
+        logger.info("[⏳] Timelock engine started with %s pending operations", len(self._pending))
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stop = True
+            self._condition.notify_all()
+
+
+def timelock_delay(settings: dict) -> int:
+    """Seconds sensitive operations are held for under the current security settings"""
+    return TIMELOCK_DURATIONS.get(settings["security"].get("transaction_timelock", "None"), 0)
+
+
+_engine: Optional[TimelockEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_timelock_engine() -> TimelockEngine:
+    """Process-wide TimelockEngine, created on first use; start() it once handlers are registered"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = TimelockEngine(get_timelock_store())
+                metrics.TIMELOCK_PENDING.set_function(_engine.pending_count)
+    return _engine
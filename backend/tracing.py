@@ -0,0 +1,179 @@
+# backend/tracing.py
+# Lightweight per-request stage timing with Server-Timing output and sampled trace files
+
+import os
+import json
+import time
+import queue
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+# Sampled traces are appended as JSON lines; leave VAULTIS_TRACE_FILE empty to disable
+TRACE_FILE = os.getenv("VAULTIS_TRACE_FILE", "")
+TRACE_SAMPLE_RATE = float(os.getenv("VAULTIS_TRACE_SAMPLE_RATE", 0.01))
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("vaultis_trace", default=None)
+
+
+class RequestTrace:
+    """
+    Ordered list of named stage durations for one request
+
+    A deferred trace belongs to a streamed response: stages that run while
+    the body is sent (e.g. decrypting a download) happen after the headers
+    are out, so they are missing from Server-Timing and are added to the
+    trace file by complete_deferred() instead.
+    """
+
+    __slots__ = ("route", "method", "started", "wall_time", "spans", "deferred", "sampled", "status")
+
+    def __init__(self, route: str, method: str = ""):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.wall_time = time.time()
+        self.spans: List[Tuple[str, float]] = []
+        self.deferred = False
+        self.sampled = False
+        self.status: Optional[int] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """
+        Render the spans as a Server-Timing header value (durations in ms)
+        """
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans]
+        parts.append(f"total;dur={self.total() * 1000:.2f}")
+        if self.deferred:
+            parts.append('body;desc="streamed after headers, decrypt not included"')
+        return ", ".join(parts)
+
+    def to_dict(self, status: Optional[int] = None) -> dict:
+        return {
+            "ts": self.wall_time,
+            "route": self.route,
+            "method": self.method,
+            "status": status,
+            "total_ms": round(self.total() * 1000, 3),
+            "spans": [{"name": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.spans]
+        }
+
+
+class _TraceWriter:
+    """
+    Background thread appending sampled traces to TRACE_FILE so request
+    threads never wait on disk
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict) -> None:
+        self._queue.put(record)
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            batch = [record]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a") as f:
+                    for item in batch:
+                        f.write(json.dumps(item) + "\n")
+            except OSError:
+                pass
+
+
+_writer: Optional[_TraceWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> Optional[_TraceWriter]:
+    global _writer
+    if not TRACE_FILE:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _TraceWriter(TRACE_FILE)
+    return _writer
+
+
+def start_trace(route: str, method: str = "") -> RequestTrace:
+    """Begin a trace for the current request context"""
+    trace = RequestTrace(route, method)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def defer_trace() -> Optional[RequestTrace]:
+    """Mark the current trace as continuing in a streamed body; pass it to complete_deferred() when done"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.deferred = True
+    return trace
+
+
+def finish_trace(status: Optional[int] = None) -> Optional[RequestTrace]:
+    """
+    Detach the current trace and, if sampled, queue it for the trace file
+
+    A deferred trace is only queued by complete_deferred(), once its body is sent.
+
+    Returns:
+        RequestTrace: The finished trace, or None if no trace was active
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    _current_trace.set(None)
+
+    trace.status = status
+    trace.sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    if trace.sampled and trace.spans and not trace.deferred:
+        writer = _get_writer()
+        if writer is not None:
+            writer.submit(trace.to_dict(status))
+    return trace
+
+
+def complete_deferred(trace: RequestTrace) -> None:
+    """Queue a deferred trace, now including its body stages, if it was sampled"""
+    if trace.sampled and trace.spans:
+        writer = _get_writer()
+        if writer is not None:
+            writer.submit(trace.to_dict(trace.status))
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time the enclosed block as stage `name` of the current trace.
+    Does nothing beyond two clock reads when no trace is active.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, time.perf_counter() - started)
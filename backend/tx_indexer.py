@@ -0,0 +1,263 @@
+# backend/tx_indexer.py
+# Follow chain blocks over JSON-RPC into the local address -> transactions history index
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from backend import metrics
+from backend.rpc import JSONRPCClient, RPCError, get_rpc_client
+from storage.tx_history import TxHistory, get_tx_history
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ENABLED = os.getenv("VAULTIS_HISTORY_ENABLED", "false").lower() == "true"
+# Oldest block to backfill down to; history starts at the head and works backwards
+HISTORY_START_BLOCK = int(os.getenv("VAULTIS_HISTORY_START_BLOCK") or 0)
+# Blocks behind the head to stay; shallower reorgs are rolled back via checkpoints
+HISTORY_CONFIRMATIONS = int(os.getenv("VAULTIS_HISTORY_CONFIRMATIONS") or 0)
+HISTORY_BATCH_BLOCKS = int(os.getenv("VAULTIS_HISTORY_BATCH_BLOCKS") or 100)
+HISTORY_FETCH_WORKERS = int(os.getenv("VAULTIS_HISTORY_FETCH_WORKERS") or 8)
+HISTORY_POLL_SECONDS = float(os.getenv("VAULTIS_HISTORY_POLL_SECONDS") or 3)
+
+# JSON-RPC "method not found"
+_METHOD_NOT_FOUND = -32601
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    return int(value, 16) if value is not None else None
+
+
+class HistoryIndexer:
+    """
+    Index every transaction of a block range once, by sender and recipient
+
+    The first sync indexes the newest `batch_blocks` blocks, so recent
+    history is available straight away. Each later sync first follows the
+    head forwards, then backfills one more batch of older blocks until it
+    reaches `start_block`. Blocks of a batch are fetched in parallel with
+    their receipts (eth_getBlockReceipts where the node supports it, one
+    eth_getTransactionReceipt per transaction otherwise) and written in
+    one transaction. Forward batches record block hash checkpoints so a
+    reorg can be rolled back to the common ancestor.
+
+    Args:
+        client (JSONRPCClient): Node connection
+        history (TxHistory): Local index to write to
+        start_block (int): Oldest block to backfill to
+        confirmations (int): Blocks to stay behind the head
+        batch_blocks (int): Blocks per write
+        workers (int): Parallel block fetches
+    """
+
+    def __init__(
+        self,
+        client: JSONRPCClient,
+        history: TxHistory,
+        start_block: int = HISTORY_START_BLOCK,
+        confirmations: int = HISTORY_CONFIRMATIONS,
+        batch_blocks: int = HISTORY_BATCH_BLOCKS,
+        workers: int = HISTORY_FETCH_WORKERS
+    ):
+        self.client = client
+        self.history = history
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch_blocks = max(1, batch_blocks)
+        self.head: Optional[int] = None
+        self._block_receipts = True
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="history-fetch")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # 📥 Fetching
+
+    def _receipts(self, block: dict) -> Dict[str, dict]:
+        if self._block_receipts:
+            try:
+                receipts = self.client.call("eth_getBlockReceipts", block["number"])
+                return {receipt["transactionHash"].lower(): receipt for receipt in receipts or []}
+            except RPCError as e:
+                if e.code != _METHOD_NOT_FOUND:
+                    raise
+                logger.info("[🔍] Node has no eth_getBlockReceipts, fetching receipts per transaction")
+                self._block_receipts = False
+        receipts = {}
+        for tx in block["transactions"]:
+            receipt = self.client.call("eth_getTransactionReceipt", tx["hash"])
+            if receipt is not None:
+                receipts[tx["hash"].lower()] = receipt
+        return receipts
+
+    def _fetch_block(self, number: int) -> Tuple[dict, List[dict]]:
+        block = self.client.get_block(number, full_transactions=True)
+        if block is None:
+            raise RPCError(f"Node does not have block {number} yet")
+        receipts = self._receipts(block) if block["transactions"] else {}
+        timestamp = int(block["timestamp"], 16)
+        transactions = []
+        for tx in block["transactions"]:
+            receipt = receipts.get(tx["hash"].lower(), {})
+            transactions.append({
+                "hash": tx["hash"],
+                "block_number": number,
+                "tx_index": int(tx["transactionIndex"], 16),
+                "block_hash": block["hash"],
+                "timestamp": timestamp,
+                "from": tx["from"],
+                "to": tx.get("to"),
+                # wei amounts overflow SQLite integers, keep them as decimal strings
+                "value": str(int(tx["value"], 16)),
+                "gas_price": str(int(receipt.get("effectiveGasPrice") or tx.get("gasPrice") or "0x0", 16)),
+                "gas_used": str(_int(receipt["gasUsed"])) if receipt.get("gasUsed") else None,
+                "status": _int(receipt.get("status")),
+                "contract_address": receipt.get("contractAddress")
+            })
+        return block, transactions
+
+    def _index_range(self, first: int, last: int, checkpoint: bool) -> int:
+        results = list(self._pool.map(self._fetch_block, range(first, last + 1)))
+        transactions = [tx for _, block_txs in results for tx in block_txs]
+        checkpoints = {int(block["number"], 16): block["hash"] for block, _ in results} if checkpoint else {}
+        stored = self.history.add_blocks(transactions, first, last, checkpoints)
+        metrics.HISTORY_TRANSACTIONS.inc(stored)
+        return stored
+
+    # 🧭 Sync
+
+    def _check_chain(self) -> None:
+        chain_id = str(int(self.client.call("eth_chainId"), 16))
+        if self.history.chain_id() != chain_id:
+            logger.info("[⛓️] Transaction history now follows chain %s", chain_id)
+            self.history.reset(chain_id)
+
+    def _check_reorg(self) -> None:
+        checkpoints = self.history.checkpoints()
+        for position, (number, block_hash) in enumerate(checkpoints):
+            block = self.client.get_block(number)
+            if block is not None and block["hash"] == block_hash:
+                if position:
+                    removed = self.history.rollback(number)
+                    metrics.HISTORY_REORGS.inc()
+                    logger.warning("[⚠️] Chain reorg detected: history rolled back to block %s (%s transactions removed)", number, removed)
+                return
+        if checkpoints:
+            # Reorg deeper than every checkpoint we keep (or the node was reset): start over
+            metrics.HISTORY_REORGS.inc()
+            logger.error("[❌] No stored checkpoint matches the chain, re-indexing transaction history")
+            self.history.reset(self.history.chain_id() or "")
+
+    def backfill_remaining(self) -> int:
+        """Blocks still to index between start_block and the oldest indexed block"""
+        first = self.history.first_block()
+        if first is None:
+            return max(0, (self.head or 0) - self.start_block + 1)
+        return max(0, first - self.start_block)
+
+    def sync_once(self) -> int:
+        """
+        Catch up with the head, then backfill one batch of older blocks
+
+        Returns:
+            int: Number of blocks indexed
+        """
+        self._check_chain()
+        self.head = self.client.block_number()
+        target = self.head - self.confirmations
+        self._check_reorg()
+        if target < self.start_block:
+            return 0
+
+        scanned = 0
+        last = self.history.last_block()
+        if last is None:
+            # Empty index: the newest batch first, older blocks through backfill
+            last = max(self.start_block, target - self.batch_blocks + 1) - 1
+        while last < target and not self._stop.is_set():
+            to_block = min(last + self.batch_blocks, target)
+            stored = self._index_range(last + 1, to_block, checkpoint=True)
+            scanned += to_block - last
+            last = to_block
+            if stored:
+                logger.info("[⛓️] Indexed %s transactions up to block %s", stored, to_block)
+
+        first = self.history.first_block()
+        if first is not None and first > self.start_block and not self._stop.is_set():
+            from_block = max(self.start_block, first - self.batch_blocks)
+            self._index_range(from_block, first - 1, checkpoint=False)
+            scanned += first - from_block
+            logger.debug("[🔍] Transaction history backfilled down to block %s", from_block)
+        return scanned
+
+    def lag(self) -> Optional[int]:
+        last = self.history.last_block()
+        if self.head is None or last is None:
+            return None
+        return max(0, self.head - last)
+
+    def run(self, poll_seconds: float = HISTORY_POLL_SECONDS) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+                if self.backfill_remaining():
+                    continue
+            except RPCError as e:
+                logger.warning("[⚠️] History indexer could not reach the node: %s", e)
+            except Exception as e:
+                logger.exception("[❌] History indexer error: %s", e)
+            self._stop.wait(poll_seconds)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="history-indexer", daemon=True)
+            self._thread.start()
+            logger.info("[⛓️] Transaction history indexer following %s", self.client.url)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_indexer: Optional[HistoryIndexer] = None
+_indexer_lock = threading.Lock()
+
+
+def get_history_indexer() -> Optional[HistoryIndexer]:
+    """Process-wide HistoryIndexer, None unless VAULTIS_HISTORY_ENABLED is true"""
+    global _indexer
+    if _indexer is None and HISTORY_ENABLED:
+        with _indexer_lock:
+            if _indexer is None:
+                _indexer = HistoryIndexer(get_rpc_client(), get_tx_history())
+                metrics.HISTORY_INDEXED_BLOCK.set_function(lambda: _indexer.history.last_block() or 0)
+                metrics.HISTORY_FIRST_BLOCK.set_function(lambda: _indexer.history.first_block() or 0)
+    return _indexer
+
+
+if __name__ == "__main__":
+    # Usage: python backend/tx_indexer.py [--once]
+    parser = argparse.ArgumentParser(description="Chain transaction history indexer")
+    parser.add_argument("--once", action="store_true", help="Index the whole configured range and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if not HISTORY_ENABLED:
+        print("Set VAULTIS_HISTORY_ENABLED=true (and VAULTIS_RPC_URL) first")
+        sys.exit(1)
+    indexer = get_history_indexer()
+    if args.once:
+        started = time.perf_counter()
+        scanned = indexer.sync_once()
+        while indexer.backfill_remaining():
+            scanned += indexer.sync_once()
+        print(f"Indexed {scanned} blocks in {time.perf_counter() - started:.1f}s, {indexer.history.count()} transactions stored")
+    else:
+        indexer.run()
@@ -0,0 +1,74 @@
+# backend/upload_stream.py
+# Read uploaded files straight from the WSGI input stream without spooling them to disk
+
+from typing import IO, Iterator, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+READ_SIZE = 64 * 1024
+
+
+def iter_body(stream: IO[bytes], read_size: int = READ_SIZE) -> Iterator[bytes]:
+    """Yield a raw request body (e.g. application/octet-stream) block by block"""
+    while True:
+        block = stream.read(read_size)
+        if not block:
+            return
+        yield block
+
+
+class MultipartFileStream:
+    """
+    Incremental multipart/form-data reader for a single file field
+
+    Unlike request.files, nothing is buffered beyond one read block: the part
+    headers are parsed first (so `filename` is known), then iterating the
+    object yields the file content as it arrives from the client.
+    """
+
+    def __init__(self, stream: IO[bytes], boundary: str, field_name: str = "file", read_size: int = READ_SIZE):
+        self._stream = stream
+        self._read_size = read_size
+        self._decoder = MultipartDecoder(boundary.encode("latin-1"))
+        self._events = self._iter_events()
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._find_file_part()
+
+    def _iter_events(self):
+        exhausted = False
+        while True:
+            event = self._decoder.next_event()
+            if isinstance(event, NeedData):
+                if exhausted:
+                    raise ValueError("Multipart body ended unexpectedly")
+                block = self._stream.read(self._read_size)
+                exhausted = not block
+                self._decoder.receive_data(block or None)
+                continue
+            if isinstance(event, Epilogue):
+                return
+            yield event
+
+    def _find_file_part(self) -> None:
+        skipping = False
+        for event in self._events:
+            if isinstance(event, File) and event.name == self.field_name:
+                self.filename = event.filename
+                self.content_type = event.headers.get("Content-Type")
+                return
+            if isinstance(event, (Field, File)):
+                skipping = True
+            elif isinstance(event, Data) and skipping and not event.more_data:
+                skipping = False
+        raise ValueError(f"No '{self.field_name}' file part in multipart body")
+
+    def __iter__(self) -> Iterator[bytes]:
+        for event in self._events:
+            if not isinstance(event, Data):
+                return
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
@@ -0,0 +1,175 @@
+# backend/wallet_auth.py
+# Verify that a request was signed by the wallet it claims to come from (EIP-191 personal_sign)
+
+import os
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+from backend.abi import keccak256, to_bytes
+
+# How old a signed request may be, in seconds
+SIGNATURE_MAX_AGE = int(os.getenv("VAULTIS_SIGNATURE_MAX_AGE") or 300)
+
+# secp256k1 curve parameters
+_P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+_G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+)
+
+Point = Optional[Tuple[int, int]]
+
+
+class WalletAuthError(Exception):
+    """
+    Missing or invalid request signature, reported as a JSON error
+
+    Args:
+        message (str): Human readable error
+        status (int): HTTP status for the error response
+        code (str): Machine readable error code
+    """
+
+    def __init__(self, message: str, status: int = 401, code: str = "SIGNATURE_INVALID"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+# 🔑 Public key recovery
+
+def _add(a: Point, b: Point) -> Point:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a[0] == b[0]:
+        if (a[1] + b[1]) % _P == 0:
+            return None
+        slope = 3 * a[0] * a[0] * pow(2 * a[1], -1, _P)
+    else:
+        slope = (b[1] - a[1]) * pow(b[0] - a[0], -1, _P)
+    x = (slope * slope - a[0] - b[0]) % _P
+    return x, (slope * (a[0] - x) - a[1]) % _P
+
+
+def _multiply(point: Point, scalar: int) -> Point:
+    result = None
+    while scalar:
+        if scalar & 1:
+            result = _add(result, point)
+        point = _add(point, point)
+        scalar >>= 1
+    return result
+
+
+def message_hash(message: str) -> bytes:
+    """Hash a wallet signs for personal_sign / signMessage of `message`"""
+    data = message.encode()
+    return keccak256(b"\x19Ethereum Signed Message:\n" + str(len(data)).encode() + data)
+
+
+def recover_address(message: str, signature: str) -> str:
+    """
+    Address whose key produced a personal_sign `signature` over `message`
+
+    Returns:
+        str: Lower-case 0x address
+
+    Raises:
+        WalletAuthError: If the signature is malformed or does not verify
+    """
+    try:
+        raw = to_bytes(signature)
+    except ValueError:
+        raise WalletAuthError("Signature is not hex")
+    if len(raw) != 65:
+        raise WalletAuthError("Signature must be 65 bytes")
+    r, s, v = int.from_bytes(raw[:32], "big"), int.from_bytes(raw[32:64], "big"), raw[64]
+    v = v - 27 if v >= 27 else v
+    if v not in (0, 1) or not (0 < r < _N and 0 < s < _N):
+        raise WalletAuthError("Signature is out of range")
+    # R is the curve point with x = r and the parity given by v
+    y = pow((pow(r, 3, _P) + 7) % _P, (_P + 1) // 4, _P)
+    if (y * y - pow(r, 3, _P) - 7) % _P:
+        raise WalletAuthError("Signature does not verify")
+    if y & 1 != v:
+        y = _P - y
+    e = int.from_bytes(message_hash(message), "big")
+    r_inverse = pow(r, -1, _N)
+    public_key = _add(_multiply(_G, (-e * r_inverse) % _N), _multiply((r, y), (s * r_inverse) % _N))
+    if public_key is None:
+        raise WalletAuthError("Signature does not verify")
+    encoded = public_key[0].to_bytes(32, "big") + public_key[1].to_bytes(32, "big")
+    return "0x" + keccak256(encoded)[-20:].hex()
+
+
+# 🧾 Signed requests
+
+def request_message(method: str, path: str, timestamp: str) -> str:
+    """Text a wallet signs to authorise one request, e.g. "Vaultis request\\nDELETE /api/...\\n1700000000" """
+    return f"Vaultis request\n{method.upper()} {path}\n{timestamp}"
+
+
+class RequestVerifier:
+    """
+    Check signed request headers and refuse replays
+
+    A request carries the wallet address, a Unix timestamp and the wallet's
+    signature of request_message(method, path, timestamp). Signatures older
+    than `max_age` seconds are rejected, and each (address, message) pair is
+    accepted once, so a captured signature cannot be replayed.
+
+    Args:
+        max_age (int): Seconds a signature stays valid
+    """
+
+    def __init__(self, max_age: int = SIGNATURE_MAX_AGE):
+        self.max_age = max_age
+        self._seen: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def verify(self, method: str, path: str, address: str, signature: str, timestamp: str) -> str:
+        """
+        Wallet that signed the request
+
+        Returns:
+            str: Lower-case 0x address, equal to `address`
+
+        Raises:
+            WalletAuthError: If the signature is stale, replayed or from another wallet
+        """
+        try:
+            signed_at = int(timestamp)
+        except (TypeError, ValueError):
+            raise WalletAuthError("X-Wallet-Timestamp must be a Unix timestamp")
+        now = time.time()
+        if abs(now - signed_at) > self.max_age:
+            raise WalletAuthError(f"Signature is older than {self.max_age} seconds", 401, "SIGNATURE_EXPIRED")
+        message = request_message(method, path, timestamp)
+        signer = recover_address(message, signature)
+        if signer != address.strip().lower():
+            raise WalletAuthError("Signature is not from X-Wallet-Address")
+        with self._lock:
+            if self._seen.get((signer, message), 0) > now:
+                raise WalletAuthError("Signature was already used", 401, "SIGNATURE_REPLAYED")
+            if len(self._seen) >= 1024:
+                self._seen = {key: expiry for key, expiry in self._seen.items() if expiry > now}
+            self._seen[(signer, message)] = signed_at + self.max_age
+        return signer
+
+
+_verifier: Optional[RequestVerifier] = None
+_verifier_lock = threading.Lock()
+
+
+def get_request_verifier() -> RequestVerifier:
+    """Process-wide RequestVerifier, created on first use"""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = RequestVerifier()
+    return _verifier
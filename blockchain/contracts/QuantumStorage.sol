@@ -10,12 +10,21 @@ contract QuantumStorage {
         uint timestamp;
         mapping(address => bool) accessList;
         address[] accessHistory;
+        // Addresses that currently have access, with 1-based positions for swap-and-pop removal
+        address[] accessUsers;
+        mapping(address => uint) accessUserIndex;
     }
 
     mapping(uint => File) private files;
     uint private fileCounter;
     mapping(address => address) private backupAddresses;
 
+    // Per-address file ID lists (1-based positions), so listings cost O(own files) instead of O(fileCounter)
+    mapping(address => uint[]) private accessibleFiles;
+    mapping(uint => mapping(address => uint)) private accessibleFileIndex;
+    mapping(address => uint[]) private ownedFiles;
+    mapping(uint => uint) private ownedFileIndex;
+
     event FileStored(uint indexed fileId, address indexed uploader, string cid, uint timestamp);
     event AccessGranted(uint indexed fileId, address indexed grantee);
     event AccessRevoked(uint indexed fileId, address indexed revokedUser);
@@ -29,39 +38,146 @@ contract QuantumStorage {
         _;
     }
 
-    function uploadFile(string calldata cid) external {
+    /// @dev Give `user` access to a file and add it to their index; returns false if they already had access
+    function _addAccess(uint fileId, address user) private returns (bool) {
+        File storage file = files[fileId];
+        if (file.accessList[user]) {
+            return false;
+        }
+        file.accessList[user] = true;
+        file.accessHistory.push(user);
+        file.accessUsers.push(user);
+        file.accessUserIndex[user] = file.accessUsers.length;
+
+        accessibleFiles[user].push(fileId);
+        accessibleFileIndex[fileId][user] = accessibleFiles[user].length;
+        return true;
+    }
+
+    /// @dev Take access away from `user`, removing the entries with swap-and-pop
+    function _removeAccess(uint fileId, address user) private {
+        File storage file = files[fileId];
+        file.accessList[user] = false;
+
+        uint position = file.accessUserIndex[user];
+        uint lastPosition = file.accessUsers.length;
+        if (position != lastPosition) {
+            address moved = file.accessUsers[lastPosition - 1];
+            file.accessUsers[position - 1] = moved;
+            file.accessUserIndex[moved] = position;
+        }
+        file.accessUsers.pop();
+        delete file.accessUserIndex[user];
+
+        uint[] storage list = accessibleFiles[user];
+        position = accessibleFileIndex[fileId][user];
+        lastPosition = list.length;
+        if (position != lastPosition) {
+            uint movedId = list[lastPosition - 1];
+            list[position - 1] = movedId;
+            accessibleFileIndex[movedId][user] = position;
+        }
+        list.pop();
+        delete accessibleFileIndex[fileId][user];
+    }
+
+    function _addOwned(uint fileId, address owner) private {
+        ownedFiles[owner].push(fileId);
+        ownedFileIndex[fileId] = ownedFiles[owner].length;
+    }
+
+    function _removeOwned(uint fileId, address owner) private {
+        uint[] storage list = ownedFiles[owner];
+        uint position = ownedFileIndex[fileId];
+        uint lastPosition = list.length;
+        if (position != lastPosition) {
+            uint movedId = list[lastPosition - 1];
+            list[position - 1] = movedId;
+            ownedFileIndex[movedId] = position;
+        }
+        list.pop();
+        delete ownedFileIndex[fileId];
+    }
+
+    function _storeFile(string calldata cid) private returns (uint fileId) {
         require(bytes(cid).length > 0, "CID cannot be empty");
 
-        fileCounter++;
-        File storage newFile = files[fileCounter];
+        fileId = ++fileCounter;
+        File storage newFile = files[fileId];
         newFile.cid = cid;
         newFile.owner = msg.sender;
         newFile.uploader = msg.sender;
         newFile.timestamp = block.timestamp;
-        newFile.accessList[msg.sender] = true;
-        newFile.accessHistory.push(msg.sender);
+        _addAccess(fileId, msg.sender);
+        _addOwned(fileId, msg.sender);
+
+        emit FileStored(fileId, msg.sender, cid, block.timestamp);
+    }
 
-        emit FileStored(fileCounter, msg.sender, cid, block.timestamp);
+    function uploadFile(string calldata cid) external {
+        _storeFile(cid);
+    }
+
+    /// @notice Store several CIDs in one transaction; emits one FileStored per file
+    /// @return firstFileId ID of the first new file, the rest follow consecutively
+    function uploadFiles(string[] calldata cids) external returns (uint firstFileId) {
+        require(cids.length > 0, "No CIDs given");
+
+        firstFileId = fileCounter + 1;
+        for (uint i = 0; i < cids.length; i++) {
+            _storeFile(cids[i]);
+        }
     }
 
     function grantAccess(uint fileId, address user) external onlyOwner(fileId) {
         require(user != address(0), "Invalid address");
 
-        if (!files[fileId].accessList[user]) {
-            files[fileId].accessList[user] = true;
-            files[fileId].accessHistory.push(user);
+        if (_addAccess(fileId, user)) {
             emit AccessGranted(fileId, user);
         }
     }
 
+    /// @notice Give every address in `users` access to every file in `fileIds` (caller must own them all)
+    function grantAccessBatch(uint[] calldata fileIds, address[] calldata users) external {
+        for (uint u = 0; u < users.length; u++) {
+            require(users[u] != address(0), "Invalid address");
+        }
+        for (uint f = 0; f < fileIds.length; f++) {
+            uint fileId = fileIds[f];
+            require(files[fileId].owner == msg.sender, "Not the owner");
+            for (uint u = 0; u < users.length; u++) {
+                if (_addAccess(fileId, users[u])) {
+                    emit AccessGranted(fileId, users[u]);
+                }
+            }
+        }
+    }
+
     function revokeAccess(uint fileId, address user) external onlyOwner(fileId) {
         require(user != msg.sender, "Owner cannot revoke self");
         require(files[fileId].accessList[user], "User doesn't have access");
 
-        files[fileId].accessList[user] = false;
+        _removeAccess(fileId, user);
         emit AccessRevoked(fileId, user);
     }
 
+    /// @notice Revoke every address in `users` from every file in `fileIds`; users without access are skipped
+    function revokeAccessBatch(uint[] calldata fileIds, address[] calldata users) external {
+        for (uint u = 0; u < users.length; u++) {
+            require(users[u] != msg.sender, "Owner cannot revoke self");
+        }
+        for (uint f = 0; f < fileIds.length; f++) {
+            uint fileId = fileIds[f];
+            require(files[fileId].owner == msg.sender, "Not the owner");
+            for (uint u = 0; u < users.length; u++) {
+                if (files[fileId].accessList[users[u]]) {
+                    _removeAccess(fileId, users[u]);
+                    emit AccessRevoked(fileId, users[u]);
+                }
+            }
+        }
+    }
+
     function getCID(uint fileId) external view returns (string memory) {
         require(files[fileId].accessList[msg.sender], "Access denied");
         return files[fileId].cid;
@@ -76,8 +192,9 @@ contract QuantumStorage {
 
         address oldOwner = files[fileId].owner;
         files[fileId].owner = newOwner;
-        files[fileId].accessList[newOwner] = true;
-        files[fileId].accessHistory.push(newOwner);
+        _addAccess(fileId, newOwner);
+        _removeOwned(fileId, oldOwner);
+        _addOwned(fileId, newOwner);
 
         emit OwnershipTransferred(fileId, oldOwner, newOwner);
     }
@@ -96,60 +213,87 @@ contract QuantumStorage {
         uploader = file.uploader;
         cid = file.cid;
         timestamp = file.timestamp;
+        accessUsers = file.accessUsers;
+    }
 
-        uint count;
-        for (uint i = 0; i < file.accessHistory.length; i++) {
-            if (file.accessList[file.accessHistory[i]]) {
-                count++;
-            }
+    function getTotalFiles() external view returns (uint) {
+        return fileCounter;
+    }
+
+    /// @dev Details of ids[offset .. offset + limit), clamped to the end of the list
+    function _filesPage(uint[] storage ids, uint offset, uint limit) private view returns (
+        uint[] memory fileIds,
+        string[] memory cids,
+        address[] memory owners,
+        address[] memory uploaders,
+        uint[] memory timestamps
+    ) {
+        uint count = ids.length;
+        if (offset > count) {
+            offset = count;
+        }
+        count -= offset;
+        if (limit < count) {
+            count = limit;
         }
 
-        accessUsers = new address[](count);
-        uint index = 0;
-        for (uint i = 0; i < file.accessHistory.length; i++) {
-            address user = file.accessHistory[i];
-            if (file.accessList[user]) {
-                accessUsers[index++] = user;
-            }
+        fileIds = new uint[](count);
+        cids = new string[](count);
+        owners = new address[](count);
+        uploaders = new address[](count);
+        timestamps = new uint[](count);
+
+        for (uint i = 0; i < count; i++) {
+            fileIds[i] = ids[offset + i];
+            File storage file = files[fileIds[i]];
+            cids[i] = file.cid;
+            owners[i] = file.owner;
+            uploaders[i] = file.uploader;
+            timestamps[i] = file.timestamp;
         }
     }
 
-    function getTotalFiles() external view returns (uint) {
-        return fileCounter;
+    /// @notice Every file the caller can access (prefer getAccessibleFilesPage for large accounts)
+    function getAccessibleFiles() external view returns (
+        uint[] memory fileIds,
+        string[] memory cids,
+        address[] memory owners,
+        address[] memory uploaders,
+        uint[] memory timestamps
+    ) {
+        return _filesPage(accessibleFiles[msg.sender], 0, accessibleFiles[msg.sender].length);
     }
 
-    function getAccessibleFiles() external view returns (
+    /// @notice Number of files the caller can access
+    function getAccessibleFileCount() external view returns (uint) {
+        return accessibleFiles[msg.sender].length;
+    }
+
+    /// @notice Up to `limit` files the caller can access, starting at position `offset`
+    function getAccessibleFilesPage(uint offset, uint limit) external view returns (
         uint[] memory fileIds,
         string[] memory cids,
         address[] memory owners,
         address[] memory uploaders,
         uint[] memory timestamps
     ) {
-        uint total = 0;
+        return _filesPage(accessibleFiles[msg.sender], offset, limit);
+    }
 
-        for (uint i = 1; i <= fileCounter; i++) {
-            if (files[i].accessList[msg.sender]) {
-                total++;
-            }
-        }
+    /// @notice Number of files the caller owns
+    function getOwnedFileCount() external view returns (uint) {
+        return ownedFiles[msg.sender].length;
+    }
 
-        fileIds = new uint[](total);
-        cids = new string[](total);
-        owners = new address[](total);
-        uploaders = new address[](total);
-        timestamps = new uint[](total);
-
-        uint index = 0;
-        for (uint i = 1; i <= fileCounter; i++) {
-            if (files[i].accessList[msg.sender]) {
-                fileIds[index] = i;
-                cids[index] = files[i].cid;
-                owners[index] = files[i].owner;
-                uploaders[index] = files[i].uploader;
-                timestamps[index] = files[i].timestamp;
-                index++;
-            }
-        }
+    /// @notice Up to `limit` files the caller owns, starting at position `offset`
+    function getOwnedFilesPage(uint offset, uint limit) external view returns (
+        uint[] memory fileIds,
+        string[] memory cids,
+        address[] memory owners,
+        address[] memory uploaders,
+        uint[] memory timestamps
+    ) {
+        return _filesPage(ownedFiles[msg.sender], offset, limit);
     }
 
     function getAccessHistory(uint fileId) external view returns (address[] memory) {
@@ -166,6 +310,12 @@ contract QuantumStorage {
 
     /// @notice Delete a file permanently (only owner)
     function deleteFile(uint fileId) external onlyOwner(fileId) {
+        File storage file = files[fileId];
+        // Clear every access entry so the file leaves all per-address lists
+        while (file.accessUsers.length > 0) {
+            _removeAccess(fileId, file.accessUsers[file.accessUsers.length - 1]);
+        }
+        _removeOwned(fileId, msg.sender);
         delete files[fileId];
         emit FileDeleted(fileId);
     }
@@ -0,0 +1,87 @@
+require("dotenv").config();
+const hre = require("hardhat");
+
+// Gas per item for the single-call vs batch QuantumStorage entry points.
+// Runs on the in-process Hardhat network:
+//   npx hardhat run scripts/bench-gas.js
+// BENCH_SIZES (files per batch) and BENCH_TEAM (addresses per grant) can be overridden;
+// keep sizes x team small enough for a batch to fit the 30M block gas limit.
+
+const SIZES = (process.env.BENCH_SIZES || "1,10,25,50").split(",").map(Number);
+const TEAM = Number(process.env.BENCH_TEAM || 3);
+
+// CIDv0-length strings so storage costs match real uploads
+const cidFor = (i) => `Qm${"b".repeat(40)}${String(i).padStart(4, "0")}`;
+const range = (start, count) => Array.from({ length: count }, (_, i) => start + i);
+
+async function gasOf(txPromise) {
+  const receipt = await (await txPromise).wait();
+  return receipt.gasUsed;
+}
+
+async function deploy() {
+  const QuantumStorage = await hre.ethers.getContractFactory("QuantumStorage");
+  const contract = await QuantumStorage.deploy();
+  await contract.waitForDeployment();
+  return contract;
+}
+
+async function main() {
+  const signers = await hre.ethers.getSigners();
+  const team = signers.slice(1, 1 + TEAM).map((signer) => signer.address);
+  const rows = [];
+
+  const record = (operation, items, singleGas, batchGas) => {
+    const single = Number(singleGas) / items;
+    const batch = Number(batchGas) / items;
+    rows.push({
+      operation,
+      items,
+      "single gas/item": Math.round(single),
+      "batch gas/item": Math.round(batch),
+      saving: `${(100 * (1 - batch / single)).toFixed(1)}%`,
+    });
+  };
+
+  for (const size of SIZES) {
+    console.log(`⏳ Measuring ${size} files x ${TEAM} addresses...`);
+    const contract = await deploy();
+
+    // 📤 Uploads: files 1..size one by one, size+1..2*size in one uploadFiles call
+    let singleGas = 0n;
+    for (const i of range(0, size)) {
+      singleGas += await gasOf(contract.uploadFile(cidFor(i)));
+    }
+    const batchGas = await gasOf(contract.uploadFiles(range(size, size).map(cidFor)));
+    record("upload", size, singleGas, batchGas);
+
+    // 🤝 Grants: every team address on every file
+    const singleFiles = range(1, size);
+    const batchFiles = range(size + 1, size);
+    let singleGrantGas = 0n;
+    for (const fileId of singleFiles) {
+      for (const user of team) {
+        singleGrantGas += await gasOf(contract.grantAccess(fileId, user));
+      }
+    }
+    const batchGrantGas = await gasOf(contract.grantAccessBatch(batchFiles, team));
+    record("grant", size * TEAM, singleGrantGas, batchGrantGas);
+
+    // 🚫 Revokes: undo the grants above
+    let singleRevokeGas = 0n;
+    for (const fileId of singleFiles) {
+      for (const user of team) {
+        singleRevokeGas += await gasOf(contract.revokeAccess(fileId, user));
+      }
+    }
+    const batchRevokeGas = await gasOf(contract.revokeAccessBatch(batchFiles, team));
+    record("revoke", size * TEAM, singleRevokeGas, batchRevokeGas);
+  }
+
+  console.table(rows);
+}
+
+main().catch((error) => {
+  console.error("❌ Gas benchmark failed:", error);
+  process.exitCode = 1;
+});
@@ -0,0 +1,161 @@
+# crypto/chunking.py
+# Content-defined chunking: identical data splits at identical boundaries wherever it sits in a file
+
+import hashlib
+import logging
+from typing import Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AVG_CHUNK_SIZE = 64 * 1024
+# Bytes hashed per pass; boundaries are only final once max_size bytes follow the chunk start
+SCAN_SIZE = 8 * 1024 * 1024
+
+# Gear hash window: every hash bit depends on at most this many trailing bytes
+_WINDOW = 32
+# Bytes hashed per numpy pass; small enough for the working arrays to stay in cache
+_SLAB = 64 * 1024
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        logger.warning("[⚠️] numpy not found. Install with: pip install numpy")
+        raise
+    return numpy
+
+
+def _gear_table():
+    # Fixed pseudo-random table: boundaries must be the same in every process and release
+    np = _numpy()
+    values = [int.from_bytes(hashlib.sha256(b"vaultis-gear" + bytes([i])).digest()[:4], "big") for i in range(256)]
+    return np.array(values, dtype=np.uint32)
+
+
+def _top_bits(count: int) -> int:
+    return ((1 << count) - 1) << (32 - count)
+
+
+class ContentChunker:
+    """
+    Split a byte stream at content-defined boundaries (FastCDC-style gear hash)
+
+    A boundary is placed after every byte whose 32-byte rolling gear hash
+    has its top bits clear, so an insertion or deletion only moves the
+    boundaries next to it and the rest of the file still produces the same
+    chunks. Normalised chunking uses a stricter mask before `avg_size` and
+    a looser one after it, which keeps sizes close to the average; chunks
+    are never shorter than `min_size` (except the last) or longer than
+    `max_size`.
+
+    The hash is computed with numpy, one cache-sized slab at a time: the
+    gear hash over a 32-byte window is a sum of shifted table lookups,
+    built in log2(32) vectorised doubling steps instead of a per-byte
+    loop. Buffers
+    always begin at a chunk start and min_size is at least the window, so
+    a boundary never depends on bytes before its chunk.
+
+    Args:
+        avg_size (int): Target chunk size, a power of two
+        min_size (int): Smallest chunk, defaults to avg_size / 4
+        max_size (int): Largest chunk, defaults to avg_size * 4
+    """
+
+    def __init__(self, avg_size: int = DEFAULT_AVG_CHUNK_SIZE, min_size: int = 0, max_size: int = 0):
+        if avg_size < 256 or avg_size & (avg_size - 1):
+            raise ValueError("Average chunk size must be a power of two of at least 256")
+        self.avg_size = avg_size
+        self.min_size = min_size or avg_size // 4
+        self.max_size = max_size or avg_size * 4
+        if not _WINDOW <= self.min_size <= avg_size <= self.max_size:
+            raise ValueError("Chunk sizes must satisfy 32 <= min <= avg <= max")
+        bits = avg_size.bit_length() - 1
+        self._mask_strict = _top_bits(bits + 1)
+        self._mask_loose = _top_bits(bits - 1)
+        self._gear = _gear_table()
+        self.scan_size = max(SCAN_SIZE, 4 * self.max_size)
+
+    @property
+    def params(self) -> dict:
+        """Parameters that must match for two uploads to share chunks"""
+        return {"algorithm": "gear-cdc", "min": self.min_size, "avg": self.avg_size, "max": self.max_size}
+
+    def _candidates(self, data: bytes):
+        """Positions whose gear hash passes the strict and the loose mask, as two sorted arrays"""
+        np = _numpy()
+        source = np.frombuffer(data, dtype=np.uint8)
+        scratch = np.empty(_SLAB + _WINDOW, dtype=np.uint32)
+        strict_mask, loose_mask = np.uint32(self._mask_strict), np.uint32(self._mask_loose)
+        strict, loose = [], []
+        for start in range(0, len(source), _SLAB):
+            # Each slab re-reads the window before it so its first hashes are complete
+            low = max(0, start - (_WINDOW - 1))
+            hashes = self._gear.take(source[low:start + _SLAB])
+            size = len(hashes)
+            shift = 1
+            while shift < _WINDOW:
+                # H_2w(i) = H_w(i) + (H_w(i - w) << w); uint32 arithmetic wraps like the scalar gear hash
+                np.left_shift(hashes[:-shift], np.uint32(shift), out=scratch[:size - shift])
+                np.add(hashes[shift:], scratch[:size - shift], out=hashes[shift:])
+                shift *= 2
+            hashes = hashes[start - low:]
+            strict.append(np.flatnonzero((hashes & strict_mask) == 0) + start)
+            loose.append(np.flatnonzero((hashes & loose_mask) == 0) + start)
+        if not strict:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(strict), np.concatenate(loose)
+
+    def _cut_points(self, data: bytes, final: bool) -> List[int]:
+        """Ends of the chunks in `data` that no later data can change"""
+        np = _numpy()
+        strict, loose = self._candidates(data)
+        size = len(data)
+        ends: List[int] = []
+        start = 0
+        while size - start >= (1 if final else self.max_size):
+            if size - start <= self.min_size:
+                ends.append(size)
+                break
+            end = min(start + self.max_size, size)
+            normal = min(start + self.avg_size, end)
+            # A hash at position p (relative to the buffer) ends the chunk after byte p
+            low = start + self.min_size - 1
+            found = int(np.searchsorted(strict, low))
+            if found < len(strict) and strict[found] < normal:
+                end = int(strict[found]) + 1
+            else:
+                found = int(np.searchsorted(loose, max(low, normal - 1)))
+                if found < len(loose) and loose[found] < end:
+                    end = int(loose[found]) + 1
+            ends.append(end)
+            start = end
+        return ends
+
+    def split(self, blocks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield the chunks of a stream of blocks of any size"""
+        buffer = bytearray()
+        for block in blocks:
+            buffer += block
+            if len(buffer) < self.scan_size:
+                continue
+            data = bytes(buffer)
+            start = 0
+            for end in self._cut_points(data, final=False):
+                yield data[start:end]
+                start = end
+            del buffer[:start]
+        if buffer:
+            data = bytes(buffer)
+            start = 0
+            for end in self._cut_points(data, final=True):
+                yield data[start:end]
+                start = end
+
+    def split_bytes(self, data: bytes) -> List[Tuple[int, int]]:
+        """(offset, length) of every chunk of an in-memory buffer"""
+        spans, start = [], 0
+        for end in self._cut_points(data, final=True):
+            spans.append((start, end - start))
+            start = end
+        return spans
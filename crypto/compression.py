@@ -0,0 +1,148 @@
+# crypto/compression.py
+# Streaming compression applied before encryption, chosen per file from a sample of its first bytes
+
+import os
+import zlib
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Codecs a container header may name; "zlib" is a standard zlib stream (RFC 1950)
+CODECS = ("zlib",)
+DEFAULT_CODEC = "zlib"
+ZLIB_LEVEL = 6
+# Bytes from the start of a file used to estimate how well it compresses
+SAMPLE_SIZE = 64 * 1024
+# Compress only when the sample shrinks to at most this fraction of its size
+MAX_RATIO = 0.9
+# Most plaintext one decompression step may produce; zlib expands up to ~1000x, so
+# output is drained in steps of this size instead of all at once
+MAX_OUTPUT_STEP = 1024 * 1024
+
+# Extensions of formats that are already compressed (or encrypted)
+_COMPRESSED_EXTENSIONS = {
+    ".7z", ".aac", ".apk", ".avi", ".avif", ".br", ".bz2", ".docx", ".epub", ".flac", ".gif", ".gz",
+    ".heic", ".jar", ".jpeg", ".jpg", ".lz4", ".m4a", ".mkv", ".mov", ".mp3", ".mp4", ".odt", ".ogg",
+    ".opus", ".png", ".pptx", ".rar", ".tgz", ".webm", ".webp", ".xlsx", ".xz", ".zip", ".zst"
+}
+# Leading bytes of the same formats, for files uploaded without a telling name
+_COMPRESSED_SIGNATURES = (
+    b"\x1f\x8b",              # gzip
+    b"PK\x03\x04",            # zip and Office/OpenDocument files
+    b"\x28\xb5\x2f\xfd",      # zstd
+    b"\xfd7zXZ\x00",          # xz
+    b"BZh",                   # bzip2
+    b"7z\xbc\xaf\x27\x1c",    # 7-Zip
+    b"Rar!\x1a\x07",          # RAR
+    b"\x89PNG\r\n\x1a\n",     # PNG
+    b"\xff\xd8\xff",          # JPEG
+    b"GIF8",                  # GIF
+    b"OggS",                  # Ogg
+    b"fLaC",                  # FLAC
+    b"ID3",                   # MP3
+    b"\x1a\x45\xdf\xa3",      # Matroska / WebM
+    b"VAULTIS1",              # Already a Vaultis container
+)
+
+
+def is_precompressed(sample: bytes, filename: Optional[str] = None) -> bool:
+    """True if the name or leading bytes identify a format that will not compress further"""
+    if filename and os.path.splitext(filename)[1].lower() in _COMPRESSED_EXTENSIONS:
+        return True
+    if sample[4:8] == b"ftyp":
+        # MP4, MOV, HEIC and AVIF
+        return True
+    if sample[:4] == b"RIFF" and sample[8:12] == b"WEBP":
+        return True
+    return sample.startswith(_COMPRESSED_SIGNATURES)
+
+
+def choose_codec(sample: bytes, filename: Optional[str] = None) -> Optional[str]:
+    """
+    Codec worth applying to a file, judged from its first bytes
+
+    Known compressed formats are skipped outright; anything else is
+    compressed only if a fast trial compression of the sample saves at
+    least 1 - MAX_RATIO of it, so random or encrypted data costs one
+    small trial instead of a whole pass that makes the file bigger.
+
+    Returns:
+        str: Codec name, or None to store the file uncompressed
+    """
+    if not sample or is_precompressed(sample, filename):
+        return None
+    trial = zlib.compress(sample[:SAMPLE_SIZE], 1)
+    ratio = len(trial) / min(len(sample), SAMPLE_SIZE)
+    return DEFAULT_CODEC if ratio <= MAX_RATIO else None
+
+
+def peek(chunks: Iterable[bytes], size: int = SAMPLE_SIZE) -> Tuple[bytes, Iterator[bytes]]:
+    """
+    First `size` bytes of a block stream, and an iterator over the whole stream
+
+    Only the blocks needed for the sample are read ahead; the returned
+    iterator yields them again before the rest of the stream.
+    """
+    chunks = iter(chunks)
+    head: List[bytes] = []
+    read = 0
+    for block in chunks:
+        head.append(block)
+        read += len(block)
+        if read >= size:
+            break
+    return b"".join(head)[:size], chain(head, chunks)
+
+
+def _check(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported compression codec: {codec}")
+
+
+class Compressor:
+    """Incremental compressor; output of update() and finalize() concatenates to one stream"""
+
+    def __init__(self, codec: str = DEFAULT_CODEC):
+        _check(codec)
+        self.codec = codec
+        self._compressor = zlib.compressobj(ZLIB_LEVEL)
+
+    def update(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finalize(self) -> bytes:
+        return self._compressor.flush()
+
+
+class Decompressor:
+    """
+    Incremental decompressor for a Compressor stream
+
+    update() yields the output in pieces of at most `max_output` bytes, so
+    a highly compressed frame never has to be expanded in memory at once.
+    finalize() raises if the stream ended early, in addition to the
+    authentication the container already gives every frame.
+    """
+
+    def __init__(self, codec: str, max_output: int = MAX_OUTPUT_STEP):
+        _check(codec)
+        self.codec = codec
+        self.max_output = max_output
+        self._decompressor = zlib.decompressobj()
+
+    def update(self, data: bytes) -> Iterator[bytes]:
+        """Decompress `data`, yielding pieces of at most `max_output` bytes"""
+        try:
+            piece = self._decompressor.decompress(data, self.max_output)
+            while True:
+                if piece:
+                    yield piece
+                # A full piece may leave output pending even after all input was taken
+                if not self._decompressor.unconsumed_tail and len(piece) < self.max_output:
+                    return
+                piece = self._decompressor.decompress(self._decompressor.unconsumed_tail, self.max_output)
+        except zlib.error as e:
+            raise ValueError(f"Compressed payload is corrupt: {e}")
+
+    def finalize(self) -> None:
+        if not self._decompressor.eof or self._decompressor.unused_data:
+            raise ValueError("Compressed payload is truncated")
@@ -0,0 +1,94 @@
+# crypto/convergent.py
+# Owner-scoped convergent encryption of deduplicated chunks, and the manifest that lists them
+
+import hmac
+import json
+import base64
+import hashlib
+from typing import Tuple
+
+from crypto.streaming import StreamFormatError
+
+MANIFEST_CONTENT = "vaultis-dedup-manifest"
+MANIFEST_VERSION = 1
+
+# Each key encrypts exactly one plaintext (it is derived from it), so a fixed nonce is safe
+_NONCE = bytes(12)
+
+
+def chunk_keys(owner_secret: bytes, chunk: bytes) -> Tuple[bytes, bytes]:
+    """
+    Index id and encryption key of a chunk
+
+    Both are HMACs of the chunk's SHA-256 under the owner's secret: the
+    same chunk uploaded again by the same owner gets the same id and key
+    (so it can be found and reused), while other owners get unrelated ones.
+    Reuse within one owner's scope is observable (uploads report reused
+    chunks), so the scope must be an authenticated owner for other wallets
+    to learn nothing about which chunks it stored.
+
+    Returns:
+        tuple: (chunk_id, key), 32 bytes each
+    """
+    digest = hashlib.sha256(chunk).digest()
+    chunk_id = hmac.new(owner_secret, b"vaultis-chunk-id" + digest, hashlib.sha256).digest()
+    key = hmac.new(owner_secret, b"vaultis-chunk-key" + digest, hashlib.sha256).digest()
+    return chunk_id, key
+
+
+def _cipher(key: bytes):
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(key)
+
+
+def encrypt_chunk(key: bytes, chunk: bytes) -> bytes:
+    """AES-256-GCM ciphertext + tag of a chunk under its convergent key"""
+    return _cipher(key).encrypt(_NONCE, chunk, None)
+
+
+def decrypt_chunk(key: bytes, sealed: bytes) -> bytes:
+    """
+    Raises:
+        StreamFormatError: If the chunk fails authentication
+    """
+    try:
+        return _cipher(key).decrypt(_NONCE, sealed, None)
+    except Exception:
+        raise StreamFormatError("Deduplicated chunk failed authentication")
+
+
+def is_manifest(header: dict) -> bool:
+    """True if a container holds a chunk manifest rather than the file itself"""
+    return (header.get("metadata") or {}).get("content") == MANIFEST_CONTENT
+
+
+def encode_manifest(manifest: dict) -> bytes:
+    """
+    Serialize a manifest
+
+    Layout: {"version", "size", "chunker", "packs": [cid, ...],
+    "chunks": [[pack index, offset, sealed length, key (base64)], ...]}
+    """
+    return json.dumps(dict(manifest, version=MANIFEST_VERSION), separators=(',', ':')).encode('utf-8')
+
+
+def decode_manifest(data: bytes) -> dict:
+    """
+    Raises:
+        StreamFormatError: If data is not a manifest this version understands
+    """
+    try:
+        manifest = json.loads(data.decode('utf-8'))
+    except ValueError:
+        raise StreamFormatError("Chunk manifest is not valid JSON")
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise StreamFormatError("Unsupported chunk manifest version")
+    return manifest
+
+
+def manifest_key(encoded: str) -> bytes:
+    return base64.b64decode(encoded)
+
+
+def encode_key(key: bytes) -> str:
+    return base64.b64encode(key).decode('ascii')
@@ -4,10 +4,17 @@
 import os
 import json
 import base64
-import traceback
-from typing import Union, Tuple, Optional, Dict, Any
+import logging
+from typing import Union, Tuple, Optional, Dict, Any, Iterable, Iterator
 import sys
 
+# Ensure project root is in sys.path when run as a CLI script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crypto.streaming import MAGIC, StreamDecryptor, is_stream_container, iter_file
+
+logger = logging.getLogger(__name__)
+
 # For real Kyber implementation - multiple attempts to find working libraries
 KYBER_AVAILABLE = False
 OQS_AVAILABLE = False
@@ -17,13 +24,13 @@ PQCRYPTO_AVAILABLE = False
 try:
     import pqcrypto
     PQCRYPTO_AVAILABLE = True
-    print(f"[✅] pqcrypto found, version: {getattr(pqcrypto, '__version__', 'unknown')}")
+    logger.info("[✅] pqcrypto found, version: %s", getattr(pqcrypto, '__version__', 'unknown'))
     
     # Check what KEM algorithms are actually available
     try:
         import pqcrypto.kem
         available_kems = [attr for attr in dir(pqcrypto.kem) if not attr.startswith('_')]
-        print(f"[📋] Available KEMs: {available_kems}")
+        logger.info("[📋] Available KEMs: %s", available_kems)
         
         # Try to import Kyber variants (these might not exist)
         kyber512_decrypt = None
@@ -32,48 +39,48 @@ try:
         
         try:
             from pqcrypto.kem.kyber512 import decrypt as kyber512_decrypt
-            print("[✅] Kyber512 available in pqcrypto")
+            logger.info("[✅] Kyber512 available in pqcrypto")
         except ImportError:
-            print("[⚠️] Kyber512 not available in pqcrypto")
+            logger.warning("[⚠️] Kyber512 not available in pqcrypto")
             
         try:
             from pqcrypto.kem.kyber768 import decrypt as kyber768_decrypt
-            print("[✅] Kyber768 available in pqcrypto")
+            logger.info("[✅] Kyber768 available in pqcrypto")
         except ImportError:
-            print("[⚠️] Kyber768 not available in pqcrypto")
+            logger.warning("[⚠️] Kyber768 not available in pqcrypto")
             
         try:
             from pqcrypto.kem.kyber1024 import decrypt as kyber1024_decrypt
-            print("[✅] Kyber1024 available in pqcrypto")
+            logger.info("[✅] Kyber1024 available in pqcrypto")
         except ImportError:
-            print("[⚠️] Kyber1024 not available in pqcrypto")
+            logger.warning("[⚠️] Kyber1024 not available in pqcrypto")
             
         # Only set KYBER_AVAILABLE if at least one variant works
         if any([kyber512_decrypt, kyber768_decrypt, kyber1024_decrypt]):
             KYBER_AVAILABLE = True
             
     except ImportError as e:
-        print(f"[⚠️] pqcrypto.kem not available: {e}")
+        logger.warning("[⚠️] pqcrypto.kem not available: %s", e)
         
 except ImportError:
-    print("[⚠️] pqcrypto library not found. Install with: pip install pqcrypto")
+    logger.warning("[⚠️] pqcrypto library not found. Install with: pip install pqcrypto")
 
 # Try oqs-python as alternative
 try:
     import oqs
     OQS_AVAILABLE = True
-    print("[✅] OQS library found")
+    logger.info("[✅] OQS library found")
     
     # Test if Kyber algorithms are available
     try:
         test_kem = oqs.KeyEncapsulation('Kyber512')
-        print("[✅] Kyber algorithms available in OQS")
+        logger.info("[✅] Kyber algorithms available in OQS")
     except Exception as e:
-        print(f"[⚠️] Kyber not available in OQS: {e}")
+        logger.warning("[⚠️] Kyber not available in OQS: %s", e)
         OQS_AVAILABLE = False
         
 except ImportError:
-    print("[⚠️] OQS library not found. Install with: pip install git+https://github.com/open-quantum-safe/liboqs-python.git")
+    logger.warning("[⚠️] OQS library not found. Install with: pip install git+https://github.com/open-quantum-safe/liboqs-python.git")
 
 # Fallback: Mock implementation for development/testing
 class MockKyberDecryptor:
@@ -85,7 +92,7 @@ class MockKyberDecryptor:
         Mock decryption - just returns a deterministic "shared secret"
         DO NOT USE IN PRODUCTION!
         """
-        print("[⚠️] Using MOCK Kyber decryption - NOT SECURE!")
+        logger.warning("[⚠️] Using MOCK Kyber decryption - NOT SECURE!")
         # Generate a deterministic but fake shared secret for testing
         import hashlib
         fake_secret = hashlib.sha256(private_key + ciphertext[:32]).digest()
@@ -111,7 +118,7 @@ def detect_kyber_variant(private_key_bytes: bytes) -> str:
     elif key_size == 3168:  # Kyber-1024 private key size
         return 'kyber1024'
     else:
-        print(f"[⚠️] Unknown private key size: {key_size} bytes")
+        logger.warning("[⚠️] Unknown private key size: %s bytes", key_size)
         return 'kyber768'  # Default fallback
 
 def decrypt_with_pqcrypto(ciphertext: bytes, private_key: bytes, variant: str) -> bytes:
@@ -189,57 +196,91 @@ def decrypt_file_with_kyber(
         bool: True if decryption was successful, False otherwise
     """
     try:
-        print(f"[🔓] Starting Kyber decryption of {input_path}")
-        print(f"[🔑] Using private key: {private_key[:20]}... (truncated)")
+        logger.debug("[🔓] Starting Kyber decryption of %s", input_path)
         
         if use_quantum_enhanced:
-            print("[⚛️] Using quantum-enhanced mode for decryption")
+            logger.debug("[⚛️] Using quantum-enhanced mode for decryption")
+        
+        # Streaming containers are decrypted frame by frame
+        with open(input_path, 'rb') as f:
+            streaming = is_stream_container(f.read(len(MAGIC)))
+        if streaming:
+            with open(output_path, 'wb') as f:
+                for block in decrypt_stream_with_kyber(iter_file(input_path), private_key):
+                    f.write(block)
+            logger.debug("[✅] Kyber stream decryption successful, saved to %s", output_path)
+            return True
         
         # Read and parse the encrypted file
         encrypted_data = load_encrypted_file(input_path)
         
-        # Convert private key from string to bytes
-        private_key_bytes = decode_key(private_key)
-        
-        # Auto-detect Kyber variant if needed
-        if kyber_variant == 'auto':
-            kyber_variant = detect_kyber_variant(private_key_bytes)
-            
-        print(f"[🔧] Using Kyber variant: {kyber_variant}")
-        
         # Perform the actual Kyber decryption
-        decrypted_data = perform_kyber_decryption(
-            encrypted_data, 
-            private_key_bytes, 
-            kyber_variant,
-            allow_mock=allow_mock
-        )
+        decrypted_data = decrypt_legacy_with_kyber(encrypted_data, private_key, kyber_variant, allow_mock)
         
         # Save the decrypted data
         with open(output_path, 'wb') as f:
             f.write(decrypted_data)
             
-        print(f"[✅] Kyber decryption successful, saved to {output_path}")
+        logger.debug("[✅] Kyber decryption successful, saved to %s", output_path)
         return True
         
     except Exception as e:
-        print(f"[❌] Kyber decryption failed: {str(e)}")
-        traceback.print_exc()
+        logger.exception("[❌] Kyber decryption failed: %s", e)
         return False
 
-def load_encrypted_file(file_path: str) -> Dict[str, Any]:
+def decrypt_stream_with_kyber(chunks: Iterable[bytes], private_key: str) -> Iterator[bytes]:
     """
-    Load and parse encrypted file data
+    Decrypt a streaming container produced by encrypt_stream_with_kyber
     
     Args:
-        file_path: Path to encrypted file
+        chunks: Ciphertext blocks of any size, e.g. a gateway response
+        private_key: The Kyber private key of a recipient
         
     Returns:
-        Dict containing parsed encrypted data
+        Iterator[bytes]: Authenticated plaintext blocks; raises StreamFormatError
+        if the stream is tampered with or truncated
     """
-    with open(file_path, 'r') as f:
-        content = f.read()
+    return StreamDecryptor(private_key).decrypt_iter(chunks)
+
+def decrypt_legacy_with_kyber(
+    encrypted_data: Dict[str, Any],
+    private_key: str,
+    kyber_variant: str = 'auto',
+    allow_mock: bool = False
+) -> bytes:
+    """
+    Decrypt the single-shot JSON format used before the streaming container
     
+    Args:
+        encrypted_data: Parsed JSON with kyber_ciphertext, encrypted_data and nonce
+        private_key: The private key (base64 encoded string or hex string)
+        kyber_variant: Kyber variant or 'auto'
+        allow_mock: Whether to allow mock decryption for testing
+        
+    Returns:
+        bytes: Decrypted data
+    """
+    # Convert private key from string to bytes
+    private_key_bytes = decode_key(private_key)
+    
+    # Auto-detect Kyber variant if needed
+    if kyber_variant == 'auto':
+        kyber_variant = detect_kyber_variant(private_key_bytes)
+        
+    logger.debug("[🔧] Using Kyber variant: %s", kyber_variant)
+    
+    return perform_kyber_decryption(encrypted_data, private_key_bytes, kyber_variant, allow_mock=allow_mock)
+
+def parse_encrypted_content(content: str) -> Dict[str, Any]:
+    """
+    Parse the JSON document of the legacy encrypted format
+    
+    Args:
+        content: File content as text
+        
+    Returns:
+        Dict containing parsed encrypted data
+    """
     try:
         # Try to parse as JSON first
         data = json.loads(content)
@@ -254,6 +295,19 @@ def load_encrypted_file(file_path: str) -> Dict[str, Any]:
     except json.JSONDecodeError:
         raise ValueError("Encrypted file is not in valid JSON format")
 
+def load_encrypted_file(file_path: str) -> Dict[str, Any]:
+    """
+    Load and parse encrypted file data
+    
+    Args:
+        file_path: Path to encrypted file
+        
+    Returns:
+        Dict containing parsed encrypted data
+    """
+    with open(file_path, 'r') as f:
+        return parse_encrypted_content(f.read())
+
 def decode_key(key_string: str) -> bytes:
     """
     Convert key string to bytes (supports base64 and hex)
@@ -298,20 +352,22 @@ def perform_kyber_decryption(
     encrypted_content = base64.b64decode(encrypted_data['encrypted_data'])
     nonce = base64.b64decode(encrypted_data['nonce'])
     
-    print(f"[🔧] Kyber ciphertext size: {len(kyber_ciphertext)} bytes")
-    print(f"[🔧] Encrypted content size: {len(encrypted_content)} bytes")
+    logger.debug(
+        "[🔧] Kyber ciphertext size: %s bytes, encrypted content size: %s bytes",
+        len(kyber_ciphertext), len(encrypted_content)
+    )
     
     # Step 1: Use Kyber to decrypt the shared secret
     shared_secret = None
     
     if KYBER_AVAILABLE:
-        print("[🔧] Using pqcrypto library for Kyber decryption")
+        logger.debug("[🔧] Using pqcrypto library for Kyber decryption")
         shared_secret = decrypt_with_pqcrypto(kyber_ciphertext, private_key, variant)
     elif OQS_AVAILABLE:
-        print("[🔧] Using OQS library for Kyber decryption")  
+        logger.debug("[🔧] Using OQS library for Kyber decryption")
         shared_secret = decrypt_with_oqs(kyber_ciphertext, private_key, variant)
     elif allow_mock:
-        print("[🔧] Using MOCK Kyber decryption (NOT SECURE!)")
+        logger.warning("[⚠️] Using MOCK Kyber decryption (NOT SECURE!)")
         mock_decryptor = MockKyberDecryptor()
         shared_secret = mock_decryptor.decrypt(kyber_ciphertext, private_key)
     else:
@@ -321,7 +377,7 @@ def perform_kyber_decryption(
             "  Or run with --allow-mock for testing (NOT SECURE!)"
         )
     
-    print(f"[🔑] Recovered shared secret: {len(shared_secret)} bytes")
+    logger.debug("[🔑] Recovered shared secret: %s bytes", len(shared_secret))
     
     # Step 2: Use the shared secret to decrypt the actual data (typically with AES)
     decrypted_content = decrypt_with_aes(encrypted_content, shared_secret, nonce)
@@ -358,21 +414,21 @@ def decrypt_with_aes(encrypted_data: bytes, key: bytes, nonce: bytes) -> bytes:
         aesgcm = AESGCM(aes_key)
         decrypted = aesgcm.decrypt(nonce, encrypted_data, None)
         
-        print("[🔓] AES decryption successful")
+        logger.debug("[🔓] AES decryption successful")
         return decrypted
         
     except ImportError:
-        print("[⚠️] cryptography library not found. Install with: pip install cryptography")
+        logger.warning("[⚠️] cryptography library not found. Install with: pip install cryptography")
         raise
     except Exception as e:
-        print(f"[❌] AES decryption failed: {str(e)}")
+        logger.error("[❌] AES decryption failed: %s", e)
         raise
 
 def verify_installation():
     """
     Verify that required libraries are installed
     """
-    print("[🔍] Checking required libraries...")
+    logger.debug("[🔍] Checking required libraries...")
     
     libraries = []
     if KYBER_AVAILABLE:
@@ -394,22 +450,24 @@ def verify_installation():
         libraries.append("❌ cryptography - Not available (pip install cryptography)")
     
     for lib in libraries:
-        print(f"  {lib}")
+        logger.debug("  %s", lib)
     
     has_kyber = KYBER_AVAILABLE or OQS_AVAILABLE
     
     if not has_kyber:
-        print("\n[⚠️] No Kyber implementation found!")
-        print("Install one of these:")
-        print("  pip install git+https://github.com/open-quantum-safe/liboqs-python.git")
-        print("  Or check if your pqcrypto version supports Kyber")
-        print("\nFor testing only, you can use --allow-mock (NOT SECURE!)")
+        logger.warning(
+            "[⚠️] No Kyber implementation found! Install liboqs-python "
+            "(pip install git+https://github.com/open-quantum-safe/liboqs-python.git) "
+            "or check if your pqcrypto version supports Kyber. "
+            "For testing only, you can use --allow-mock (NOT SECURE!)"
+        )
         return False
         
     return True
 
 # CLI interface
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
     print("🔐 Kyber Decryption Tool")
     print("=" * 40)
     
@@ -0,0 +1,48 @@
+# crypto/digests.py
+# Incremental multi-algorithm hashing for data that is only seen once
+
+import hashlib
+from typing import Dict, Iterable
+
+# Names used in the security settings mapped to hashlib constructors
+HASH_ALGORITHMS = {
+    "SHA-256": hashlib.sha256,
+    "SHA-3": hashlib.sha3_256,
+    "BLAKE2": hashlib.blake2b,
+}
+DEFAULT_HASH_ALGORITHM = "SHA-256"
+
+
+class MultiDigest:
+    """
+    Feed bytes once and get a digest for every configured algorithm
+
+    Unknown algorithm names fall back to SHA-256, matching how the settings
+    have always been interpreted.
+    """
+
+    def __init__(self, algorithms: Iterable[str] = (DEFAULT_HASH_ALGORITHM,)):
+        self._hashes = {}
+        for name in algorithms:
+            if name not in HASH_ALGORITHMS:
+                name = DEFAULT_HASH_ALGORITHM
+            if name not in self._hashes:
+                self._hashes[name] = HASH_ALGORITHMS[name]()
+        if not self._hashes:
+            self._hashes[DEFAULT_HASH_ALGORITHM] = HASH_ALGORITHMS[DEFAULT_HASH_ALGORITHM]()
+
+    @property
+    def algorithms(self):
+        return list(self._hashes)
+
+    def update(self, data: bytes) -> None:
+        for digest in self._hashes.values():
+            digest.update(data)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: digest.hexdigest() for name, digest in self._hashes.items()}
+
+    def hexdigest(self, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+        if algorithm not in self._hashes:
+            algorithm = DEFAULT_HASH_ALGORITHM if DEFAULT_HASH_ALGORITHM in self._hashes else self.algorithms[0]
+        return self._hashes[algorithm].hexdigest()
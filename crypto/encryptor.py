@@ -1,7 +1,12 @@
 import base64
 import hashlib
+import logging
 from crypto.pqc import kyber, sphincs, dilithium
 from .file_utils import read_file_as_bytes, save_bytes_to_file
+from .streaming import StreamEncryptor, DEFAULT_CHUNK_SIZE
+from .compression import choose_codec, peek
+
+logger = logging.getLogger(__name__)
 
 
 def encrypt_file_with_kyber(input_path, output_path):
@@ -18,7 +23,7 @@ def encrypt_file_with_kyber(input_path, output_path):
     try:
         # 🔐 Step 1: Generate Kyber keys
         public_key, private_key = kyber.generate_keys()
-        print("[🔑] Kyber keys generated.")
+        logger.debug("[🔑] Kyber keys generated.")
         
         # Ensure public key is properly formatted
         if isinstance(public_key, bytes):
@@ -26,29 +31,64 @@ def encrypt_file_with_kyber(input_path, output_path):
         else:
             public_key_str = str(public_key)
         
-        print(f"[🔑] Public key format: {type(public_key_str)}")
-        print(f"[🔑] Public key sample: {public_key_str[:30]}...")
-
         # 📥 Step 2: Read file and base64 encode its content
         file_data = read_file_as_bytes(input_path)
         encoded_data = base64.b64encode(file_data).decode()
-        print(f"[📦] File encoded for encryption. Size: {len(encoded_data)} characters")
+        logger.debug("[📦] File encoded for encryption. Size: %s characters", len(encoded_data))
 
         # 🔒 Step 3: Encrypt encoded data using Kyber
         encrypted = kyber.encrypt(encoded_data, public_key_str)
-        print("[🔐] File encrypted successfully.")
+        logger.debug("[🔐] File encrypted successfully.")
 
         # 💾 Step 4: Save encrypted data to file
         save_bytes_to_file(encrypted.encode(), output_path)
-        print(f"[✔] Encrypted file saved to: {output_path}")
+        logger.debug("[✔] Encrypted file saved to: %s", output_path)
 
         return encrypted, public_key_str, private_key
 
     except Exception as e:
-        print(f"[❌] Kyber encryption failed: {e}")
+        logger.exception("[❌] Kyber encryption failed: %s", e)
         return None, None, None
 
 
+def encrypt_stream_with_kyber(
+    chunks, chunk_size=DEFAULT_CHUNK_SIZE, digests=(), recipients=None, metadata=None,
+    compression=None, filename=None
+):
+    """
+    Encrypts a stream of plaintext blocks with a fresh Kyber key pair, without
+    ever holding the whole file in memory or on disk.
+
+    Args:
+        chunks (Iterable[bytes]): Plaintext blocks, e.g. a request body stream.
+        chunk_size (int): Plaintext bytes per authenticated frame.
+        digests (Iterable[str]): Hash algorithms ("SHA-256", "SHA-3", "BLAKE2")
+            computed over the ciphertext as it is produced; read them from
+            encryptor.digests once the iterator is exhausted.
+        recipients (dict): Further {label: Kyber public key} that can open the
+            file with their own private key; the payload is still encrypted once.
+        metadata (dict): Stored unencrypted in the container header.
+        compression (str): Codec applied before encryption, or "auto" to pick
+            one from the first block (already compressed formats are skipped).
+        filename (str): Original name, a hint for "auto".
+
+    Returns:
+        tuple: (ciphertext_iterator, public_key, private_key, encryptor)
+    """
+    public_key, private_key = kyber.generate_keys()
+    if not public_key:
+        raise RuntimeError("Kyber key generation failed")
+    if compression == "auto":
+        sample, chunks = peek(chunks)
+        compression = choose_codec(sample, filename)
+    encryptor = StreamEncryptor(
+        public_key, chunk_size=chunk_size, metadata=metadata, digests=digests, recipients=recipients,
+        compression=compression
+    )
+    logger.debug("[🔐] Streaming encryption started (chunk size %s, compression %s)", chunk_size, compression or "off")
+    return encryptor.encrypt_iter(chunks), public_key, private_key, encryptor
+
+
 def sign_file_with_sphincs(data, private_key="sphincs_priv"):
     """
     Digitally signs data using SPHINCS+.
@@ -61,7 +101,7 @@ def sign_file_with_sphincs(data, private_key="sphincs_priv"):
         str: Signature
     """
     hashed_data = hashlib.sha256(data.encode()).hexdigest()
-    print("[✍️] Signing with SPHINCS+...")
+    logger.debug("[✍️] Signing with SPHINCS+...")
     return sphincs.sign(hashed_data, private_key)
 
 
@@ -78,7 +118,7 @@ def verify_signature_with_sphincs(signature, data, public_key="sphincs_pub"):
         bool: True if valid, False otherwise.
     """
     hashed_data = hashlib.sha256(data.encode()).hexdigest()
-    print("[🔎] Verifying SPHINCS+ signature...")
+    logger.debug("[🔎] Verifying SPHINCS+ signature...")
     return sphincs.verify(signature, hashed_data, public_key)
 
 
@@ -94,7 +134,7 @@ def sign_file_with_dilithium(data, private_key="dilithium_priv"):
         str: Signature
     """
     hashed_data = hashlib.sha256(data.encode()).hexdigest()
-    print("[✍️] Signing with Dilithium...")
+    logger.debug("[✍️] Signing with Dilithium...")
     return dilithium.sign(hashed_data, private_key)
 
 
@@ -111,5 +151,5 @@ def verify_signature_with_dilithium(signature, data, public_key="dilithium_pub")
         bool: True if valid, False otherwise.
     """
     hashed_data = hashlib.sha256(data.encode()).hexdigest()
-    print("[🔎] Verifying Dilithium signature...")
+    logger.debug("[🔎] Verifying Dilithium signature...")
     return dilithium.verify(signature, hashed_data, public_key)
\ No newline at end of file
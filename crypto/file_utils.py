@@ -1,3 +1,8 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
 def read_file_as_bytes(file_path):
     """
     Read a file from disk and return its contents as bytes.
@@ -12,7 +17,7 @@ def read_file_as_bytes(file_path):
         with open(file_path, 'rb') as file:
             return file.read()
     except Exception as e:
-        print(f"[❌] Error reading file {file_path}: {e}")
+        logger.error("[❌] Error reading file %s: %s", file_path, e)
         raise
 
 def save_bytes_to_file(data, file_path):
@@ -27,5 +32,5 @@ def save_bytes_to_file(data, file_path):
         with open(file_path, 'wb') as file:
             file.write(data)
     except Exception as e:
-        print(f"[❌] Error saving to file {file_path}: {e}")
+        logger.error("[❌] Error saving to file %s: %s", file_path, e)
         raise
\ No newline at end of file
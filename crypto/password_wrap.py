@@ -0,0 +1,126 @@
+# crypto/password_wrap.py
+# Password-based wrapping of private keys: scrypt (memory-hard KDF) + AES-256-GCM
+
+import os
+import json
+import base64
+import hashlib
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# scrypt cost: memory use is 128 * n * r bytes per derivation (32 MiB with the defaults).
+# Calibrate with backend/benchmarks/bench_kdf.py before raising these.
+SCRYPT_N = int(os.getenv("VAULTIS_SCRYPT_N", 2 ** 15))
+SCRYPT_R = int(os.getenv("VAULTIS_SCRYPT_R", 8))
+SCRYPT_P = int(os.getenv("VAULTIS_SCRYPT_P", 1))
+
+WRAP_FORMAT = "vaultis-pwwrap"
+WRAP_VERSION = 1
+_SALT_SIZE = 16
+_AAD = b"vaultis-private-key"
+
+
+class ScryptParams:
+    """
+    scrypt cost parameters
+
+    Args:
+        n (int): CPU/memory cost, a power of two
+        r (int): Block size
+        p (int): Parallelism
+    """
+
+    __slots__ = ("n", "r", "p")
+
+    def __init__(self, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P):
+        if n < 2 or n & (n - 1):
+            raise ValueError("scrypt n must be a power of two greater than 1")
+        self.n = n
+        self.r = r
+        self.p = p
+
+    @property
+    def memory_bytes(self) -> int:
+        return 128 * self.n * self.r * self.p
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "r": self.r, "p": self.p}
+
+
+def derive_key(password: str, salt: bytes, params: ScryptParams) -> bytes:
+    """
+    Derive a 32-byte wrapping key from a password (hashlib.scrypt releases the GIL)
+    """
+    return hashlib.scrypt(
+        password.encode('utf-8'),
+        salt=salt,
+        n=params.n,
+        r=params.r,
+        p=params.p,
+        maxmem=params.memory_bytes + 1024 * 1024,
+        dklen=32
+    )
+
+
+def _aesgcm():
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM
+
+
+def wrap_private_key(private_key: str, password: str, params: Optional[ScryptParams] = None) -> bytes:
+    """
+    Encrypt a private key under a password
+
+    Args:
+        private_key (str): The key to protect
+        password (str): User password
+        params (ScryptParams): KDF cost, defaults to the configured cost
+
+    Returns:
+        bytes: Self-describing JSON blob holding the KDF parameters, salt, nonce and ciphertext
+    """
+    params = params or ScryptParams()
+    salt = os.urandom(_SALT_SIZE)
+    nonce = os.urandom(12)
+    ciphertext = _aesgcm()(derive_key(password, salt, params)).encrypt(nonce, private_key.encode('utf-8'), _AAD)
+    return json.dumps({
+        "format": WRAP_FORMAT,
+        "version": WRAP_VERSION,
+        "kdf": "scrypt",
+        "kdf_params": params.to_dict(),
+        "salt": base64.b64encode(salt).decode('ascii'),
+        "nonce": base64.b64encode(nonce).decode('ascii'),
+        "ciphertext": base64.b64encode(ciphertext).decode('ascii')
+    }, separators=(',', ':')).encode('utf-8')
+
+
+def unwrap_private_key(blob: bytes, password: str) -> str:
+    """
+    Recover a private key wrapped by wrap_private_key
+
+    The stored KDF parameters are used, so keys wrapped under an older cost
+    setting keep working after the configured cost changes.
+
+    Raises:
+        ValueError: If the blob is malformed or the password is wrong
+    """
+    try:
+        wrapped = json.loads(blob)
+        if wrapped.get("format") != WRAP_FORMAT or wrapped.get("kdf") != "scrypt":
+            raise ValueError("Unsupported wrapped key format")
+        params = ScryptParams(**wrapped["kdf_params"])
+        salt = base64.b64decode(wrapped["salt"])
+        nonce = base64.b64decode(wrapped["nonce"])
+        ciphertext = base64.b64decode(wrapped["ciphertext"])
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed wrapped key: {e}")
+
+    from cryptography.exceptions import InvalidTag
+
+    key = derive_key(password, salt, params)
+    try:
+        return _aesgcm()(key).decrypt(nonce, ciphertext, _AAD).decode('utf-8')
+    except InvalidTag:
+        raise ValueError("Incorrect password")
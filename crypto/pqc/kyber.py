@@ -1,7 +1,10 @@
 import base64
+import logging
 import secrets
 import uuid
 
+logger = logging.getLogger(__name__)
+
 # Simulated Kyber KEM functions
 
 def generate_keys():
@@ -23,11 +26,11 @@ def generate_keys():
         random_data = base64.b64encode(secrets.token_bytes(32)).decode('utf-8')
         public_key = f"{public_key_base}_{random_data}"
         
-        print(f"[✅] Generated unique simulated Kyber key pair: {key_id}")
+        logger.debug("[✅] Generated unique simulated Kyber key pair: %s", key_id)
         
         return public_key, private_key
     except Exception as e:
-        print(f"[❌] Error generating Kyber keys: {e}")
+        logger.error("[❌] Error generating Kyber keys: %s", e)
         return None, None
 
 def encrypt(data, public_key):
@@ -57,10 +60,10 @@ def encrypt(data, public_key):
         encoded_data = base64.b64encode(data.encode()).decode()
         encrypted = f"kyber_encrypted({encoded_data})_with_{public_key}"
         
-        print(f"[✅] Data encrypted with simulated Kyber using key ID: {key_id}")
+        logger.debug("[✅] Data encrypted with simulated Kyber using key ID: %s", key_id)
         return encrypted
     except Exception as e:
-        print(f"[❌] Kyber encryption error: {e}")
+        logger.error("[❌] Kyber encryption error: %s", e)
         return None
 
 def decrypt(encrypted_data, private_key):
@@ -88,10 +91,58 @@ def decrypt(encrypted_data, private_key):
                 encoded_part = encrypted_data[len(prefix):close_paren_idx]
                 decoded_data = base64.b64decode(encoded_part.encode()).decode()
                 
-                print(f"[✅] Data successfully decrypted with simulated Kyber")
+                logger.debug("[✅] Data successfully decrypted with simulated Kyber")
                 return decoded_data
         
         raise ValueError("Invalid encrypted format or mismatched key")
     except Exception as e:
-        print(f"[❌] Kyber decryption error: {e}")
-        return f"[Decryption Error] {str(e)}"
\ No newline at end of file
+        logger.error("[❌] Kyber decryption error: %s", e)
+        return f"[Decryption Error] {str(e)}"
+
+def _key_id(key):
+    """
+    Extract the key pair identifier from a simulated public or private key
+    """
+    if isinstance(key, bytes):
+        key = key.decode('utf-8')
+    key_parts = key.split('_')
+    if len(key_parts) < 3 or key_parts[0] != "kyber":
+        raise ValueError("Not a Kyber key")
+    return key_parts[2]
+
+
+def encapsulate(public_key):
+    """
+    Simulate Kyber key encapsulation
+
+    Args:
+        public_key (str): Kyber public key
+
+    Returns:
+        tuple: (kem_ciphertext, shared_secret) - str and 32 bytes
+    """
+    shared_secret = secrets.token_bytes(32)
+    kem_ciphertext = f"kyber_kem({base64.b64encode(shared_secret).decode()})_for_{_key_id(public_key)}"
+    logger.debug("[✅] Shared secret encapsulated for key ID: %s", _key_id(public_key))
+    return kem_ciphertext, shared_secret
+
+
+def decapsulate(kem_ciphertext, private_key):
+    """
+    Simulate Kyber key decapsulation
+
+    Args:
+        kem_ciphertext (str): Output of encapsulate()
+        private_key (str): Kyber private key
+
+    Returns:
+        bytes: The 32-byte shared secret
+
+    Raises:
+        ValueError: If the ciphertext is malformed or was made for another key
+    """
+    prefix = "kyber_kem("
+    suffix = f")_for_{_key_id(private_key)}"
+    if not kem_ciphertext.startswith(prefix) or not kem_ciphertext.endswith(suffix):
+        raise ValueError("Invalid KEM ciphertext or mismatched key")
+    return base64.b64decode(kem_ciphertext[len(prefix):-len(suffix)])
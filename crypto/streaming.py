@@ -0,0 +1,520 @@
+# crypto/streaming.py
+# Chunked Kyber + AES-256-GCM container that can be encrypted and decrypted incrementally
+#
+# Layout:
+#   MAGIC (8 bytes) | header length (4 bytes, big endian) | header (JSON) | frames...
+#   frame = length (4 bytes, big endian, top bit = final frame) | AES-GCM ciphertext + tag
+#
+# A random 32-byte data key encrypts the payload. The data key is wrapped with a key
+# derived from a Kyber shared secret and stored in the header. Every frame uses the
+# nonce prefix || frame counter || final flag (the STREAM construction), so frames
+# cannot be reordered, dropped or truncated without failing authentication. When the
+# header names a "compression" codec, the frames hold the compressed plaintext.
+# Frames are authenticated with the stream id as associated data, followed by the codec
+# for compressed streams, so the header's compression field cannot be edited either.
+
+import os
+import json
+import time
+import base64
+import struct
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from crypto.pqc import kyber
+from crypto.digests import MultiDigest
+from crypto.compression import Compressor, Decompressor
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VAULTIS1"
+FORMAT_NAME = "vaultis-stream"
+FORMAT_VERSION = 1
+CIPHER = "AES-256-GCM"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_HEADER_SIZE = 1024 * 1024
+# MAGIC plus the header length field
+HEADER_PREFIX_SIZE = len(MAGIC) + 4
+
+_FINAL_FLAG = 0x80000000
+_TAG_SIZE = 16
+_NONCE_PREFIX_SIZE = 7
+_MAX_FRAMES = 2 ** 32 - 1
+
+
+class StreamFormatError(ValueError):
+    """Raised when a container is malformed, truncated or fails authentication"""
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data)
+
+
+def _aesgcm():
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        logger.warning("[⚠️] cryptography library not found. Install with: pip install cryptography")
+        raise
+    return AESGCM
+
+
+def _derive_kek(shared_secret: bytes, stream_id: bytes) -> bytes:
+    """
+    Derive the key-encryption key for one recipient from a Kyber shared secret
+    """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=stream_id, info=b'vaultis-stream-kek')
+    return hkdf.derive(shared_secret)
+
+
+def _frame_nonce(prefix: bytes, counter: int, final: bool) -> bytes:
+    return prefix + struct.pack(">IB", counter, 1 if final else 0)
+
+
+def _frame_aad(stream_id: bytes, compression: Optional[str]) -> bytes:
+    # Uncompressed streams keep the original associated data, so existing containers still open
+    return stream_id + b"|compression=" + compression.encode() if compression else stream_id
+
+
+def wrap_data_key(data_key: bytes, public_key: str, stream_id: bytes) -> Dict[str, str]:
+    """
+    Wrap a data key for one recipient's Kyber public key
+
+    Returns:
+        dict: Recipient entry for the container header
+    """
+    kem_ciphertext, shared_secret = kyber.encapsulate(public_key)
+    wrap_nonce = os.urandom(12)
+    wrapped_key = _aesgcm()(_derive_kek(shared_secret, stream_id)).encrypt(wrap_nonce, data_key, stream_id)
+    return {
+        "kem_ciphertext": kem_ciphertext,
+        "wrap_nonce": _b64(wrap_nonce),
+        "wrapped_key": _b64(wrapped_key)
+    }
+
+
+def _open_recipient(header: dict, private_key: str) -> Tuple[int, bytes]:
+    """(position, data key) of the first recipient entry that private_key opens"""
+    stream_id = _unb64(header["stream_id"])
+    for position, recipient in enumerate(header.get("recipients", [])):
+        try:
+            shared_secret = kyber.decapsulate(recipient["kem_ciphertext"], private_key)
+            kek = _derive_kek(shared_secret, stream_id)
+            return position, _aesgcm()(kek).decrypt(_unb64(recipient["wrap_nonce"]), _unb64(recipient["wrapped_key"]), stream_id)
+        except Exception:
+            continue
+    raise StreamFormatError("Private key does not match any recipient of this file")
+
+
+def unwrap_data_key(header: dict, private_key: str) -> bytes:
+    """
+    Recover the data key from the first recipient entry that matches private_key
+
+    Raises:
+        StreamFormatError: If no recipient entry can be opened with this key
+    """
+    return _open_recipient(header, private_key)[1]
+
+
+def wrap_for_recipients(header: dict, private_key: str, recipients: Dict[str, str]) -> List[Dict[str, str]]:
+    """
+    Wrap the data key of `header` for more recipients
+
+    Args:
+        header (dict): Container header that private_key can open
+        private_key (str): Any key that is already a recipient
+        recipients (dict): {label: Kyber public key}, e.g. wallet address -> key
+
+    Returns:
+        list: Recipient entries (tagged with their label) to append to the header
+
+    Raises:
+        StreamFormatError: If private_key cannot open the header
+    """
+    data_key = unwrap_data_key(header, private_key)
+    stream_id = _unb64(header["stream_id"])
+    return [dict(wrap_data_key(data_key, key, stream_id), recipient=label) for label, key in recipients.items()]
+
+
+def rewrap_header(header: dict, private_key: str, public_keys: List[str]) -> dict:
+    """
+    Copy of `header` with the entry private_key opens wrapped for `public_keys` instead
+
+    Only that recipient entry changes; other recipients keep theirs and the
+    payload frames stay valid, so rotating a file's key never touches more
+    than its header.
+
+    Raises:
+        StreamFormatError: If private_key cannot open the header
+    """
+    position, data_key = _open_recipient(header, private_key)
+    stream_id = _unb64(header["stream_id"])
+    recipients = list(header.get("recipients", []))
+    recipients[position:position + 1] = [wrap_data_key(data_key, key, stream_id) for key in public_keys]
+    rewrapped = dict(header)
+    rewrapped["recipients"] = recipients
+    return rewrapped
+
+
+def encode_header(header: dict) -> bytes:
+    """Serialize a header dict as MAGIC | length | JSON"""
+    body = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return MAGIC + struct.pack(">I", len(body)) + body
+
+
+def header_size(prefix: bytes) -> int:
+    """
+    Bytes taken by MAGIC | length | header, read from the first HEADER_PREFIX_SIZE bytes
+
+    Raises:
+        StreamFormatError: If prefix is not the start of a container
+    """
+    if len(prefix) < HEADER_PREFIX_SIZE or not is_stream_container(prefix):
+        raise StreamFormatError("Not a Vaultis stream container")
+    (header_length,) = struct.unpack(">I", prefix[len(MAGIC):HEADER_PREFIX_SIZE])
+    if header_length > MAX_HEADER_SIZE:
+        raise StreamFormatError("Container header too large")
+    return HEADER_PREFIX_SIZE + header_length
+
+
+def decode_header(data: bytes) -> dict:
+    """
+    Parse the header from the first header_size() bytes of a container
+
+    Raises:
+        StreamFormatError: If data is not a complete container header
+    """
+    size = header_size(data)
+    if len(data) < size:
+        raise StreamFormatError("Container header is truncated")
+    try:
+        header = json.loads(bytes(data[HEADER_PREFIX_SIZE:size]).decode('utf-8'))
+    except ValueError:
+        # Also covers UnicodeDecodeError
+        raise StreamFormatError("Container header is not valid JSON")
+    if not isinstance(header, dict):
+        raise StreamFormatError("Container header is not a JSON object")
+    return header
+
+
+def is_stream_container(prefix: bytes) -> bool:
+    """Check whether data starts with the streaming container magic"""
+    return prefix[:len(MAGIC)] == MAGIC
+
+
+class StreamEncryptor:
+    """
+    Incremental encryptor producing the streaming container
+
+    Feed plaintext with update() in any block size and call finalize() once.
+    Both return ciphertext bytes that can be written or uploaded immediately.
+    Every emitted byte also feeds `self.digests`, so hashes of the complete
+    container are available after finalize() without another pass.
+
+    The payload is encrypted once; `recipients` adds a labelled entry that
+    wraps the same data key for each further public key (e.g. wallets the
+    file is shared with), and wrap_for_recipients() can append more later.
+
+    With `compression`, plaintext is compressed with that codec (see
+    crypto/compression.py) before it is split into frames, and the codec is
+    recorded in the header so StreamDecryptor reverses it.
+    """
+
+    def __init__(
+        self,
+        public_keys: Union[str, List[str]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        metadata: Optional[dict] = None,
+        digests: Iterable[str] = (),
+        recipients: Optional[Dict[str, str]] = None,
+        compression: Optional[str] = None
+    ):
+        if isinstance(public_keys, str):
+            public_keys = [public_keys]
+        if not public_keys:
+            raise ValueError("At least one recipient public key is required")
+
+        self.chunk_size = chunk_size
+        self.stream_id = os.urandom(16)
+        self._nonce_prefix = os.urandom(_NONCE_PREFIX_SIZE)
+        self._data_key = os.urandom(32)
+        self._cipher = _aesgcm()(self._data_key)
+        self._buffer = bytearray()
+        self._counter = 0
+        self._header_sent = False
+        self._finalized = False
+        self._compressor = Compressor(compression) if compression else None
+        self._aad = _frame_aad(self.stream_id, compression)
+
+        self.plaintext_bytes = 0
+        # Bytes sealed into frames: the plaintext after compression
+        self.payload_bytes = 0
+        self.ciphertext_bytes = 0
+        self.encrypt_seconds = 0.0
+        self.digests = MultiDigest(digests) if digests else None
+
+        self.header = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "cipher": CIPHER,
+            "chunk_size": chunk_size,
+            "stream_id": _b64(self.stream_id),
+            "nonce_prefix": _b64(self._nonce_prefix),
+            "recipients": [wrap_data_key(self._data_key, key, self.stream_id) for key in public_keys] + [
+                dict(wrap_data_key(self._data_key, key, self.stream_id), recipient=label)
+                for label, key in (recipients or {}).items()
+            ]
+        }
+        if compression:
+            self.header["compression"] = compression
+        if metadata:
+            self.header["metadata"] = metadata
+
+    @property
+    def compression(self) -> Optional[str]:
+        return self._compressor.codec if self._compressor else None
+
+    def _emit(self, out: bytearray) -> bytes:
+        if not self._header_sent:
+            out[0:0] = encode_header(self.header)
+            self._header_sent = True
+        self.ciphertext_bytes += len(out)
+        if self.digests is not None:
+            self.digests.update(out)
+        return bytes(out)
+
+    def _seal(self, chunk: bytes, final: bool, out: bytearray) -> None:
+        if self._counter >= _MAX_FRAMES:
+            raise OverflowError("Stream too long for a single container")
+        started = time.perf_counter()
+        sealed = self._cipher.encrypt(_frame_nonce(self._nonce_prefix, self._counter, final), chunk, self._aad)
+        self.encrypt_seconds += time.perf_counter() - started
+        out += struct.pack(">I", len(sealed) | (_FINAL_FLAG if final else 0))
+        out += sealed
+        self._counter += 1
+        self.payload_bytes += len(chunk)
+
+    def _seal_full_chunks(self, out: bytearray) -> None:
+        # The last full chunk stays buffered: it may turn out to be the final frame
+        while len(self._buffer) > self.chunk_size:
+            self._seal(bytes(self._buffer[:self.chunk_size]), False, out)
+            del self._buffer[:self.chunk_size]
+
+    def update(self, data: bytes) -> bytes:
+        """
+        Add plaintext and return any ciphertext that is ready
+
+        The last full chunk is held back until more data arrives or finalize()
+        is called, because only then is it known whether it is the final frame.
+        """
+        if self._finalized:
+            raise ValueError("Encryptor already finalized")
+        self.plaintext_bytes += len(data)
+        self._buffer += self._compressor.update(data) if self._compressor else data
+        out = bytearray()
+        self._seal_full_chunks(out)
+        return self._emit(out) if out or not self._header_sent else b""
+
+    def finalize(self) -> bytes:
+        """Seal the remaining plaintext as the final frame"""
+        if self._finalized:
+            raise ValueError("Encryptor already finalized")
+        self._finalized = True
+        out = bytearray()
+        if self._compressor is not None:
+            self._buffer += self._compressor.finalize()
+            self._seal_full_chunks(out)
+        self._seal(bytes(self._buffer), True, out)
+        self._buffer.clear()
+        return self._emit(out)
+
+    def encrypt_iter(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Encrypt an iterable of plaintext blocks, yielding ciphertext blocks"""
+        for chunk in chunks:
+            out = self.update(chunk)
+            if out:
+                yield out
+        yield self.finalize()
+
+
+class StreamDecryptor:
+    """
+    Incremental decryptor for the streaming container
+
+    Feed ciphertext with update() in any block size; each call returns the
+    plaintext of every frame completed so far. Plaintext is only released
+    after its frame has been authenticated. finalize() raises if the stream
+    was truncated before the final frame.
+    """
+
+    def __init__(self, private_key: str, header: Optional[dict] = None):
+        self._private_key = private_key
+        self._buffer = bytearray()
+        self._cipher = None
+        self._counter = 0
+        self._done = False
+        self._decompressor: Optional[Decompressor] = None
+        self.header: Optional[dict] = None
+        self.header_size = 0
+        self.plaintext_bytes = 0
+        self.decrypt_seconds = 0.0
+        # A detached header (e.g. re-wrapped for another key) overrides the inline one
+        self._override_header = header
+
+    def _open_header(self, header: dict) -> None:
+        if header.get("format") != FORMAT_NAME or header.get("version") != FORMAT_VERSION:
+            raise StreamFormatError("Unsupported container format")
+        try:
+            data_key = unwrap_data_key(header, self._private_key)
+            codec = header.get("compression")
+            self._decompressor = Decompressor(codec) if codec else None
+            self._aad = _frame_aad(_unb64(header["stream_id"]), codec)
+            self._nonce_prefix = _unb64(header["nonce_prefix"])
+            if not isinstance(header["chunk_size"], int):
+                raise StreamFormatError("Container header has an invalid chunk size")
+        except StreamFormatError:
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            # Fields of an untrusted header that are missing or of the wrong type
+            raise StreamFormatError(f"Malformed container header: {e}")
+        self.header = header
+        self._cipher = _aesgcm()(data_key)
+
+    def _parse_header(self) -> bool:
+        fixed = len(MAGIC) + 4
+        if len(self._buffer) < fixed:
+            return False
+        if not is_stream_container(self._buffer):
+            raise StreamFormatError("Not a Vaultis stream container")
+        (header_length,) = struct.unpack(">I", self._buffer[len(MAGIC):fixed])
+        if header_length > MAX_HEADER_SIZE:
+            raise StreamFormatError("Container header too large")
+        if len(self._buffer) < fixed + header_length:
+            return False
+        inline_header = decode_header(bytes(self._buffer[:fixed + header_length]))
+        del self._buffer[:fixed + header_length]
+        self.header_size = fixed + header_length
+        override = self._override_header
+        if override is not None and override.get("stream_id") == inline_header.get("stream_id"):
+            try:
+                self._open_header(override)
+                return True
+            except StreamFormatError:
+                # Keys issued before the header was re-wrapped can still open the inline copy
+                pass
+        self._open_header(inline_header)
+        return True
+
+    def update(self, data: bytes) -> bytes:
+        """Add ciphertext and return the plaintext of all completed frames"""
+        return b"".join(self.iter_update(data))
+
+    def iter_update(self, data: bytes) -> Iterator[bytes]:
+        """
+        Add ciphertext and yield the plaintext of all completed frames
+
+        A compressed payload is yielded in pieces of bounded size as it is
+        decompressed, however far the frames expand.
+        """
+        out = self._open_frames(data)
+        if self._decompressor is None:
+            if out:
+                self.plaintext_bytes += len(out)
+                yield out
+            return
+        try:
+            for piece in self._decompressor.update(out):
+                self.plaintext_bytes += len(piece)
+                yield piece
+        except ValueError as e:
+            raise StreamFormatError(str(e))
+
+    def _open_frames(self, data: bytes) -> bytes:
+        """Authenticate and decrypt every frame completed by `data`"""
+        self._buffer += data
+        if self._cipher is None and not self._parse_header():
+            return b""
+
+        out = bytearray()
+        while len(self._buffer) >= 4:
+            if self._done:
+                raise StreamFormatError("Unexpected data after final frame")
+            (length_field,) = struct.unpack(">I", self._buffer[:4])
+            final = bool(length_field & _FINAL_FLAG)
+            length = length_field & ~_FINAL_FLAG
+            if length < _TAG_SIZE or length > self.header["chunk_size"] + _TAG_SIZE:
+                raise StreamFormatError("Invalid frame length")
+            if len(self._buffer) < 4 + length:
+                break
+            sealed = bytes(self._buffer[4:4 + length])
+            del self._buffer[:4 + length]
+
+            started = time.perf_counter()
+            try:
+                plaintext = self._cipher.decrypt(_frame_nonce(self._nonce_prefix, self._counter, final), sealed, self._aad)
+            except Exception:
+                raise StreamFormatError(f"Frame {self._counter} failed authentication")
+            self.decrypt_seconds += time.perf_counter() - started
+
+            self._counter += 1
+            self._done = final
+            out += plaintext
+        return bytes(out)
+
+    @property
+    def ready(self) -> bool:
+        """True once the header has been parsed and the data key unwrapped"""
+        return self._cipher is not None
+
+    def plaintext_length(self, container_length: int) -> int:
+        """
+        Size of the plaintext inside a container of `container_length` bytes
+
+        Only the header is needed, so this is known before any frame is
+        decrypted (e.g. to send Content-Length on a streamed response).
+        Compressed containers do not record it and raise StreamFormatError.
+        """
+        if not self.ready:
+            raise ValueError("Header not parsed yet")
+        if self._decompressor is not None:
+            raise StreamFormatError("Compressed payload size is only known after decompression")
+        frame_overhead = 4 + _TAG_SIZE
+        payload = container_length - self.header_size
+        frames = max(1, -(-payload // (self.header["chunk_size"] + frame_overhead)))
+        length = payload - frames * frame_overhead
+        if length < 0:
+            raise StreamFormatError("Encrypted stream is truncated")
+        return length
+
+    def finalize(self) -> None:
+        """Verify the stream ended cleanly with an authenticated final frame"""
+        if not self._done or self._buffer:
+            raise StreamFormatError("Encrypted stream is truncated")
+        if self._decompressor is not None:
+            try:
+                self._decompressor.finalize()
+            except ValueError as e:
+                raise StreamFormatError(str(e))
+
+    def decrypt_iter(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Decrypt an iterable of ciphertext blocks, yielding plaintext blocks"""
+        for chunk in chunks:
+            yield from self.iter_update(chunk)
+        self.finalize()
+
+
+def iter_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file as an iterator of blocks"""
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                return
+            yield block
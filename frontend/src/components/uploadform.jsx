@@ -1,5 +1,5 @@
 import React, { useState, useRef } from 'react';
-import { getContract } from '../services/contract';
+import { getContract, signedHeaders } from '../services/contract';
 import axios from 'axios';
 
 function UploadForm({ onUploadSuccess }) {
@@ -26,13 +26,15 @@ function UploadForm({ onUploadSuccess }) {
       }
 
       setUploading(true);
-      await window.ethereum.request({ method: 'eth_requestAccounts' });
+      const accounts = await window.ethereum.request({ method: 'eth_requestAccounts' });
 
       setStatus('🔐 Encrypting and uploading file to IPFS...');
       const formData = new FormData();
       formData.append('file', file);
 
-      const response = await axios.post('http://localhost:5000/api/encrypt-upload', formData);
+      const response = await axios.post('http://localhost:5000/api/encrypt-upload', formData, {
+        headers: await signedHeaders('POST', '/api/encrypt-upload') // The signing wallet is recorded as the owner
+      });
       console.log("Response from server:", response.data);
       console.log("Public key type:", typeof response.data.kyber_public_key);
       console.log("Public key value:", response.data.kyber_public_key);
@@ -41,13 +43,16 @@ function UploadForm({ onUploadSuccess }) {
         cid, 
         kyber_public_key, 
         encrypted_hash, 
-        private_key, // Get private key from response
+        private_key_id, // One-time pickup id for the private key
         private_key_warning // Get warning message
       } = response.data;
 
+      // The key is redeemed once; the server deletes it as soon as it is read
+      const keyResponse = await axios.get(`http://localhost:5000/api/private-key/${private_key_id}`);
+
       setCid(cid);
       setKyberPublicKey(kyber_public_key);
-      setKyberPrivateKey(private_key); // Store private key in state
+      setKyberPrivateKey(keyResponse.data.private_key); // Store private key in state
       setPrivateKeyWarning(private_key_warning || "IMPORTANT: Save this private key immediately. It will be deleted from our servers and cannot be recovered."); // Store warning
       setEncryptedHash(encrypted_hash);
       setStatus(`✅ Uploaded to IPFS! CID: ${cid}\n⏳ Saving CID to blockchain...`);
@@ -55,7 +60,18 @@ function UploadForm({ onUploadSuccess }) {
       // Save CID to blockchain
       const contract = await getContract();
       const tx = await contract.uploadFile(cid);
-      await tx.wait();
+      const receipt = await tx.wait();
+
+      // Record the on-chain file ID in the backend's file index
+      const stored = receipt.logs
+        .map((log) => { try { return contract.interface.parseLog(log); } catch { return null; } })
+        .find((event) => event?.name === 'FileStored');
+      if (stored) {
+        axios.put(`http://localhost:5000/api/files/${cid}`, {
+          owner: accounts[0],
+          file_id: Number(stored.args.fileId)
+        }).catch((indexError) => console.error("Failed to update file index:", indexError));
+      }
 
       setStatus('✅ File fully uploaded and saved to blockchain!');
       setFile(null);
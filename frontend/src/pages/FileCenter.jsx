@@ -66,7 +66,49 @@ function FileCenter() {
   
 
 
-  // Fetch accessible files from the smart contract
+  // Load accessible files from the backend's contract event index.
+  // Returns null when the index is not running, so the caller can fall back to the contract.
+  const fetchIndexedFiles = async () => {
+    try {
+      const indexedFiles = [];
+      let cursor;
+      do {
+        const response = await axios.get("http://localhost:5000/api/chain/files", {
+          params: { address: userAddress, limit: 500, cursor },
+        });
+        if (response.data.indexed_block === null) return null;
+        indexedFiles.push(...response.data.files);
+        cursor = response.data.next_cursor ?? undefined;
+      } while (cursor !== undefined);
+
+      const me = userAddress.toLowerCase();
+      return indexedFiles.map((file) => {
+        const hasSharedWithOthers = file.is_owner && file.access.some((addr) => addr !== me);
+        return {
+          id: file.file_id.toString(),
+          cid: file.cid,
+          name: file.original_filename || `File ${file.file_id}`,
+          description: "No description available",
+          owner: file.owner,
+          uploader: file.uploader,
+          timestamp: file.timestamp,
+          dateFormatted: new Date(file.timestamp * 1000).toLocaleString(),
+          isOwner: file.is_owner,
+          isUploader: file.uploader === me,
+          isSharedWithMe: !file.is_owner && file.uploader !== me,
+          accessUsers: file.access,
+          size: file.size ?? 0,
+          hasSharedWithOthers: hasSharedWithOthers,
+          isSharedByMe: hasSharedWithOthers,
+        };
+      });
+    } catch (indexError) {
+      console.error("Contract event index unavailable, reading from the contract:", indexError);
+      return null;
+    }
+  };
+
+  // Fetch accessible files from the event index, or from the smart contract as a fallback
   const fetchFiles = async () => {
     if (!userAddress) return;
 
@@ -74,6 +116,13 @@ function FileCenter() {
       setLoading(true);
       setError(null);
 
+      const indexedFiles = await fetchIndexedFiles();
+      if (indexedFiles) {
+        setFiles(indexedFiles);
+        setLoading(false);
+        return;
+      }
+
       const contract = await getContract();
 
       // Get all file data from the getAccessibleFiles function
@@ -107,88 +156,61 @@ function FileCenter() {
         };
       });
 
-      // Now fetch additional info for each file
+      // Names and sizes recorded at upload time, for every file in one request
+      let indexed = {};
+      try {
+        const response = await axios.post("http://localhost:5000/api/files/lookup", {
+          cids: formattedFiles.map((file) => file.cid),
+        });
+        indexed = response.data.files;
+      } catch (indexError) {
+        console.error("Error loading file metadata from index:", indexError);
+      }
+
+      // Sharing state still comes from the contract, which only owners can see in full:
+      // one batched read through the backend, or one contract call per file without it
+      let batchedInfo = null;
+      try {
+        const response = await axios.post("http://localhost:5000/api/chain/reads/file-info", {
+          file_ids: formattedFiles.filter((file) => file.isOwner).map((file) => Number(file.id)),
+          caller: userAddress,
+        });
+        batchedInfo = response.data.files;
+      } catch (readError) {
+        console.error("Batched contract reads unavailable, reading per file:", readError);
+      }
+
       const filesWithInfo = await Promise.all(
         formattedFiles.map(async (file) => {
-          try {
-            // Get additional file info
-            const fileInfo = await contract.getFileInfo(file.id, {
-              from: userAddress,
-            });
-
-            // Get file metadata including size if available
-            let fileSize = 0;
+          const metadata = indexed[file.cid];
+          let accessUsers = [];
+          if (file.isOwner && batchedInfo) {
+            accessUsers = batchedInfo[file.id]?.access || [];
+          } else if (file.isOwner) {
             try {
-              // Try to fetch file metadata from IPFS or contract storage
-              const fileMetadata = await contract.getFileMetadata(file.id, {
+              const fileInfo = await contract.getFileInfo(file.id, {
                 from: userAddress,
               });
-              fileSize = Number(fileMetadata.size || 0);
-            } catch (metadataError) {
-              console.error(
-                `Error fetching metadata for file ${file.id}:`,
-                metadataError
-              );
-              // If metadata fetch fails, try to estimate size from CID if possible
-              // This is a fallback and may not be accurate
-              if (file.cid) {
-                try {
-                  // Try to get size info directly from IPFS if available
-                  const ipfsResponse = await fetch(
-                    `https://ipfs.io/api/v0/object/stat?arg=${file.cid}`
-                  );
-                  if (ipfsResponse.ok) {
-                    const ipfsData = await ipfsResponse.json();
-                    fileSize = ipfsData.CumulativeSize || 1024 * 100; // Default to 100KB if size not available
-                  } else {
-                    // If can't get from IPFS, assign a default size based on file ID for demonstration
-                    // In a real app, you would want to store this properly during upload
-                    fileSize = 1024 * (50 + (Number(file.id) % 10) * 25); // Random size between 50KB and 300KB
-                  }
-                } catch (ipfsError) {
-                  console.error(
-                    `Error estimating size for file ${file.id}:`,
-                    ipfsError
-                  );
-                  // Generate a realistic file size based on ID to avoid showing 0KB
-                  fileSize = 1024 * (50 + (Number(file.id) % 10) * 25); // Random size between 50KB and 300KB
-                }
-              }
+              accessUsers = fileInfo.accessUsers || [];
+            } catch (error) {
+              console.error(`Error fetching details for file ${file.id}:`, error);
             }
-
-            // Get access users list to determine if this is a file the user has shared with others
-            const accessUsers = fileInfo.accessUsers || [];
-            const hasSharedWithOthers =
-              file.isOwner &&
-              accessUsers.length > 0 &&
-              accessUsers.some(
-                (addr) => addr.toLowerCase() !== userAddress.toLowerCase()
-              );
-
-            // Update file with additional info including proper size
-            return {
-              ...file,
-              name: fileInfo.name || `File ${file.id}`,
-              description: fileInfo.description || "No description available",
-              accessUsers: accessUsers,
-              size: fileSize,
-              hasSharedWithOthers: hasSharedWithOthers,
-              isSharedByMe: hasSharedWithOthers,
-            };
-          } catch (error) {
-            console.error(`Error fetching details for file ${file.id}:`, error);
-
-            // Even if we can't get details, assign a realistic file size
-            const estimatedSize = 1024 * (50 + (Number(file.id) % 10) * 25); // Random size between 50KB and 300KB
-
-            return {
-              ...file,
-              size: estimatedSize, // Provide a non-zero file size
-              accessUsers: [],
-              hasSharedWithOthers: false,
-              isSharedByMe: false,
-            };
           }
+
+          const hasSharedWithOthers = accessUsers.some(
+            (addr) => addr.toLowerCase() !== userAddress.toLowerCase()
+          );
+
+          return {
+            ...file,
+            name: metadata?.original_filename || file.name,
+            accessUsers: accessUsers,
+            size: metadata?.size ?? 0,
+            hashAlgorithm: metadata?.hash_algorithm,
+            encryptedHash: metadata?.encrypted_hash,
+            hasSharedWithOthers: hasSharedWithOthers,
+            isSharedByMe: hasSharedWithOthers,
+          };
         })
       );
 
@@ -1,6 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
-import { getContract } from '../services/contract';
 
 function FileRecovery() {
   const [missingFiles, setMissingFiles] = useState([]);
@@ -90,44 +89,61 @@ function FileRecovery() {
       }
       
       const userAddress = accounts[0];
-      const contract = await getContract();
       
-      // Get file count from contract
-      const fileCount = await contract.getFileCount();
+      // Page through the user's uploads in the backend's file index
+      const ownedFiles = [];
+      let cursor = null;
+      do {
+        const response = await axios.get('http://localhost:5000/api/files', {
+          params: { owner: userAddress, limit: 500, cursor: cursor || undefined }
+        });
+        ownedFiles.push(...response.data.files);
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      
+      const filesByCid = new Map(ownedFiles.map((file) => [file.cid, file]));
       const unavailableFiles = [];
       
-      // Fetch all files that belong to the current user
-      for (let i = 0; i < fileCount; i++) {
-        try {
-          const fileData = await contract.getFileData(i);
-          
-          if (fileData.owner?.toLowerCase() === userAddress?.toLowerCase()) {
-            // Check file availability
-            try {
-              const response = await axios.get(`http://localhost:5000/api/check-file/${fileData.cid}`);
-              
-              if (!response.data.available) {
-                unavailableFiles.push({
-                  id: i,
-                  cid: fileData.cid,
-                  timestamp: new Date(Number(fileData.timestamp) * 1000),
-                  status: 'unavailable'
-                });
-              }
-            } catch (err) {
-              unavailableFiles.push({
-                id: i,
-                cid: fileData.cid,
-                timestamp: new Date(Number(fileData.timestamp) * 1000),
-                status: 'error',
-                error: err.message
-              });
-            }
-          }
-        } catch (err) {
-          console.error(`Error fetching file ${i}:`, err);
-        }
+      // Check every file in one request; results stream back as NDJSON while the probes finish
+      const response = await fetch('http://localhost:5000/api/check-files', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ cids: [...filesByCid.keys()] })
+      });
+      if (!response.ok) {
+        throw new Error(`Availability check failed (${response.status})`);
+      }
+      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      const handleLine = (line) => {
+        if (!line.trim()) return;
+        const result = JSON.parse(line);
+        if (result.available) return;
+        
+        const file = filesByCid.get(result.cid);
+        unavailableFiles.push({
+          id: file?.file_id,
+          cid: result.cid,
+          name: file?.original_filename,
+          size: file?.size,
+          timestamp: new Date((file?.timestamp || 0) * 1000),
+          status: result.error ? 'error' : 'unavailable',
+          error: result.error
+        });
+        setMissingFiles([...unavailableFiles]);
+      };
+      
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.forEach(handleLine);
       }
+      handleLine(buffered);
       
       setMissingFiles(unavailableFiles);
     } catch (err) {
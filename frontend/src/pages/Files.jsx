@@ -8,6 +8,7 @@ import Tab from 'react-bootstrap/Tab';
 import Nav from 'react-bootstrap/Nav';
 import UploadForm from '../components/UploadForm';
 import FileManagement from '../pages/FileManagement';
+import axios from 'axios';
 import { getContract } from '../services/contract';
 
 function Files() {
@@ -47,7 +48,7 @@ function Files() {
     loadUserAddress();
   }, []);
 
-  // Fetch accessible files from the smart contract
+  // Fetch accessible files from the backend's contract event index, falling back to the contract
   const fetchFiles = async () => {
     if (!userAddress) return;
     
@@ -55,36 +56,62 @@ function Files() {
       setLoading(true);
       setError(null);
       
+      try {
+        const indexedFiles = [];
+        let cursor;
+        do {
+          const response = await axios.get('http://localhost:5000/api/chain/files', {
+            params: { address: userAddress, limit: 500, cursor }
+          });
+          if (response.data.indexed_block === null) throw new Error('Contract event index has not synced yet');
+          indexedFiles.push(...response.data.files);
+          cursor = response.data.next_cursor ?? undefined;
+        } while (cursor !== undefined);
+        
+        setFiles(indexedFiles.map(file => ({
+          id: file.file_id.toString(),
+          cid: file.cid,
+          name: file.original_filename || `File ${file.file_id}`,
+          size: file.size ?? 0,
+          owner: file.owner,
+          uploader: file.uploader,
+          timestamp: file.timestamp,
+          dateFormatted: new Date(file.timestamp * 1000).toLocaleString(),
+          isOwner: file.is_owner
+        })));
+        setLoading(false);
+        return;
+      } catch (indexError) {
+        console.error('Contract event index unavailable, reading from the contract:', indexError);
+      }
+      
       const contract = await getContract();
       
-      // Get all file IDs accessible to the user
-      const fileIds = await contract.getAccessibleFiles({ from: userAddress });
+      // One call returns every accessible file as parallel arrays
+      const { fileIds, cids, owners, uploaders, timestamps } = await contract.getAccessibleFiles({ from: userAddress });
       
-      // Fetch complete information for each file
-      const filesData = await Promise.all(
-        fileIds.map(async (fileId) => {
-          try {
-            const fileInfo = await contract.getFileInfo(fileId, { from: userAddress });
-            const cid = await contract.getCID(fileId, { from: userAddress });
-            
-            return {
-              id: fileId.toString(),
-              cid: cid,
-              owner: fileInfo.owner,
-              uploader: fileInfo.uploader,
-              timestamp: Number(fileInfo.timestamp),
-              dateFormatted: new Date(Number(fileInfo.timestamp) * 1000).toLocaleString(),
-              isOwner: fileInfo.owner.toLowerCase() === userAddress.toLowerCase()
-            };
-          } catch (error) {
-            console.error(`Error fetching details for file ${fileId}:`, error);
-            return null;
-          }
-        })
-      );
+      // File names and sizes come from the backend's upload index in a single request
+      let indexed = {};
+      try {
+        const response = await axios.post('http://localhost:5000/api/files/lookup', { cids: [...cids] });
+        indexed = response.data.files;
+      } catch (indexError) {
+        console.error('Failed to load file metadata from index:', indexError);
+      }
+      
+      const filesData = fileIds.map((fileId, index) => ({
+        id: fileId.toString(),
+        cid: cids[index],
+        name: indexed[cids[index]]?.original_filename || `File ${fileId}`,
+        size: indexed[cids[index]]?.size ?? 0,
+        owner: owners[index],
+        uploader: uploaders[index],
+        timestamp: Number(timestamps[index]),
+        dateFormatted: new Date(Number(timestamps[index]) * 1000).toLocaleString(),
+        isOwner: owners[index].toLowerCase() === userAddress.toLowerCase()
+      }));
       
-      // Filter out any null values from failed requests
-      setFiles(filesData.filter(file => file !== null));
+      setFiles(filesData);
       setLoading(false);
     } catch (error) {
       console.error('❌ Error fetching files:', error);
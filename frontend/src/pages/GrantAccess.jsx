@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
-import { getContract } from '../services/contract';
+import axios from 'axios';
+import { getContract, signedHeaders } from '../services/contract';
 import './GrantAccess.css';
 
 function GrantAccess() {
@@ -57,7 +58,28 @@ function GrantAccess() {
       const tx = await contract.grantAccess(fileId, address);
       await tx.wait();
       
-      setSuccess(`Access granted to ${address.substring(0, 6)}...${address.substring(38)} for File ID ${fileId}`);
+      // Wrap the file's data key for the grantee's own Kyber key, so they never need ours
+      let keyNote = '';
+      try {
+        const cid = await contract.getCID(fileId);
+        const path = `/api/files/${cid}/recipients`;
+        // The backend only lets the uploader's signed wallet use the key it holds for the file
+        const response = await axios.post(
+          `http://localhost:5000${path}`,
+          { addresses: [address] },
+          { headers: await signedHeaders('POST', path) }
+        );
+        if (response.data.missing && response.data.missing.length > 0) {
+          keyNote = ' The recipient has not registered a decryption key yet.';
+        }
+      } catch (shareError) {
+        console.warn('⚠️ Could not add the recipient key to the file:', shareError);
+        keyNote = shareError?.response?.status === 404
+          ? ' The recipient has not registered a decryption key yet.'
+          : ' The recipient key could not be added to the file.';
+      }
+      
+      setSuccess(`Access granted to ${address.substring(0, 6)}...${address.substring(38)} for File ID ${fileId}.${keyNote}`);
       setAddress(''); // Clear the input
       setFileId(''); // Clear the input
     } catch (error) {
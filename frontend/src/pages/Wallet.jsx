@@ -79,116 +79,145 @@ function Wallet() {
       let fetchSuccess = false;
       let allTransactions = [];
       
-      // Method 1: Direct block scanning (most reliable but slower)
+      // Method 0: Indexed history from the backend (one request, no block scanning)
       try {
-        const blockNumber = await provider.getBlockNumber();
+        const response = await fetch(`http://localhost:5000/api/history/${address}?limit=50`);
+        if (response.ok) {
+          const data = await response.json();
+          allTransactions = data.transactions.map((tx) => ({
+            hash: tx.hash,
+            type: tx.direction === 'sent' ? 'Sent' : 'Received',
+            timestamp: new Date(tx.timestamp * 1000).toLocaleString(),
+            amount: `${ethers.formatEther(tx.value)} ETH`,
+            status: tx.status === null ? 'Pending' : (tx.status ? 'Confirmed' : 'Failed'),
+            confirmations: tx.confirmations,
+            to: tx.to || 'Contract Creation',
+            from: tx.from,
+            gasUsed: tx.gas_used || 'Pending',
+            gasPrice: tx.gas_price ? ethers.formatUnits(tx.gas_price, 'gwei') : 'Pending',
+            blockNumber: tx.block_number,
+            category: tx.direction,
+          }));
+          // An empty page still counts once the index covers recent blocks
+          fetchSuccess = data.indexed_to !== null;
+          console.log(`✅ Loaded ${allTransactions.length} transactions from the history index (blocks ${data.indexed_from}-${data.indexed_to})`);
+        }
+      } catch (indexError) {
+        console.warn("History index unavailable, falling back to block scanning:", indexError.message);
+      }
+      
+      // Method 1: Direct block scanning (most reliable but slower), only without the backend index
+      if (!fetchSuccess) {
+        try {
+          const blockNumber = await provider.getBlockNumber();
         
-        // We'll scan blocks for better coverage, but with a reasonable limit
-        const blocksToScan = 50; // Reduced from 200 to 50 for faster loading
-        const startBlock = Math.max(0, blockNumber - blocksToScan);
+          // We'll scan blocks for better coverage, but with a reasonable limit
+          const blocksToScan = 50; // Reduced from 200 to 50 for faster loading
+          const startBlock = Math.max(0, blockNumber - blocksToScan);
         
-        console.log(`🔍 Scanning blocks ${startBlock} to ${blockNumber} for transactions...`);
+          console.log(`🔍 Scanning blocks ${startBlock} to ${blockNumber} for transactions...`);
         
-        // Process in batches to speed up scanning
-        const batchSize = 10; // Reduced batch size for better performance
+          // Process in batches to speed up scanning
+          const batchSize = 10; // Reduced batch size for better performance
         
-        // Set a timeout for the scan to prevent hanging
-        const scanPromise = (async () => {
-          for (let i = 0; i < blocksToScan; i += batchSize) {
-            // Create an array of promises for the batch
-            const blockPromises = [];
+          // Set a timeout for the scan to prevent hanging
+          const scanPromise = (async () => {
+            for (let i = 0; i < blocksToScan; i += batchSize) {
+              // Create an array of promises for the batch
+              const blockPromises = [];
             
-            for (let j = 0; j < batchSize && i + j < blocksToScan; j++) {
-              const blockToCheck = blockNumber - (i + j);
-              if (blockToCheck < 0) continue;
+              for (let j = 0; j < batchSize && i + j < blocksToScan; j++) {
+                const blockToCheck = blockNumber - (i + j);
+                if (blockToCheck < 0) continue;
               
-              // Get block with transactions
-              blockPromises.push(provider.getBlock(blockToCheck, true));
-            }
+                // Get block with transactions
+                blockPromises.push(provider.getBlock(blockToCheck, true));
+              }
             
-            // Process the batch of blocks in parallel
-            const blocks = await Promise.all(blockPromises);
+              // Process the batch of blocks in parallel
+              const blocks = await Promise.all(blockPromises);
             
-            // Process each block's transactions
-            for (const block of blocks) {
-              if (!block || !block.transactions) continue;
+              // Process each block's transactions
+              for (const block of blocks) {
+                if (!block || !block.transactions) continue;
               
-              // Filter for transactions related to this address
-              const relevantTxs = block.transactions.filter(tx => 
-                (tx.from && tx.from.toLowerCase() === address.toLowerCase()) || 
-                (tx.to && tx.to?.toLowerCase() === address.toLowerCase())
-              );
+                // Filter for transactions related to this address
+                const relevantTxs = block.transactions.filter(tx => 
+                  (tx.from && tx.from.toLowerCase() === address.toLowerCase()) || 
+                  (tx.to && tx.to?.toLowerCase() === address.toLowerCase())
+                );
               
-              if (relevantTxs.length > 0) {
-                // Format transactions
-                const formattedTxs = await Promise.all(relevantTxs.map(async (tx) => {
-                  try {
-                    // Get transaction receipt for confirmation status
-                    const receipt = await provider.getTransactionReceipt(tx.hash);
+                if (relevantTxs.length > 0) {
+                  // Format transactions
+                  const formattedTxs = await Promise.all(relevantTxs.map(async (tx) => {
+                    try {
+                      // Get transaction receipt for confirmation status
+                      const receipt = await provider.getTransactionReceipt(tx.hash);
                     
-                    // Get current block for confirmation count
-                    const confirmations = receipt ? blockNumber - receipt.blockNumber + 1 : 0;
+                      // Get current block for confirmation count
+                      const confirmations = receipt ? blockNumber - receipt.blockNumber + 1 : 0;
                     
-                    // Format date
-                    const timestamp = block.timestamp ? 
-                      new Date(Number(block.timestamp) * 1000).toLocaleString() : 'Pending';
+                      // Format date
+                      const timestamp = block.timestamp ? 
+                        new Date(Number(block.timestamp) * 1000).toLocaleString() : 'Pending';
                     
-                    // Format transaction
-                    return {
-                      hash: tx.hash,
-                      type: tx.from.toLowerCase() === address.toLowerCase() ? 'Sent' : 'Received',
-                      timestamp: timestamp,
-                      amount: tx.value ? `${ethers.formatEther(tx.value)} ETH` : '0 ETH',
-                      status: receipt ? (receipt.status ? 'Confirmed' : 'Failed') : 'Pending',
-                      confirmations: confirmations,
-                      to: tx.to || 'Contract Creation',
-                      from: tx.from,
-                      gasUsed: receipt ? receipt.gasUsed.toString() : 'Pending',
-                      gasPrice: tx.gasPrice ? ethers.formatUnits(tx.gasPrice, 'gwei') : 'Pending',
-                      blockNumber: receipt ? receipt.blockNumber : 'Pending',
-                      // Add transaction category for easier filtering
-                      category: tx.from.toLowerCase() === address.toLowerCase() ? 'sent' : 'received',
-                    };
-                  } catch (err) {
-                    console.error(`Error processing tx ${tx.hash}:`, err);
-                    return null;
-                  }
-                }));
+                      // Format transaction
+                      return {
+                        hash: tx.hash,
+                        type: tx.from.toLowerCase() === address.toLowerCase() ? 'Sent' : 'Received',
+                        timestamp: timestamp,
+                        amount: tx.value ? `${ethers.formatEther(tx.value)} ETH` : '0 ETH',
+                        status: receipt ? (receipt.status ? 'Confirmed' : 'Failed') : 'Pending',
+                        confirmations: confirmations,
+                        to: tx.to || 'Contract Creation',
+                        from: tx.from,
+                        gasUsed: receipt ? receipt.gasUsed.toString() : 'Pending',
+                        gasPrice: tx.gasPrice ? ethers.formatUnits(tx.gasPrice, 'gwei') : 'Pending',
+                        blockNumber: receipt ? receipt.blockNumber : 'Pending',
+                        // Add transaction category for easier filtering
+                        category: tx.from.toLowerCase() === address.toLowerCase() ? 'sent' : 'received',
+                      };
+                    } catch (err) {
+                      console.error(`Error processing tx ${tx.hash}:`, err);
+                      return null;
+                    }
+                  }));
                 
-                // Add valid transactions to our collection
-                allTransactions = [...allTransactions, ...formattedTxs.filter(tx => tx !== null)];
+                  // Add valid transactions to our collection
+                  allTransactions = [...allTransactions, ...formattedTxs.filter(tx => tx !== null)];
+                }
               }
-            }
             
-            // If we've found enough transactions, we can stop scanning
-            if (allTransactions.length >= 20) { // Reduced threshold
-              console.log(`Found ${allTransactions.length} transactions, stopping scan`);
-              break;
+              // If we've found enough transactions, we can stop scanning
+              if (allTransactions.length >= 20) { // Reduced threshold
+                console.log(`Found ${allTransactions.length} transactions, stopping scan`);
+                break;
+              }
             }
-          }
           
-          // If we found transactions, mark direct scanning as successful
-          if (allTransactions.length > 0) {
-            console.log(`✅ Successfully found ${allTransactions.length} transactions via direct block scanning`);
-            fetchSuccess = true;
-          } else {
-            console.log("No transactions found via direct block scanning");
-          }
-        })();
+            // If we found transactions, mark direct scanning as successful
+            if (allTransactions.length > 0) {
+              console.log(`✅ Successfully found ${allTransactions.length} transactions via direct block scanning`);
+              fetchSuccess = true;
+            } else {
+              console.log("No transactions found via direct block scanning");
+            }
+          })();
         
-        // Set a timeout for the scan to prevent hanging
-        const timeoutPromise = new Promise((_, reject) => {
-          setTimeout(() => reject(new Error("Transaction scanning timed out")), 5000); // 5 second timeout
-        });
+          // Set a timeout for the scan to prevent hanging
+          const timeoutPromise = new Promise((_, reject) => {
+            setTimeout(() => reject(new Error("Transaction scanning timed out")), 5000); // 5 second timeout
+          });
         
-        // Race the scan against the timeout
-        await Promise.race([scanPromise, timeoutPromise]).catch(err => {
-          console.warn("Block scanning time limit reached:", err.message);
-          // We'll continue with other methods or fallback to sample data
-        });
+          // Race the scan against the timeout
+          await Promise.race([scanPromise, timeoutPromise]).catch(err => {
+            console.warn("Block scanning time limit reached:", err.message);
+            // We'll continue with other methods or fallback to sample data
+          });
         
-      } catch (blockScanError) {
-        console.error("❌ Block scanning method failed:", blockScanError);
+        } catch (blockScanError) {
+          console.error("❌ Block scanning method failed:", blockScanError);
+        }
       }
       
       // Method 2: Get pending transactions (simpler and faster)
@@ -23,3 +23,21 @@ export const getContract = async () => {
     throw error;
   }
 };
+
+// ✍️ Headers proving a backend request comes from the connected wallet (checked in backend/wallet_auth.py).
+// Each signature is good for one request, so sign right before sending it.
+export const signedHeaders = async (method, path) => {
+  if (typeof window.ethereum === "undefined") {
+    throw new Error("🦊 MetaMask is not installed. Please install it to use this app.");
+  }
+  await window.ethereum.request({ method: "eth_requestAccounts" });
+  const provider = new ethers.BrowserProvider(window.ethereum);
+  const signer = await provider.getSigner();
+  const timestamp = Math.floor(Date.now() / 1000).toString();
+  const signature = await signer.signMessage(`Vaultis request\n${method.toUpperCase()} ${path}\n${timestamp}`);
+  return {
+    "X-Wallet-Address": await signer.getAddress(),
+    "X-Wallet-Timestamp": timestamp,
+    "X-Wallet-Signature": signature
+  };
+};
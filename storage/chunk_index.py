@@ -0,0 +1,162 @@
+# storage/chunk_index.py
+# Local index of deduplicated chunks already pinned by each owner
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CHUNK_DB_PATH = os.getenv("VAULTIS_CHUNK_DB") or os.path.join(BASE_DIR, "index_storage", "chunks.db")
+
+# SQLite allows at most 999 bound parameters per statement on older builds
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS owners (
+    owner      TEXT PRIMARY KEY,
+    secret     BLOB NOT NULL,
+    created_at INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chunks (
+    owner      TEXT NOT NULL,
+    chunk_id   BLOB NOT NULL,
+    pack_cid   TEXT NOT NULL,
+    offset     INTEGER NOT NULL,
+    length     INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (owner, chunk_id)
+) WITHOUT ROWID;
+"""
+
+# Where a sealed chunk lives: (pack CID, byte offset, sealed length)
+Location = Tuple[str, int, int]
+
+
+def _normalize(owner: str) -> str:
+    return owner.strip().lower()
+
+
+class ChunkIndex:
+    """
+    Chunk id -> pack location, per owner, plus each owner's convergence secret
+
+    Chunk ids are HMACs under the owner's secret (see crypto/convergent.py),
+    so the index never holds plaintext hashes. The secret is created on an
+    owner's first deduplicated upload and must be kept: without it, later
+    uploads can no longer find that owner's existing chunks.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = CHUNK_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def owner_secret(self, owner: str) -> bytes:
+        """Convergence secret of `owner`, generated on first use"""
+        owner = _normalize(owner)
+        conn = self._connection()
+        row = conn.execute("SELECT secret FROM owners WHERE owner = ?", (owner,)).fetchone()
+        if row:
+            return row[0]
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO owners (owner, secret, created_at) VALUES (?, ?, ?)",
+                (owner, os.urandom(32), int(time.time()))
+            )
+        return conn.execute("SELECT secret FROM owners WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def lookup_many(self, owner: str, chunk_ids: Iterable[bytes]) -> Dict[bytes, Location]:
+        """
+        Returns:
+            dict: {chunk_id: (pack_cid, offset, length)} for the chunks `owner` already pinned
+        """
+        owner = _normalize(owner)
+        chunk_ids = list(dict.fromkeys(chunk_ids))
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(chunk_ids), _MAX_PARAMS):
+            batch = chunk_ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for chunk_id, pack_cid, offset, length in conn.execute(
+                f"SELECT chunk_id, pack_cid, offset, length FROM chunks WHERE owner = ? AND chunk_id IN ({placeholders})",
+                [owner] + batch
+            ):
+                found[bytes(chunk_id)] = (pack_cid, offset, length)
+        return found
+
+    def add_many(self, owner: str, pack_cid: str, entries: Iterable[Tuple[bytes, int, int]]) -> int:
+        """
+        Record the chunks of one pinned pack
+
+        Args:
+            owner (str): Owner the chunks were encrypted for
+            pack_cid (str): CID of the pinned pack
+            entries (list): (chunk_id, offset, length) per chunk in the pack
+
+        Returns:
+            int: Number of chunks newly indexed
+        """
+        owner = _normalize(owner)
+        now = int(time.time())
+        rows = [(owner, chunk_id, pack_cid, offset, length, now) for chunk_id, offset, length in entries]
+        conn = self._connection()
+        with self._write_lock, conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO chunks (owner, chunk_id, pack_cid, offset, length, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    def count(self, owner: Optional[str] = None) -> int:
+        if owner is None:
+            return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM chunks WHERE owner = ?", (_normalize(owner),)
+        ).fetchone()[0]
+
+    def stored_bytes(self, owner: Optional[str] = None) -> int:
+        """Sealed bytes of every indexed chunk (what deduplicated uploads actually pinned)"""
+        if owner is None:
+            row = self._connection().execute("SELECT COALESCE(SUM(length), 0) FROM chunks").fetchone()
+        else:
+            row = self._connection().execute(
+                "SELECT COALESCE(SUM(length), 0) FROM chunks WHERE owner = ?", (_normalize(owner),)
+            ).fetchone()
+        return row[0]
+
+
+_index: Optional[ChunkIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_chunk_index() -> ChunkIndex:
+    """Process-wide ChunkIndex at CHUNK_DB_PATH, opened on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ChunkIndex()
+    return _index
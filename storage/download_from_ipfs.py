@@ -1,5 +1,8 @@
+import logging
 import requests
 
+logger = logging.getLogger(__name__)
+
 def download_from_ipfs(cid, output_path="downloaded_file"):
     url = f"https://gateway.pinata.cloud/ipfs/{cid}"
     response = requests.get(url)
@@ -7,6 +10,6 @@ def download_from_ipfs(cid, output_path="downloaded_file"):
     if response.status_code == 200:
         with open(output_path, 'wb') as f:
             f.write(response.content)
-        print(f"✅ Downloaded: {output_path}")
+        logger.info("✅ Downloaded: %s", output_path)
     else:
-        print("❌ Failed:", response.status_code, response.text)
+        logger.error("❌ Failed: %s %s", response.status_code, response.text)
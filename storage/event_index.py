@@ -0,0 +1,333 @@
+# storage/event_index.py
+# Local SQLite index of QuantumStorage contract events, with reorg rollback
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+EVENT_DB_PATH = os.getenv("VAULTIS_EVENT_DB") or os.path.join(BASE_DIR, "index_storage", "events.db")
+
+# Newest block hashes kept to detect reorgs and find the common ancestor
+CHECKPOINT_LIMIT = 256
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index    INTEGER NOT NULL,
+    block_hash   TEXT NOT NULL,
+    tx_hash      TEXT NOT NULL,
+    event        TEXT NOT NULL,
+    file_id      INTEGER NOT NULL,
+    args         TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_events_file ON events (file_id, block_number, log_index);
+
+CREATE TABLE IF NOT EXISTS files (
+    file_id       INTEGER PRIMARY KEY,
+    cid           TEXT NOT NULL,
+    owner         TEXT NOT NULL,
+    uploader      TEXT NOT NULL,
+    stored_at     INTEGER NOT NULL,
+    updated_block INTEGER NOT NULL,
+    deleted       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_files_owner ON files (owner, file_id);
+CREATE INDEX IF NOT EXISTS idx_files_cid ON files (cid);
+
+CREATE TABLE IF NOT EXISTS file_access (
+    address TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (address, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_file_access_file ON file_access (file_id);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_FILE_COLUMNS = "file_id, cid, owner, uploader, stored_at, updated_block"
+
+
+def _file_row_to_dict(row: tuple) -> dict:
+    file_id, cid, owner, uploader, stored_at, updated_block = row
+    return {
+        "file_id": file_id,
+        "cid": cid,
+        "owner": owner,
+        "uploader": uploader,
+        "timestamp": stored_at,
+        "updated_block": updated_block
+    }
+
+
+class EventIndex:
+    """
+    Contract events plus the file/access state they imply, indexed by address
+
+    Raw logs are kept in `events`; `files` and `file_access` are derived from
+    them as each batch is applied, in the same transaction that advances the
+    sync height. Rolling back a reorg deletes the orphaned events and
+    replays the surviving events of just the files they touched.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = EVENT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # 🧭 Sync state
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def last_block(self) -> Optional[int]:
+        """Highest block whose events are fully applied, None before the first sync"""
+        value = self._get_state("last_block")
+        return int(value) if value is not None else None
+
+    def contract(self) -> Optional[str]:
+        return self._get_state("contract")
+
+    def checkpoints(self) -> List[Tuple[int, str]]:
+        """(block_number, block_hash) pairs, newest first"""
+        return self._connection().execute(
+            "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+
+    def reset(self, contract: str) -> None:
+        """Forget everything and start indexing `contract` from scratch"""
+        conn = self._connection()
+        with self._write_lock, conn:
+            for table in ("events", "files", "file_access", "checkpoints", "sync_state"):
+                conn.execute(f"DELETE FROM {table}")
+            self._set_state(conn, "contract", contract.lower())
+
+    # 📥 Applying events
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, event: dict) -> None:
+        args = event["args"]
+        file_id = event["file_id"]
+        name = event["event"]
+        if name == "FileStored":
+            conn.execute(
+                f"INSERT OR REPLACE INTO files ({_FILE_COLUMNS}, deleted) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (file_id, args["cid"], args["uploader"], args["uploader"], args["timestamp"], event["block_number"])
+            )
+            conn.execute("INSERT OR IGNORE INTO file_access (address, file_id) VALUES (?, ?)", (args["uploader"], file_id))
+        elif name == "AccessGranted":
+            conn.execute("INSERT OR IGNORE INTO file_access (address, file_id) VALUES (?, ?)", (args["grantee"], file_id))
+        elif name == "AccessRevoked":
+            conn.execute("DELETE FROM file_access WHERE address = ? AND file_id = ?", (args["revokedUser"], file_id))
+        elif name == "OwnershipTransferred":
+            conn.execute(
+                "UPDATE files SET owner = ?, updated_block = ? WHERE file_id = ?",
+                (args["newOwner"], event["block_number"], file_id)
+            )
+            conn.execute("INSERT OR IGNORE INTO file_access (address, file_id) VALUES (?, ?)", (args["newOwner"], file_id))
+        elif name == "FileUpdated":
+            conn.execute(
+                "UPDATE files SET cid = ?, updated_block = ? WHERE file_id = ?",
+                (args["newCID"], event["block_number"], file_id)
+            )
+        elif name == "FileDeleted":
+            conn.execute(
+                "UPDATE files SET deleted = 1, updated_block = ? WHERE file_id = ?",
+                (event["block_number"], file_id)
+            )
+
+    def apply_batch(self, events: Iterable[dict], last_block: int, checkpoints: Dict[int, str]) -> int:
+        """
+        Store a block range's events, update the derived state and advance the sync height atomically
+
+        Args:
+            events (Iterable[dict]): Decoded logs in chain order
+            last_block (int): Last block of the range
+            checkpoints (dict): {block_number: block_hash} seen in the range
+
+        Returns:
+            int: Number of events applied
+        """
+        applied = 0
+        conn = self._connection()
+        with self._write_lock, conn:
+            for event in events:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO events (block_number, log_index, block_hash, tx_hash, event, file_id, args) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        event["block_number"], event["log_index"], event["block_hash"], event["tx_hash"],
+                        event["event"], event["file_id"], json.dumps(event["args"])
+                    )
+                )
+                if cursor.rowcount:
+                    self._apply(conn, event)
+                    applied += 1
+            conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints (block_number, block_hash) VALUES (?, ?)",
+                list(checkpoints.items())
+            )
+            conn.execute(
+                "DELETE FROM checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (CHECKPOINT_LIMIT,)
+            )
+            self._set_state(conn, "last_block", last_block)
+        return applied
+
+    def rollback(self, block_number: int) -> int:
+        """
+        Undo every event after `block_number` (the last block still on the canonical chain)
+
+        Returns:
+            int: Number of events removed
+        """
+        conn = self._connection()
+        with self._write_lock, conn:
+            affected = [row[0] for row in conn.execute(
+                "SELECT DISTINCT file_id FROM events WHERE block_number > ?", (block_number,)
+            )]
+            removed = conn.execute("DELETE FROM events WHERE block_number > ?", (block_number,)).rowcount
+            for file_id in affected:
+                conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+                conn.execute("DELETE FROM file_access WHERE file_id = ?", (file_id,))
+                for block, log_index, block_hash, tx_hash, name, args in conn.execute(
+                    "SELECT block_number, log_index, block_hash, tx_hash, event, args FROM events "
+                    "WHERE file_id = ? ORDER BY block_number, log_index", (file_id,)
+                ).fetchall():
+                    self._apply(conn, {
+                        "block_number": block, "log_index": log_index, "block_hash": block_hash,
+                        "tx_hash": tx_hash, "event": name, "file_id": file_id, "args": json.loads(args)
+                    })
+            conn.execute("DELETE FROM checkpoints WHERE block_number > ?", (block_number,))
+            self._set_state(conn, "last_block", block_number)
+        return removed
+
+    # 🔍 Queries
+
+    def get_file(self, file_id: int) -> Optional[dict]:
+        """A live (not deleted) file with the addresses that currently have access"""
+        conn = self._connection()
+        row = conn.execute(f"SELECT {_FILE_COLUMNS} FROM files WHERE file_id = ? AND deleted = 0", (file_id,)).fetchone()
+        if row is None:
+            return None
+        record = _file_row_to_dict(row)
+        record["access"] = [a for (a,) in conn.execute(
+            "SELECT address FROM file_access WHERE file_id = ? ORDER BY address", (file_id,)
+        )]
+        return record
+
+    def files_for_address(
+        self,
+        address: str,
+        role: str = "access",
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Newest-first page of live files for an address, each with its current access list
+
+        Args:
+            address (str): Wallet address
+            role (str): "access" for every file the address can open, "owner" for the ones it owns
+            limit (int): Page size, capped at MAX_PAGE_SIZE
+            after (int): next_cursor of the previous page (a file ID)
+
+        Returns:
+            tuple: (files, next_cursor); next_cursor is None on the last page
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        address = address.lower()
+        if role == "owner":
+            query = f"SELECT {_FILE_COLUMNS} FROM files WHERE owner = ? AND deleted = 0"
+        else:
+            query = (
+                f"SELECT {', '.join('f.' + c for c in _FILE_COLUMNS.split(', '))} FROM file_access a "
+                "JOIN files f ON f.file_id = a.file_id WHERE a.address = ? AND f.deleted = 0"
+            )
+        params: list = [address]
+        if after is not None:
+            query += " AND " + ("file_id" if role == "owner" else "a.file_id") + " < ?"
+            params.append(after)
+        query += " ORDER BY " + ("file_id" if role == "owner" else "a.file_id") + " DESC LIMIT ?"
+        conn = self._connection()
+        rows = conn.execute(query, params + [limit + 1]).fetchall()
+        files = [_file_row_to_dict(row) for row in rows[:limit]]
+        if files:
+            by_id = {file["file_id"]: file for file in files}
+            for file in files:
+                file["access"] = []
+            placeholders = ",".join("?" * len(by_id))
+            for file_id, member in conn.execute(
+                f"SELECT file_id, address FROM file_access WHERE file_id IN ({placeholders}) ORDER BY address", list(by_id)
+            ):
+                by_id[file_id]["access"].append(member)
+        next_cursor = files[-1]["file_id"] if len(rows) > limit else None
+        return files, next_cursor
+
+    def uploaders(self) -> List[Tuple[str, str]]:
+        """(cid, uploader) for every file ever stored, deleted ones included"""
+        return self._connection().execute("SELECT cid, uploader FROM files ORDER BY file_id DESC").fetchall()
+
+    def uploader_of(self, cid: str) -> Optional[str]:
+        """Address that stored the first file with `cid`, None if the CID is not on chain"""
+        row = self._connection().execute(
+            "SELECT uploader FROM files WHERE cid = ? ORDER BY file_id LIMIT 1", (cid,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count_files(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM files WHERE deleted = 0").fetchone()[0]
+
+
+_index: Optional[EventIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_event_index() -> EventIndex:
+    """Process-wide EventIndex at EVENT_DB_PATH, opened on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = EventIndex()
+    return _index
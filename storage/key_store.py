@@ -0,0 +1,279 @@
+# storage/key_store.py
+# Indexed private key storage in a single SQLite database (WAL mode)
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+KEY_DB_PATH = os.getenv("VAULTIS_KEY_DB") or os.path.join(BASE_DIR, "key_storage", "keys.db")
+
+# SQLite allows at most 999 bound parameters per statement on older builds
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS private_keys (
+    cid_hash   BLOB PRIMARY KEY,
+    key_data   BLOB NOT NULL,
+    protected  INTEGER NOT NULL DEFAULT 0,
+    created_at INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS detached_headers (
+    cid_hash   BLOB PRIMARY KEY,
+    header     TEXT NOT NULL,
+    rotated_at INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def cid_hash(cid: str) -> bytes:
+    """Index key for a CID: the raw SHA-256, the same hash the old per-file layout used as file name"""
+    return hashlib.sha256(cid.encode()).digest()
+
+
+class KeyStore:
+    """
+    Private keys (plain or password-wrapped) indexed by CID
+
+    Files whose key was rotated, or that were shared after upload, also
+    have a detached container header: the original header pinned on IPFS
+    cannot change, so the current copy (re-wrapped for the current key,
+    with any recipients added since) is kept here.
+
+    Rows live in a WITHOUT ROWID table keyed by the 32-byte SHA-256 of the
+    CID, so a lookup is a single B-tree descent and the file stays compact
+    at tens of millions of entries. The database runs in WAL mode: readers
+    never block the writer, and each thread gets its own connection.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = KEY_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, cid: str, key_data: bytes, protected: bool = False) -> None:
+        """Store or replace the key for one CID"""
+        self.put_many([(cid, key_data, protected)])
+
+    def put_many(self, items: Iterable[Tuple[str, bytes, bool]]) -> int:
+        """
+        Store many (cid, key_data, protected) rows in one transaction
+
+        Returns:
+            int: Number of rows written
+        """
+        now = int(time.time())
+        rows = [(cid_hash(cid), key_data, int(protected), now) for cid, key_data, protected in items]
+        self._write_rows(rows)
+        return len(rows)
+
+    def _write_rows(self, rows: List[Tuple[bytes, bytes, int, int]]) -> None:
+        if not rows:
+            return
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO private_keys (cid_hash, key_data, protected, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def get(self, cid: str) -> Optional[Tuple[bytes, bool]]:
+        """
+        Returns:
+            tuple: (key_data, protected), or None if no key is stored for cid
+        """
+        row = self._connection().execute(
+            "SELECT key_data, protected FROM private_keys WHERE cid_hash = ?", (cid_hash(cid),)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else None
+
+    def delete(self, cid: str) -> bool:
+        conn = self._connection()
+        with self._write_lock, conn:
+            cursor = conn.execute("DELETE FROM private_keys WHERE cid_hash = ?", (cid_hash(cid),))
+            conn.execute("DELETE FROM detached_headers WHERE cid_hash = ?", (cid_hash(cid),))
+        return cursor.rowcount > 0
+
+    # 🔄 Rotation
+
+    def rotate(
+        self,
+        cid: str,
+        old_key_data: bytes,
+        new_key_data: bytes,
+        header: dict,
+        previous: Optional[dict] = None
+    ) -> bool:
+        """
+        Replace the key of `cid` and store the header re-wrapped for it, in one transaction
+
+        Args:
+            cid (str): File CID
+            old_key_data (bytes): Key the header was re-wrapped from
+            new_key_data (bytes): Key that opens `header`
+            header (dict): Container header re-wrapped for the new key
+            previous (dict): Detached header `header` was derived from, None if it came from IPFS
+
+        Returns:
+            bool: False if the key or the detached header changed meanwhile
+        """
+        hashed = cid_hash(cid)
+        now = int(time.time())
+        conn = self._connection()
+        with self._write_lock, conn:
+            if self._stored_header(conn, hashed) != previous:
+                return False
+            cursor = conn.execute(
+                "UPDATE private_keys SET key_data = ?, protected = 0, created_at = ? WHERE cid_hash = ? AND key_data = ?",
+                (new_key_data, now, hashed, old_key_data)
+            )
+            if cursor.rowcount == 0:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO detached_headers (cid_hash, header, rotated_at) VALUES (?, ?, ?)",
+                (hashed, json.dumps(header, separators=(',', ':')), now)
+            )
+        return True
+
+    def add_recipients(self, cid: str, base_header: dict, entries: List[dict]) -> dict:
+        """
+        Append recipient entries to the detached header of `cid`
+
+        Entries tagged with a "recipient" label replace an earlier entry with
+        the same label. The data key never changes, so entries wrapped from
+        any version of the header stay valid across rotations.
+
+        Args:
+            cid (str): File CID
+            base_header (dict): Header to start from when none is detached yet (the pinned one)
+            entries (list): Output of wrap_for_recipients()
+
+        Returns:
+            dict: The updated detached header
+        """
+        hashed = cid_hash(cid)
+        conn = self._connection()
+        with self._write_lock, conn:
+            header = dict(self._stored_header(conn, hashed) or base_header)
+            labels = {entry.get("recipient") for entry in entries} - {None}
+            header["recipients"] = [
+                entry for entry in header.get("recipients", []) if entry.get("recipient") not in labels
+            ] + list(entries)
+            # rotated_at stays 0 until the file's own key is rotated
+            conn.execute(
+                "INSERT INTO detached_headers (cid_hash, header, rotated_at) VALUES (?, ?, 0) "
+                "ON CONFLICT(cid_hash) DO UPDATE SET header = excluded.header",
+                (hashed, json.dumps(header, separators=(',', ':')))
+            )
+        return header
+
+    @staticmethod
+    def _stored_header(conn: sqlite3.Connection, hashed: bytes) -> Optional[dict]:
+        row = conn.execute("SELECT header FROM detached_headers WHERE cid_hash = ?", (hashed,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_header(self, cid: str) -> Optional[dict]:
+        """Detached header of `cid`, None if it was never rotated or shared"""
+        return self._stored_header(self._connection(), cid_hash(cid))
+
+    def rotated_at(self, cid: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT rotated_at FROM detached_headers WHERE cid_hash = ?", (cid_hash(cid),)
+        ).fetchone()
+        return row[0] or None if row else None
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM private_keys").fetchone()[0]
+
+    def import_directory(self, directory: str, batch_size: int = 5000, delete_files: bool = False) -> int:
+        """
+        Import the legacy key_storage/ layout (one file per key, named sha256(cid) in hex)
+
+        Args:
+            directory (str): Directory holding the key files
+            batch_size (int): Rows per transaction
+            delete_files (bool): Remove each file once its batch is committed
+
+        Returns:
+            int: Number of keys imported
+        """
+        imported = 0
+        batch: List[Tuple[bytes, bytes, int, int]] = []
+        paths: List[str] = []
+
+        def flush():
+            nonlocal imported
+            self._write_rows(batch)
+            imported += len(batch)
+            if delete_files:
+                for path in paths:
+                    os.remove(path)
+            batch.clear()
+            paths.clear()
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or len(entry.name) != 64:
+                    continue
+                try:
+                    hashed = bytes.fromhex(entry.name)
+                except ValueError:
+                    continue
+                with open(entry.path, 'rb') as f:
+                    key_data = f.read()
+                batch.append((hashed, key_data, 0, int(entry.stat().st_mtime)))
+                paths.append(entry.path)
+                if len(batch) >= batch_size:
+                    flush()
+                    logger.info("[📦] Imported %s keys...", imported)
+        flush()
+        logger.info("[✅] Imported %s keys from %s into %s", imported, directory, self.path)
+        return imported
+
+
+_store: Optional[KeyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_key_store() -> KeyStore:
+    """Process-wide KeyStore at KEY_DB_PATH, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KeyStore()
+    return _store
+
+
+if __name__ == "__main__":
+    # Usage: python storage/key_store.py <key_storage_dir> [--delete]
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) < 2:
+        print("Usage: python storage/key_store.py <key_storage_dir> [--delete]")
+        sys.exit(1)
+    get_key_store().import_directory(sys.argv[1], delete_files='--delete' in sys.argv)
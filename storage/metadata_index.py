@@ -0,0 +1,254 @@
+# storage/metadata_index.py
+# Indexed upload metadata (CID, file name, size, hashes, owner, time) in SQLite (WAL mode)
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+METADATA_DB_PATH = os.getenv("VAULTIS_METADATA_DB") or os.path.join(BASE_DIR, "index_storage", "metadata.db")
+
+# Page size limits for list queries
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# SQLite allows at most 999 bound parameters per statement on older builds
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    cid               TEXT PRIMARY KEY,
+    owner             TEXT,
+    file_id           INTEGER,
+    original_filename TEXT NOT NULL,
+    size              INTEGER NOT NULL,
+    hash_algorithm    TEXT NOT NULL,
+    encrypted_hash    TEXT NOT NULL,
+    encrypted_hashes  TEXT NOT NULL DEFAULT '{}',
+    created_at        INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_owner_created ON uploads (owner, created_at DESC, cid DESC);
+CREATE INDEX IF NOT EXISTS idx_uploads_created ON uploads (created_at DESC, cid DESC);
+"""
+
+_COLUMNS = "cid, owner, file_id, original_filename, size, hash_algorithm, encrypted_hash, encrypted_hashes, created_at"
+
+
+def normalize_address(address: Optional[str]) -> Optional[str]:
+    """Wallet addresses are stored lower-cased so lookups ignore EIP-55 checksum casing"""
+    return address.strip().lower() if address and address.strip() else None
+
+
+def _row_to_dict(row: tuple) -> dict:
+    cid, owner, file_id, original_filename, size, hash_algorithm, encrypted_hash, encrypted_hashes, created_at = row
+    return {
+        "cid": cid,
+        "owner": owner,
+        "file_id": file_id,
+        "original_filename": original_filename,
+        "size": size,
+        "hash_algorithm": hash_algorithm,
+        "encrypted_hash": encrypted_hash,
+        "encrypted_hashes": json.loads(encrypted_hashes),
+        "timestamp": created_at
+    }
+
+
+def encode_cursor(record: dict) -> str:
+    return f"{record['timestamp']}:{record['cid']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    timestamp, sep, cid = cursor.partition(":")
+    if not sep or not cid:
+        raise ValueError("Malformed cursor")
+    return int(timestamp), cid
+
+
+class MetadataIndex:
+    """
+    Metadata for every encrypted upload, indexed by CID, owner and time
+
+    Lookups by CID use the primary key; listings walk the (owner, created_at)
+    or created_at index with keyset pagination, so each page costs a B-tree
+    descent plus the rows returned, however deep into the history it is.
+    Like the key store, the database runs in WAL mode with one connection
+    per thread.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = METADATA_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record_upload(
+        self,
+        cid: str,
+        original_filename: str,
+        size: int,
+        hash_algorithm: str,
+        encrypted_hash: str,
+        encrypted_hashes: Optional[Dict[str, str]] = None,
+        owner: Optional[str] = None,
+        created_at: Optional[int] = None
+    ) -> dict:
+        """
+        Store (or replace) the metadata of one upload
+
+        Re-uploading the same CID keeps the owner and on-chain file ID that
+        were already recorded when the new upload does not supply them.
+
+        Returns:
+            dict: The stored record
+        """
+        created_at = int(created_at if created_at is not None else time.time())
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute(
+                f"INSERT INTO uploads ({_COLUMNS}) VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(cid) DO UPDATE SET "
+                "owner = COALESCE(excluded.owner, uploads.owner), "
+                "original_filename = excluded.original_filename, size = excluded.size, "
+                "hash_algorithm = excluded.hash_algorithm, encrypted_hash = excluded.encrypted_hash, "
+                "encrypted_hashes = excluded.encrypted_hashes, created_at = excluded.created_at",
+                (
+                    cid, normalize_address(owner), original_filename, int(size), hash_algorithm,
+                    encrypted_hash, json.dumps(encrypted_hashes or {}), created_at
+                )
+            )
+        return self.get(cid)
+
+    def set_owner(self, cid: str, owner: Optional[str] = None, file_id: Optional[int] = None) -> bool:
+        """
+        Attach the on-chain owner and/or file ID once the upload transaction is mined
+
+        Returns:
+            bool: False if cid is not in the index
+        """
+        conn = self._connection()
+        with self._write_lock, conn:
+            cursor = conn.execute(
+                "UPDATE uploads SET owner = COALESCE(?, owner), file_id = COALESCE(?, file_id) WHERE cid = ?",
+                (normalize_address(owner), file_id, cid)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, cid: str) -> Optional[dict]:
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM uploads WHERE cid = ?", (cid,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def get_many(self, cids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Look up many CIDs with a handful of IN (...) queries
+
+        Returns:
+            dict: {cid: record} for the CIDs that are indexed
+        """
+        cids = list(dict.fromkeys(cids))
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(cids), _MAX_PARAMS):
+            batch = cids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for row in conn.execute(f"SELECT {_COLUMNS} FROM uploads WHERE cid IN ({placeholders})", batch):
+                found[row[0]] = _row_to_dict(row)
+        return found
+
+    def list_uploads(
+        self,
+        owner: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Newest-first page of uploads, optionally restricted to one owner
+
+        Args:
+            owner (str): Wallet address, or None for every upload
+            limit (int): Page size, capped at MAX_PAGE_SIZE
+            cursor (str): next_cursor from the previous page
+
+        Returns:
+            tuple: (records, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if owner is not None:
+            clauses.append("owner = ?")
+            params.append(normalize_address(owner))
+        if cursor:
+            before_time, before_cid = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND cid < ?))")
+            params.extend([before_time, before_time, before_cid])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM uploads {where} ORDER BY created_at DESC, cid DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+        records = [_row_to_dict(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(records[-1]) if len(rows) > limit else None
+        return records, next_cursor
+
+    def owners(self) -> List[Tuple[str, str]]:
+        """(cid, owner) for every upload whose owner is known"""
+        return self._connection().execute("SELECT cid, owner FROM uploads WHERE owner IS NOT NULL").fetchall()
+
+    def cids_after(self, after: Optional[str] = None, limit: int = 1000) -> List[str]:
+        """Next `limit` CIDs in CID order after `after`, for jobs that walk every upload"""
+        if after is None:
+            rows = self._connection().execute("SELECT cid FROM uploads ORDER BY cid LIMIT ?", (limit,))
+        else:
+            rows = self._connection().execute("SELECT cid FROM uploads WHERE cid > ? ORDER BY cid LIMIT ?", (after, limit))
+        return [row[0] for row in rows]
+
+    def count(self, owner: Optional[str] = None) -> int:
+        if owner is None:
+            return self._connection().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM uploads WHERE owner = ?", (normalize_address(owner),)
+        ).fetchone()[0]
+
+
+_index: Optional[MetadataIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_metadata_index() -> MetadataIndex:
+    """Process-wide MetadataIndex at METADATA_DB_PATH, opened on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MetadataIndex()
+    return _index
@@ -0,0 +1,116 @@
+# storage/public_keys.py
+# Kyber public keys registered by wallet address, so files can be shared without re-encrypting them
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PUBLIC_KEY_DB_PATH = os.getenv("VAULTIS_PUBLIC_KEY_DB") or os.path.join(BASE_DIR, "index_storage", "public_keys.db")
+
+# SQLite allows at most 999 bound parameters per statement on older builds
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS public_keys (
+    address    TEXT PRIMARY KEY,
+    public_key TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def normalize_address(address: str) -> str:
+    return address.strip().lower()
+
+
+class PublicKeyDirectory:
+    """
+    One Kyber public key per wallet address
+
+    Only public keys are kept here; each recipient holds the matching
+    private key. Addresses are stored lower-cased so lookups ignore EIP-55
+    checksum casing.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = PUBLIC_KEY_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, address: str, public_key: str) -> None:
+        """Register (or replace) the public key of `address`"""
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO public_keys (address, public_key, created_at) VALUES (?, ?, ?)",
+                (normalize_address(address), public_key, int(time.time()))
+            )
+
+    def get(self, address: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT public_key FROM public_keys WHERE address = ?", (normalize_address(address),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, addresses: Iterable[str]) -> Dict[str, str]:
+        """
+        Returns:
+            dict: {normalized address: public key} for the addresses that registered one
+        """
+        addresses = list(dict.fromkeys(normalize_address(address) for address in addresses))
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(addresses), _MAX_PARAMS):
+            batch = addresses[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for address, public_key in conn.execute(
+                f"SELECT address, public_key FROM public_keys WHERE address IN ({placeholders})", batch
+            ):
+                found[address] = public_key
+        return found
+
+    def delete(self, address: str) -> bool:
+        conn = self._connection()
+        with self._write_lock, conn:
+            cursor = conn.execute("DELETE FROM public_keys WHERE address = ?", (normalize_address(address),))
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM public_keys").fetchone()[0]
+
+
+_directory: Optional[PublicKeyDirectory] = None
+_directory_lock = threading.Lock()
+
+
+def get_public_keys() -> PublicKeyDirectory:
+    """Process-wide PublicKeyDirectory at PUBLIC_KEY_DB_PATH, opened on first use"""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = PublicKeyDirectory()
+    return _directory
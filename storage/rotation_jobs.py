@@ -0,0 +1,180 @@
+# storage/rotation_jobs.py
+# Durable progress of key rotation jobs, so an interrupted rotation resumes where it stopped
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ROTATION_DB_PATH = os.getenv("VAULTIS_ROTATION_DB") or os.path.join(BASE_DIR, "index_storage", "rotation.db")
+
+# Failed CIDs kept per job for the status report
+MAX_RECORDED_FAILURES = 1000
+
+# running -> paused | completed | failed; paused -> running
+STATUSES = ("running", "paused", "completed", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    requested_by  TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    finished_at   REAL,
+    total         INTEGER NOT NULL,
+    cursor        TEXT,
+    rotated       INTEGER NOT NULL DEFAULT 0,
+    skipped       INTEGER NOT NULL DEFAULT 0,
+    skipped_protected INTEGER NOT NULL DEFAULT 0,
+    failed        INTEGER NOT NULL DEFAULT 0,
+    bytes_fetched INTEGER NOT NULL DEFAULT 0,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS failures (
+    job_id TEXT NOT NULL,
+    cid    TEXT NOT NULL,
+    error  TEXT NOT NULL,
+    PRIMARY KEY (job_id, cid)
+);
+"""
+
+_COLUMNS = (
+    "id, status, requested_by, created_at, updated_at, finished_at, total, cursor, "
+    "rotated, skipped, skipped_protected, failed, bytes_fetched, error"
+)
+_COUNTERS = ("rotated", "skipped", "skipped_protected", "failed", "bytes_fetched")
+
+
+def _row_to_dict(row: tuple) -> dict:
+    return dict(zip([column.strip() for column in _COLUMNS.split(",")], row))
+
+
+class RotationJobStore:
+    """
+    Key rotation jobs with their cursor and running totals
+
+    A job walks the upload index in CID order. Each finished batch advances
+    `cursor` and adds to the counters in one transaction, so after a crash
+    the job repeats at most the batch that was in flight.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = ROTATION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Databases created before password-protected skips were counted separately
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "skipped_protected" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN skipped_protected INTEGER NOT NULL DEFAULT 0")
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, total: int, created_at: float, requested_by: Optional[str] = None) -> dict:
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, requested_by, created_at, updated_at, total) VALUES (?, 'running', ?, ?, ?, ?)",
+                (job_id, requested_by, created_at, created_at, total)
+            )
+        return self.get(job_id)
+
+    def advance(self, job_id: str, cursor: str, counts: dict, failures: List[tuple], now: float) -> None:
+        """
+        Record one finished batch
+
+        Args:
+            job_id (str): Job to update
+            cursor (str): Last CID of the batch
+            counts (dict): Increments for rotated/skipped/skipped_protected/failed/bytes_fetched
+            failures (list): (cid, error) pairs to remember
+            now (float): Update time
+        """
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute(
+                "UPDATE jobs SET cursor = ?, updated_at = ?, "
+                + ", ".join(f"{name} = {name} + ?" for name in _COUNTERS)
+                + " WHERE id = ?",
+                [cursor, now] + [counts.get(name, 0) for name in _COUNTERS] + [job_id]
+            )
+            recorded = conn.execute("SELECT COUNT(*) FROM failures WHERE job_id = ?", (job_id,)).fetchone()[0]
+            room = max(0, MAX_RECORDED_FAILURES - recorded)
+            conn.executemany(
+                "INSERT OR REPLACE INTO failures (job_id, cid, error) VALUES (?, ?, ?)",
+                [(job_id, cid, error) for cid, error in failures[:room]]
+            )
+
+    def set_status(self, job_id: str, status: str, now: float, error: Optional[str] = None, expected: Optional[str] = None) -> bool:
+        """
+        Move a job to `status`; with `expected`, only if it currently has that status
+
+        Returns:
+            bool: False if the job does not exist or was not in `expected`
+        """
+        finished_at = now if status in ("completed", "failed") else None
+        sql = "UPDATE jobs SET status = ?, updated_at = ?, finished_at = ?, error = ? WHERE id = ?"
+        params = [status, now, finished_at, error, job_id]
+        if expected is not None:
+            sql += " AND status = ?"
+            params.append(expected)
+        conn = self._connection()
+        with self._write_lock, conn:
+            cursor = conn.execute(sql, params)
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def with_status(self, status: str) -> List[dict]:
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at", (status,)
+        ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def latest(self, limit: int = 20) -> List[dict]:
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def failures(self, job_id: str, limit: int = 100) -> List[dict]:
+        rows = self._connection().execute(
+            "SELECT cid, error FROM failures WHERE job_id = ? ORDER BY cid LIMIT ?", (job_id, limit)
+        ).fetchall()
+        return [{"cid": cid, "error": error} for cid, error in rows]
+
+
+_store: Optional[RotationJobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rotation_jobs() -> RotationJobStore:
+    """Process-wide RotationJobStore at ROTATION_DB_PATH, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RotationJobStore()
+    return _store
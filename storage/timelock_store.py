@@ -0,0 +1,196 @@
+# storage/timelock_store.py
+# Durable SQLite queue of time-locked operations waiting for their release time
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TIMELOCK_DB_PATH = os.getenv("VAULTIS_TIMELOCK_DB") or os.path.join(BASE_DIR, "index_storage", "timelock.db")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# pending -> released | failed | cancelled
+STATUSES = ("pending", "released", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    requested_by TEXT,
+    created_at  REAL NOT NULL,
+    release_at  REAL NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    result      TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_operations_status ON operations (status, release_at, id);
+"""
+
+_COLUMNS = "id, kind, payload, requested_by, created_at, release_at, status, result, finished_at"
+
+
+def _row_to_dict(row: tuple) -> dict:
+    op_id, kind, payload, requested_by, created_at, release_at, status, result, finished_at = row
+    return {
+        "id": op_id,
+        "kind": kind,
+        "payload": json.loads(payload),
+        "requested_by": requested_by,
+        "created_at": created_at,
+        "release_at": release_at,
+        "status": status,
+        "result": json.loads(result) if result else None,
+        "finished_at": finished_at
+    }
+
+
+def encode_cursor(record: dict) -> str:
+    return f"{record['release_at']!r}:{record['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    release_at, sep, op_id = cursor.partition(":")
+    if not sep:
+        raise ValueError("Malformed cursor")
+    return float(release_at), op_id
+
+
+class TimelockStore:
+    """
+    Time-locked operations with their release time and outcome
+
+    Only the (id, release_at) pairs of pending operations are needed to
+    rebuild the in-memory timer queue after a restart; payloads are read
+    back one at a time when an operation is released.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = TIMELOCK_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, record: dict) -> None:
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT INTO operations (id, kind, payload, requested_by, created_at, release_at, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'pending')",
+                (
+                    record["id"], record["kind"], json.dumps(record["payload"]), record.get("requested_by"),
+                    record["created_at"], record["release_at"]
+                )
+            )
+
+    def finish(self, op_id: str, status: str, result: Optional[dict], finished_at: float) -> bool:
+        """
+        Move a pending operation to `status`
+
+        Returns:
+            bool: False if the operation was no longer pending (e.g. cancelled meanwhile)
+        """
+        conn = self._connection()
+        with self._write_lock, conn:
+            cursor = conn.execute(
+                "UPDATE operations SET status = ?, result = ?, finished_at = ? WHERE id = ? AND status = 'pending'",
+                (status, json.dumps(result) if result is not None else None, finished_at, op_id)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, op_id: str) -> Optional[dict]:
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM operations WHERE id = ?", (op_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def pending_schedule(self) -> Iterable[Tuple[float, str]]:
+        """(release_at, id) of every pending operation, streamed in release order"""
+        return self._connection().execute(
+            "SELECT release_at, id FROM operations WHERE status = 'pending' ORDER BY release_at, id"
+        )
+
+    def list_operations(
+        self,
+        status: Optional[str] = "pending",
+        kind: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Page of operations in release order
+
+        Args:
+            status (str): One of STATUSES, or None for all
+            kind (str): Only operations of this kind
+            limit (int): Page size, capped at MAX_PAGE_SIZE
+            cursor (str): next_cursor from the previous page
+
+        Returns:
+            tuple: (operations, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if cursor:
+            after_release, after_id = decode_cursor(cursor)
+            clauses.append("(release_at > ? OR (release_at = ? AND id > ?))")
+            params.extend([after_release, after_release, after_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM operations {where} ORDER BY release_at, id LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+        records = [_row_to_dict(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(records[-1]) if len(rows) > limit else None
+        return records, next_cursor
+
+    def count(self, status: str = "pending") -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM operations WHERE status = ?", (status,)).fetchone()[0]
+
+
+_store: Optional[TimelockStore] = None
+_store_lock = threading.Lock()
+
+
+def get_timelock_store() -> TimelockStore:
+    """Process-wide TimelockStore at TIMELOCK_DB_PATH, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TimelockStore()
+    return _store
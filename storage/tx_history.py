@@ -0,0 +1,302 @@
+# storage/tx_history.py
+# Local SQLite index of chain transactions by address, for wallet history pages
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HISTORY_DB_PATH = os.getenv("VAULTIS_HISTORY_DB") or os.path.join(BASE_DIR, "index_storage", "history.db")
+
+# Newest block hashes kept to detect reorgs and find the common ancestor
+CHECKPOINT_LIMIT = 256
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    hash         TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    tx_index     INTEGER NOT NULL,
+    block_hash   TEXT NOT NULL,
+    timestamp    INTEGER NOT NULL,
+    from_address TEXT NOT NULL,
+    to_address   TEXT,
+    value        TEXT NOT NULL,
+    gas_price    TEXT,
+    gas_used     TEXT,
+    status       INTEGER,
+    contract_address TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_block ON transactions (block_number);
+
+CREATE TABLE IF NOT EXISTS address_tx (
+    address      TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_index     INTEGER NOT NULL,
+    hash         TEXT NOT NULL,
+    PRIMARY KEY (address, block_number, tx_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_address_tx_block ON address_tx (block_number);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "hash, block_number, tx_index, block_hash, timestamp, from_address, to_address, "
+    "value, gas_price, gas_used, status, contract_address"
+)
+
+
+def _row_to_dict(row: tuple) -> dict:
+    (tx_hash, block_number, tx_index, block_hash, timestamp, from_address, to_address,
+     value, gas_price, gas_used, status, contract_address) = row
+    return {
+        "hash": tx_hash,
+        "block_number": block_number,
+        "tx_index": tx_index,
+        "block_hash": block_hash,
+        "timestamp": timestamp,
+        "from": from_address,
+        "to": to_address,
+        "value": value,
+        "gas_price": gas_price,
+        "gas_used": gas_used,
+        "status": status,
+        "contract_address": contract_address
+    }
+
+
+def encode_cursor(record: dict) -> str:
+    return f"{record['block_number']}:{record['tx_index']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    block, sep, tx_index = cursor.partition(":")
+    if not sep:
+        raise ValueError("Malformed cursor")
+    return int(block), int(tx_index)
+
+
+class TxHistory:
+    """
+    Transactions of an indexed block range, looked up by sender or recipient
+
+    The index always covers one contiguous range [first_block, last_block].
+    The indexer extends it forwards as the chain grows and backwards while
+    backfilling older blocks; each block range is written in one transaction
+    together with the new bounds, so a crash never leaves a gap. Rolling
+    back a reorg drops every transaction above the common ancestor.
+
+    Args:
+        path (str): Database file, created on first use
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # 🧭 Sync state
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def first_block(self) -> Optional[int]:
+        """Lowest indexed block, None before the first sync"""
+        value = self._get_state("first_block")
+        return int(value) if value is not None else None
+
+    def last_block(self) -> Optional[int]:
+        """Highest indexed block, None before the first sync"""
+        value = self._get_state("last_block")
+        return int(value) if value is not None else None
+
+    def chain_id(self) -> Optional[str]:
+        return self._get_state("chain_id")
+
+    def checkpoints(self) -> List[Tuple[int, str]]:
+        """(block_number, block_hash) pairs, newest first"""
+        return self._connection().execute(
+            "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+
+    def reset(self, chain_id: str) -> None:
+        """Forget everything and start indexing chain `chain_id` from scratch"""
+        conn = self._connection()
+        with self._write_lock, conn:
+            for table in ("transactions", "address_tx", "checkpoints", "sync_state"):
+                conn.execute(f"DELETE FROM {table}")
+            self._set_state(conn, "chain_id", chain_id)
+
+    # 📥 Writing block ranges
+
+    def add_blocks(self, transactions: Iterable[dict], first_block: int, last_block: int, checkpoints: Dict[int, str]) -> int:
+        """
+        Store the transactions of blocks first_block..last_block and widen the indexed range to include them
+
+        The range must touch the indexed one (directly above last_block or
+        directly below first_block) so the index stays contiguous.
+
+        Args:
+            transactions (Iterable[dict]): Transactions of the range (see _row_to_dict for keys)
+            first_block (int): First block of the range
+            last_block (int): Last block of the range
+            checkpoints (dict): {block_number: block_hash} to remember for reorg detection
+
+        Returns:
+            int: Number of transactions stored
+        """
+        stored = 0
+        conn = self._connection()
+        with self._write_lock, conn:
+            for tx in transactions:
+                tx_hash = tx["hash"].lower()
+                from_address = tx["from"].lower()
+                to_address = tx["to"].lower() if tx.get("to") else None
+                contract_address = tx["contract_address"].lower() if tx.get("contract_address") else None
+                conn.execute(
+                    f"INSERT OR REPLACE INTO transactions ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        tx_hash, tx["block_number"], tx["tx_index"], tx["block_hash"], tx["timestamp"],
+                        from_address, to_address, tx["value"], tx.get("gas_price"), tx.get("gas_used"),
+                        tx.get("status"), contract_address
+                    )
+                )
+                # Contract creations are listed under the new contract's address as the recipient
+                for address in {from_address, to_address or contract_address} - {None}:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO address_tx (address, block_number, tx_index, hash) VALUES (?, ?, ?, ?)",
+                        (address, tx["block_number"], tx["tx_index"], tx_hash)
+                    )
+                stored += 1
+
+            if checkpoints:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO checkpoints (block_number, block_hash) VALUES (?, ?)",
+                    list(checkpoints.items())
+                )
+                conn.execute(
+                    "DELETE FROM checkpoints WHERE block_number NOT IN "
+                    "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                    (CHECKPOINT_LIMIT,)
+                )
+            current_first, current_last = self.first_block(), self.last_block()
+            self._set_state(conn, "first_block", first_block if current_first is None else min(current_first, first_block))
+            self._set_state(conn, "last_block", last_block if current_last is None else max(current_last, last_block))
+        return stored
+
+    def rollback(self, block_number: int) -> int:
+        """
+        Drop every transaction after `block_number` (the last block still on the canonical chain)
+
+        Returns:
+            int: Number of transactions removed
+        """
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM address_tx WHERE block_number > ?", (block_number,))
+            removed = conn.execute("DELETE FROM transactions WHERE block_number > ?", (block_number,)).rowcount
+            conn.execute("DELETE FROM checkpoints WHERE block_number > ?", (block_number,))
+            self._set_state(conn, "last_block", block_number)
+        return removed
+
+    # 🔍 Queries
+
+    def get(self, tx_hash: str) -> Optional[dict]:
+        row = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM transactions WHERE hash = ?", (tx_hash.lower(),)
+        ).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def history(
+        self,
+        address: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Newest-first page of an address's transactions (sent, received or contract creations)
+
+        Args:
+            address (str): Wallet or contract address
+            limit (int): Page size, capped at MAX_PAGE_SIZE
+            cursor (str): next_cursor from the previous page
+
+        Returns:
+            tuple: (transactions, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        query = (
+            f"SELECT {', '.join('t.' + c for c in _COLUMNS.split(', '))} FROM address_tx a "
+            "JOIN transactions t ON t.hash = a.hash WHERE a.address = ?"
+        )
+        params: list = [address.lower()]
+        if cursor:
+            block, tx_index = decode_cursor(cursor)
+            query += " AND (a.block_number < ? OR (a.block_number = ? AND a.tx_index < ?))"
+            params += [block, block, tx_index]
+        query += " ORDER BY a.block_number DESC, a.tx_index DESC LIMIT ?"
+        rows = self._connection().execute(query, params + [limit + 1]).fetchall()
+        records = [_row_to_dict(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(records[-1]) if len(rows) > limit else None
+        return records, next_cursor
+
+    def count(self, address: Optional[str] = None) -> int:
+        conn = self._connection()
+        if address is None:
+            return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM address_tx WHERE address = ?", (address.lower(),)).fetchone()[0]
+
+
+_history: Optional[TxHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_tx_history() -> TxHistory:
+    """Process-wide TxHistory at HISTORY_DB_PATH, opened on first use"""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = TxHistory()
+    return _history
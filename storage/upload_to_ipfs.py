@@ -1,19 +1,27 @@
 import requests
 import json
 import os
+import uuid
 
-def upload_to_pinata(file_path):
+PINATA_PIN_FILE_URL = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+
+
+def _pinata_headers():
     # Determine the absolute path to pinata_config.json in the storage folder
     config_path = os.path.join(os.path.dirname(__file__), 'pinata_config.json')
     with open(config_path) as f:
         keys = json.load(f)
 
-    url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-    headers = {
+    return {
         "pinata_api_key": keys["pinata_api_key"],
         "pinata_secret_api_key": keys["pinata_secret_api_key"]
     }
 
+
+def upload_to_pinata(file_path):
+    url = PINATA_PIN_FILE_URL
+    headers = _pinata_headers()
+
     # Open the file to upload
     with open(file_path, "rb") as fp:
         files = {"file": (os.path.basename(file_path), fp)}
@@ -23,3 +31,41 @@ def upload_to_pinata(file_path):
         return response.json()["IpfsHash"]
     else:
         raise Exception("Failed to upload to Pinata: " + response.text)
+
+
+def upload_stream_to_pinata(chunks, filename):
+    """
+    Upload a stream of bytes to Pinata without buffering it in memory or on disk.
+
+    The multipart/form-data body is generated on the fly and sent with chunked
+    transfer encoding, so each block is on the wire as soon as it is produced.
+
+    Args:
+        chunks (Iterable[bytes]): The file content
+        filename (str): Name reported to Pinata for the pinned file
+
+    Returns:
+        str: The IPFS CID of the pinned content
+    """
+    boundary = f"vaultis-{uuid.uuid4().hex}"
+    safe_name = filename.replace('"', '_').replace('\r', '_').replace('\n', '_')
+
+    def body():
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"file\"; filename=\"{safe_name}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    headers = _pinata_headers()
+    headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+    response = requests.post(PINATA_PIN_FILE_URL, data=body(), headers=headers)
+
+    if response.status_code == 200:
+        return response.json()["IpfsHash"]
+    else:
+        raise Exception("Failed to upload to Pinata: " + response.text)